@@ -0,0 +1,157 @@
+"""
+Ingest throughput per stage over the bundled examples.
+
+`--scale N` ingests the examples N times under offset RFC numbers, as a
+synthetic corpus N times the size. Every run drops and recreates a dedicated
+database next to the configured one, so application data is never touched.
+
+    python -m bober.benchmarks.ingest --scale 3 --output ingest.json
+"""
+
+import argparse
+import datetime
+import json
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, make_url, select, text
+from sqlalchemy.orm import Session
+
+from bober.benchmarks.parse import EXAMPLES, peak_rss_mb
+from bober.src.db import get_database_url
+from bober.src.db_models import (
+    Base,
+    RfcLine,
+    RfcSection,
+    RfcTokenCount,
+    Token,
+    TokenPosition,
+)
+from bober.src.migrations import migrate
+from bober.src.parsing.parse_rfc import parse_rfc
+from bober.src.rfc_ingest.ingest_rfc import ingest_rfc
+from bober.src.rfc_ingest.load_from_file import content_hash
+from bober.src.timing import STAGE_TIMER
+
+# the n-th copy of an example is ingested as rfc `num + n * SCALE_OFFSET`
+SCALE_OFFSET = 100_000
+
+STAGES = [
+    "read",
+    "parse",
+    "tokenize_stem",
+    "stage_rows",
+    "token_resolution",
+    "row_insert",
+    "position_insert",
+    "statistics",
+    "commit",
+    "other",
+]
+
+COUNTED_TABLES = [RfcSection, RfcLine, TokenPosition, RfcTokenCount, Token]
+
+
+def recreate_database(database: str) -> str:
+    url = make_url(get_database_url())
+    admin = create_engine(url, isolation_level="AUTOCOMMIT")
+    with admin.connect() as connection:
+        connection.execute(text(f'DROP DATABASE IF EXISTS "{database}"'))
+        connection.execute(text(f'CREATE DATABASE "{database}"'))
+    admin.dispose()
+    return url.set(database=database).render_as_string(hide_password=False)
+
+
+def run(scale: int, database: str) -> dict:
+    engine = create_engine(recreate_database(database))
+    Base.metadata.create_all(engine)
+    migrate(engine)
+
+    with open(EXAMPLES / "examples.json") as f:
+        rfcs_metadata = json.load(f)
+
+    STAGE_TIMER.reset()
+    STAGE_TIMER.enable()
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    with Session(engine) as session:
+        for copy in range(scale):
+            for rfc_metadata in rfcs_metadata:
+                _ingest(session, rfc_metadata, copy * SCALE_OFFSET)
+    elapsed = time.perf_counter() - start
+    STAGE_TIMER.disable()
+
+    with Session(engine) as session:
+        rows = {
+            model.__tablename__: session.scalar(
+                select(func.count()).select_from(model)
+            )
+            for model in COUNTED_TABLES
+        }
+    engine.dispose()
+    total_rows = sum(rows.values())
+
+    return {
+        "scale": scale,
+        "documents": len(rfcs_metadata) * scale,
+        "seconds": round(elapsed, 3),
+        "stages": {
+            stage: {
+                "seconds": round(STAGE_TIMER.totals[stage], 3),
+                "share": round(STAGE_TIMER.totals[stage] / elapsed, 3),
+            }
+            for stage in STAGES
+        },
+        "rows": rows,
+        "rows_per_sec": round(total_rows / elapsed),
+        "positions_per_sec": round(rows["token_position"] / elapsed),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "rss_growth_mb": round(peak_rss_mb() - rss_before, 1),
+    }
+
+
+def _ingest(session: Session, rfc_metadata: dict, num_offset: int) -> None:
+    with STAGE_TIMER.stage("read"):
+        content = (EXAMPLES / f"{rfc_metadata['num']}.txt").read_bytes()
+    with STAGE_TIMER.stage("parse"):
+        parsed_doc = parse_rfc(content.decode())
+
+    # whatever ingest_rfc does outside its own stages
+    with STAGE_TIMER.stage("other"):
+        ingest_rfc(
+            session,
+            rfc_num=int(rfc_metadata["num"]) + num_offset,
+            rfc_title=rfc_metadata["title"],
+            rfc_published_at=datetime.datetime.strptime(
+                rfc_metadata["publish_at"], "%Y/%m/%d"
+            ).date(),
+            rfc_authors=rfc_metadata["authors"],
+            parsed_doc=parsed_doc,
+            content_hash=content_hash(content),
+        )
+    with STAGE_TIMER.stage("commit"):
+        session.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--database", default="bober_bench")
+    parser.add_argument("--output", type=Path, help="write results as json")
+    args = parser.parse_args()
+
+    results = run(args.scale, args.database)
+    for key, value in results.items():
+        if isinstance(value, dict):
+            print(f"{key:>20}:")
+            for name, item in value.items():
+                print(f"{name:>24}: {item}")
+        else:
+            print(f"{key:>20}: {value}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Parse throughput and peak memory over the bundled examples.
+
+Every parsed document is kept alive until the end of the run, so the peak
+RSS reflects the size of the parsed representation.
+
+    python -m bober.benchmarks.parse --repeat 5
+"""
+
+import argparse
+import json
+import resource
+import time
+from pathlib import Path
+
+from bober.src.parsing.parse_rfc import parse_rfc
+
+EXAMPLES = Path(__file__).parent.parent / "resources" / "examples"
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(repeat: int) -> dict:
+    texts = [path.read_text() for path in sorted(EXAMPLES.glob("*.txt"))]
+    rss_before = peak_rss_mb()
+
+    start = time.perf_counter()
+    docs = [parse_rfc(text) for _ in range(repeat) for text in texts]
+    elapsed = time.perf_counter() - start
+
+    lines = [
+        line
+        for doc in docs
+        for section in doc.sections
+        for line in section.lines.values()
+    ]
+    tokens = sum(len(line.tokens) for line in lines)
+    megabytes = sum(map(len, texts)) * repeat / 2**20
+
+    return {
+        "documents": len(docs),
+        "lines": len(lines),
+        "tokens": tokens,
+        "seconds": round(elapsed, 3),
+        "documents_per_sec": round(len(docs) / elapsed, 1),
+        "tokens_per_sec": round(tokens / elapsed),
+        "mb_per_sec": round(megabytes / elapsed, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "rss_growth_mb": round(peak_rss_mb() - rss_before, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="write results as json")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    for key, value in results.items():
+        print(f"{key:>20}: {value}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
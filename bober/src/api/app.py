@@ -0,0 +1,139 @@
+from contextlib import asynccontextmanager
+from typing import Annotated, Iterator
+
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from bober.src.api.schemas import (
+    AbsPositionRequest,
+    RelativePositionRequest,
+    RFCSearchRequest,
+    WordsSearchRequest,
+)
+from bober.src.db import get_database_url
+from bober.src.parsing.stemmer import STEMMER
+from bober.src.phrases.phrase_index import PhraseOccurrence
+from bober.src.phrases.phrases import search_phrase
+from bober.src.search.index_search import (
+    PaginatedResults,
+    abs_position_search,
+    relative_position_search,
+)
+from bober.src.search.pagination import InvalidCursor
+from bober.src.search.rfc_content import load_rfc_content
+from bober.src.search.search_rfc import RFCMeta, search_rfcs
+from bober.src.search.words_index import (
+    QueryFilteredWordsResult,
+    RfcOccurrences,
+    TokenOccurrence,
+    fetch_occurrences,
+    fetch_rfc_occurrences,
+    query_filtered_words,
+)
+
+# connections per worker process. Sync endpoints run on a threadpool of 40
+# threads, so requests past the pool and its overflow wait for a connection
+# rather than opening more than the DB allows for every worker
+POOL_SIZE = 10
+MAX_OVERFLOW = 10
+POOL_TIMEOUT = 10
+# seconds, under the idle timeouts of the DB and proxies in front of it
+POOL_RECYCLE = 1800
+
+
+def create_api_engine(database_url: str) -> Engine:
+    return create_engine(
+        database_url,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        # a connection closed by the DB is replaced instead of failing a
+        # request
+        pool_pre_ping=True,
+    )
+
+
+def get_session(request: Request) -> Iterator[Session]:
+    """A session per request, returning its connection to the pool after."""
+    with request.app.state.sessionmaker() as session:
+        yield session
+
+
+SessionDep = Annotated[Session, Depends(get_session)]
+
+
+def create_app(database_url: str | None = None) -> FastAPI:
+    """
+    The app, connecting to `database_url` or the one of the environment
+    when it starts. The schema is expected to be up to date: migrations run
+    once before the workers start, with `python -m bober.src.migrations`.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        engine = create_api_engine(database_url or get_database_url())
+        app.state.sessionmaker = sessionmaker(engine)
+        with app.state.sessionmaker() as session:
+            STEMMER.warm_from_db(session)
+        yield
+        engine.dispose()
+
+    app = FastAPI(title="bober", lifespan=lifespan)
+
+    @app.exception_handler(InvalidCursor)
+    async def bad_request(request: Request, exc: InvalidCursor):
+        return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+    @app.post("/rfcs/search")
+    def rfcs_search(
+        session: SessionDep, query: RFCSearchRequest
+    ) -> list[RFCMeta]:
+        return search_rfcs(session, query)
+
+    @app.get("/rfcs/{rfc_num}/content", response_class=PlainTextResponse)
+    def rfc_content(session: SessionDep, rfc_num: int) -> str:
+        content = load_rfc_content(session, rfc_num)
+        if content is None:
+            raise HTTPException(404, f"RFC {rfc_num} not found")
+        return content
+
+    @app.post("/words/search")
+    def words_search(
+        session: SessionDep, params: WordsSearchRequest
+    ) -> QueryFilteredWordsResult:
+        return query_filtered_words(session, params)
+
+    @app.get("/words/{token}/rfcs")
+    def word_rfcs(
+        session: SessionDep, token: str, rfc_title: str | None = None
+    ) -> list[RfcOccurrences]:
+        return fetch_rfc_occurrences(session, token, rfc_title)
+
+    @app.get("/words/{token}/rfcs/{rfc_num}")
+    def word_occurrences(
+        session: SessionDep, token: str, rfc_num: int
+    ) -> list[TokenOccurrence]:
+        return fetch_occurrences(session, token, rfc_num)
+
+    @app.post("/index/absolute")
+    def index_absolute(
+        session: SessionDep, criteria: AbsPositionRequest
+    ) -> PaginatedResults:
+        return abs_position_search(session, criteria)
+
+    @app.post("/index/relative")
+    def index_relative(
+        session: SessionDep, criteria: RelativePositionRequest
+    ) -> PaginatedResults:
+        return relative_position_search(session, criteria)
+
+    @app.get("/phrases/search")
+    def phrases_search(
+        session: SessionDep, phrase: str
+    ) -> list[PhraseOccurrence]:
+        return search_phrase(session, phrase)
+
+    return app
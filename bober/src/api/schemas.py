@@ -0,0 +1,37 @@
+from dataclasses import dataclass
+from typing import Annotated
+
+from pydantic import Field
+
+from bober.src.search.index_search import (
+    AbsPositionQuery,
+    RelativePositionQuery,
+)
+from bober.src.search.search_rfc import SearchRFCQuery
+from bober.src.search.words_index import QueryFilteredWordsParams
+
+# ranked searches sort every matching rfc unless they are given a limit
+DEFAULT_RESULTS_LIMIT = 200
+MAX_RESULTS_LIMIT = 1000
+MAX_PAGE_SIZE = 500
+
+PageSize = Annotated[int, Field(gt=0, le=MAX_PAGE_SIZE)]
+
+
+class RFCSearchRequest(SearchRFCQuery):
+    limit: int = Field(DEFAULT_RESULTS_LIMIT, gt=0, le=MAX_RESULTS_LIMIT)
+
+
+@dataclass
+class WordsSearchRequest(QueryFilteredWordsParams):
+    page_size: PageSize = QueryFilteredWordsParams.page_size
+
+
+@dataclass
+class AbsPositionRequest(AbsPositionQuery):
+    page_size: PageSize = AbsPositionQuery.page_size
+
+
+@dataclass
+class RelativePositionRequest(RelativePositionQuery):
+    page_size: PageSize = RelativePositionQuery.page_size
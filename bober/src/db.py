@@ -28,11 +28,15 @@ def drop_schema(engine):
     metadata.drop_all(bind=engine)
 
 
-def get_database_url():
+def get_database_url(driver: str | None = None):
     load_dotenv()
     POSTGRES_DB = os.getenv("POSTGRES_DB")
     POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
     POSTGRES_PORT = os.getenv("POSTGRES_PORT")
     POSTGRES_SCHEMA = os.getenv("POSTGRES_SCHEMA")
     POSTGRES_USERNAME = os.getenv("POSTGRES_USERNAME")
-    return f"{POSTGRES_SCHEMA}://{POSTGRES_USERNAME}:{POSTGRES_PASSWORD}@localhost:{POSTGRES_PORT}/{POSTGRES_DB}"
+    # the db service's name when running in docker compose
+    POSTGRES_HOST = os.getenv("POSTGRES_HOST", "localhost")
+    if driver:
+        POSTGRES_SCHEMA = f"{POSTGRES_SCHEMA}+{driver}"
+    return f"{POSTGRES_SCHEMA}://{POSTGRES_USERNAME}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
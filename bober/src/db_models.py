@@ -1,4 +1,14 @@
-from sqlalchemy import Date, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Mapped, declarative_base, mapped_column, relationship
 
 Base = declarative_base()
@@ -10,6 +20,10 @@ class Rfc(Base):
     num: Mapped[int] = mapped_column(Integer, primary_key=True)
     title: Mapped[str] = mapped_column(String)
     published_at: Mapped[Date] = mapped_column(Date, index=True)
+    # hash of the ingested file, used to skip re-ingesting identical content
+    content_hash: Mapped[str] = mapped_column(String, nullable=True)
+    # number of token positions, the document length for BM25
+    total_tokens: Mapped[int] = mapped_column(Integer, nullable=True)
 
     authors: Mapped[list["Author"]] = relationship(
         "Author", back_populates="rfc", cascade="all, delete-orphan"
@@ -33,6 +47,46 @@ class Author(Base):
     rfc: Mapped["Rfc"] = relationship("Rfc", back_populates="authors")
 
 
+class RfcPage(Base):
+    """
+    The text of a run of lines on one page of an RFC, zlib compressed.
+
+    The runs of an RFC concatenate to the document `load_rfc_content`
+    returns, so a line range is read without the whole document.
+    """
+
+    __tablename__ = 'rfc_page'
+
+    rfc_num: Mapped[int] = mapped_column(
+        Integer, ForeignKey('rfc.num'), primary_key=True
+    )
+    # absolute number of the run's first line
+    first_line: Mapped[int] = mapped_column(Integer, primary_key=True)
+    line_count: Mapped[int] = mapped_column(Integer)
+    page: Mapped[int] = mapped_column(Integer)
+    content: Mapped[bytes] = mapped_column(LargeBinary)
+
+
+class RfcLineStatistics(Base):
+    """
+    Prefix sums of the per-line counts of an RFC's text that the viewer's
+    statistics report: entry `i` sums lines 1 to `i`, entry 0 is 0.
+
+    The counts of a line range are the difference of two entries, so no
+    text is tokenized to answer statistics.
+    """
+
+    __tablename__ = 'rfc_line_statistics'
+
+    rfc_num: Mapped[int] = mapped_column(
+        Integer, ForeignKey('rfc.num'), primary_key=True
+    )
+    words: Mapped[list[int]] = mapped_column(ARRAY(Integer))
+    word_chars: Mapped[list[int]] = mapped_column(ARRAY(Integer))
+    non_white_chars: Mapped[list[int]] = mapped_column(ARRAY(Integer))
+    all_chars: Mapped[list[int]] = mapped_column(ARRAY(Integer))
+
+
 class RfcSection(Base):
     __tablename__ = 'rfc_section'
 
@@ -46,10 +100,15 @@ class RfcSection(Base):
     page: Mapped[int] = mapped_column(Integer)
     row_start: Mapped[int] = mapped_column(Integer)
     row_end: Mapped[int] = mapped_column(Integer)
+    # hash of the section's lines and coordinates, used to diff re-ingests
+    content_hash: Mapped[str] = mapped_column(String, nullable=True)
 
     rfc: Mapped["Rfc"] = relationship("Rfc", back_populates="sections")
     lines: Mapped[list["RfcLine"]] = relationship(
-        "RfcLine", back_populates="section", cascade="all, delete-orphan"
+        "RfcLine",
+        back_populates="section",
+        cascade="all, delete-orphan",
+        order_by="RfcLine.line_number",
     )
 
 
@@ -87,7 +146,7 @@ class Token(Base):
     id: Mapped[int] = mapped_column(
         Integer, primary_key=True, autoincrement=True
     )
-    token: Mapped[str] = mapped_column(String, index=True)
+    token: Mapped[str] = mapped_column(String, index=True, unique=True)
     stem: Mapped[str] = mapped_column(String, index=True)
 
     positions: Mapped[list["TokenPosition"]] = relationship(
@@ -106,6 +165,21 @@ class Token(Base):
 
 class TokenPosition(Base):
     __tablename__ = 'token_position'
+    __table_args__ = (
+        Index(
+            'ix_token_position_abs_coordinates',
+            'rfc_num',
+            'abs_line',
+            'abs_column',
+        ),
+        Index(
+            'ix_token_position_relative_coordinates',
+            'rfc_num',
+            'section_index',
+            'line_in_section',
+            'index',
+        ),
+    )
 
     id: Mapped[int] = mapped_column(
         Integer, primary_key=True, autoincrement=True
@@ -125,6 +199,17 @@ class TokenPosition(Base):
     abs_index: Mapped[int] = mapped_column(
         Integer
     )  # the number of the token in the whole file
+
+    # copies of the line's and section's coordinates, so position lookups
+    # are index range scans instead of joins
+    rfc_num: Mapped[int] = mapped_column(Integer)
+    section_index: Mapped[int] = mapped_column(Integer)
+    line_in_section: Mapped[int] = mapped_column(Integer)
+    abs_line: Mapped[int] = mapped_column(Integer)
+    # columns of the token in the file, indentation included
+    abs_column: Mapped[int] = mapped_column(Integer)
+    abs_end_column: Mapped[int] = mapped_column(Integer)
+
     token: Mapped["Token"] = relationship("Token", back_populates="positions")
     line: Mapped["RfcLine"] = relationship(
         "RfcLine", back_populates="positions"
@@ -162,6 +247,27 @@ class TokenToGroup(Base):
     )
 
 
+class GroupRfcCount(Base):
+    """
+    Occurrences of the tokens of a word group per RFC, refreshed when the
+    group's words change or the RFC is ingested.
+    """
+
+    __tablename__ = 'group_rfc_count'
+
+    group_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey('token_group.id'), primary_key=True
+    )
+    rfc_num: Mapped[int] = mapped_column(
+        Integer, ForeignKey('rfc.num'), primary_key=True, index=True
+    )
+    total_occurrences: Mapped[int] = mapped_column(Integer, default=0)
+    # number of the group's tokens found in the rfc
+    token_count: Mapped[int] = mapped_column(Integer, default=0)
+
+    group: Mapped["TokenGroup"] = relationship("TokenGroup")
+
+
 class Phrase(Base):
     __tablename__ = 'phrase'
 
@@ -206,3 +312,71 @@ class RfcTokenCount(Base):
 
     rfc: Mapped["Rfc"] = relationship("Rfc", back_populates="token_counts")
     token: Mapped["Token"] = relationship("Token", back_populates="rfc_counts")
+
+
+class StemStatistics(Base):
+    __tablename__ = 'stem_statistics'
+
+    stem: Mapped[str] = mapped_column(String, primary_key=True)
+    # number of rfcs with a token of this stem, maintained by the ingest
+    document_frequency: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class TokenStatistics(Base):
+    """
+    Corpus-wide totals of a token, maintained by the ingest, so the word
+    index browses the vocabulary without aggregating rfc_token_count.
+
+    The token and stem are copied from the token table, so the indexes for
+    both word index orders cover the query.
+    """
+
+    __tablename__ = 'token_statistics'
+    __table_args__ = (
+        Index(
+            'ix_token_statistics_token',
+            'token',
+            postgresql_include=['stem', 'total_occurrences'],
+        ),
+        Index(
+            'ix_token_statistics_occurrences',
+            'total_occurrences',
+            'token',
+            postgresql_include=['stem'],
+        ),
+    )
+
+    token_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey('token.id'), primary_key=True
+    )
+    token: Mapped[str] = mapped_column(String)
+    stem: Mapped[str] = mapped_column(String)
+    total_occurrences: Mapped[int] = mapped_column(BigInteger, default=0)
+    # number of rfcs with the token
+    rfc_count: Mapped[int] = mapped_column(Integer, default=0)
+    # publication years of the earliest and latest of those rfcs
+    first_year: Mapped[int] = mapped_column(Integer, nullable=True)
+    last_year: Mapped[int] = mapped_column(Integer, nullable=True)
+
+
+class CorpusStatistics(Base):
+    __tablename__ = 'corpus_statistics'
+
+    # a single row, CORPUS_STATISTICS_ID
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    total_documents: Mapped[int] = mapped_column(Integer, default=0)
+    # also a server default, as the migrations insert the row in SQL
+    total_tokens: Mapped[int] = mapped_column(
+        BigInteger, default=0, server_default="0"
+    )
+    # commits that changed the corpus, see CorpusVersion.stored
+    version: Mapped[int] = mapped_column(
+        BigInteger, default=0, server_default="0"
+    )
+    # the ones of them that changed ingested documents
+    documents_version: Mapped[int] = mapped_column(
+        BigInteger, default=0, server_default="0"
+    )
+
+
+CORPUS_STATISTICS_ID = 1
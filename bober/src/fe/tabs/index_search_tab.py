@@ -22,6 +22,7 @@ class IndexSearchTab(BaseTab):
         EVENT_SYSTEM.subscribe(RFC_ADDED_EVENT, self._update_rfcs)
         self.current_page = 1
         self.page_size = 50
+        self.cursor = None
         self.update_pagination_controls(
             PaginatedResults(results=[], total_count=0, total_pages=0)
         )
@@ -95,31 +96,34 @@ class IndexSearchTab(BaseTab):
         self.next_button.pack(side="left", padx=5)
 
     def update_pagination_controls(self, paginated_results: PaginatedResults):
+        approx = "" if paginated_results.total_is_exact else "~"
         self.page_label.config(
-            text=f"Page {self.current_page} of {paginated_results.total_pages}"
+            text=f"Page {self.current_page} of {approx}{paginated_results.total_pages}"
         )
+        self.next_cursor = paginated_results.next_cursor
+        self.prev_cursor = paginated_results.prev_cursor
         self.prev_button.config(
-            state=tk.NORMAL if self.current_page > 1 else tk.DISABLED
+            state=tk.NORMAL if self.prev_cursor else tk.DISABLED
         )
         self.next_button.config(
-            state=(
-                tk.NORMAL
-                if self.current_page < paginated_results.total_pages
-                else tk.DISABLED
-            )
+            state=tk.NORMAL if self.next_cursor else tk.DISABLED
         )
 
     def prev_page(self):
-        if self.current_page > 1:
+        if self.prev_cursor:
+            self.cursor = self.prev_cursor
             self.current_page -= 1
             self.search()
 
     def next_page(self):
-        self.current_page += 1
-        self.search()
+        if self.next_cursor:
+            self.cursor = self.next_cursor
+            self.current_page += 1
+            self.search()
 
     def reset_pagination(self):
         self.current_page = 1
+        self.cursor = None
 
 
 class AbsPosSearchTab(IndexSearchTab):
@@ -160,7 +164,7 @@ class AbsPosSearchTab(IndexSearchTab):
                 if self.column_entry.get()
                 else None
             ),
-            page=self.current_page,
+            cursor=self.cursor,
             page_size=self.page_size,
         )
 
@@ -216,7 +220,7 @@ class RelativePosSearchTab(IndexSearchTab):
             word_in_line=(
                 int(self.word_entry.get()) if self.word_entry.get() else None
             ),
-            page=self.current_page,
+            cursor=self.cursor,
             page_size=self.page_size,
         )
 
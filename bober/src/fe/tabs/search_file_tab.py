@@ -8,7 +8,14 @@ from bober.src.fe.event_system import EVENT_SYSTEM
 from bober.src.fe.events import RFC_ADDED_EVENT
 from bober.src.fe.tabs.base_tab import BaseTab
 from bober.src.fe.windows.rfc_window import RFCWindow
-from bober.src.search.search_rfc import SearchRFCQuery, search_rfcs
+from bober.src.search.search_rfc import (
+    Ranking,
+    SearchRFCQuery,
+    search_rfcs,
+)
+
+# the table shows the best results, the rest are never looked at
+RESULTS_LIMIT = 200
 
 
 class SearchFileTab(BaseTab):
@@ -18,6 +25,10 @@ class SearchFileTab(BaseTab):
         self.title_entry = self.create_entry("Title:")
         self.contains_tokens = self.create_entry("Contains tokens:")
         self.author_entry = self.create_entry("Authors:")
+        self.ranking_combobox = self.create_combobox(
+            self, "Ranking:", list(Ranking)
+        )
+        self.ranking_combobox.set(Ranking.BM25.value)
         self._create_calenders()
 
         # Create the Treeview widget for displaying search results
@@ -49,6 +60,7 @@ class SearchFileTab(BaseTab):
         )
         self.contains_tokens.bind("<KeyRelease>", self.search_files)
         self.author_entry.bind("<KeyRelease>", self.search_files)
+        self.ranking_combobox.bind("<<ComboboxSelected>>", self.search_files)
         EVENT_SYSTEM.subscribe(RFC_ADDED_EVENT, self.search_files)
 
         self.search_files()
@@ -107,6 +119,8 @@ class SearchFileTab(BaseTab):
             date_range=(published_after, published_before),
             authors=authors or None,
             tokens=tokens or None,
+            ranking=Ranking(self.ranking_combobox.get()),
+            limit=RESULTS_LIMIT,
         )
         filtered_rfcs = search_rfcs(self.session, search_query)
         self.display_search_results(filtered_rfcs)
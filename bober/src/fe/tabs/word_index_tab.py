@@ -23,6 +23,7 @@ class WordIndexTab(BaseTab):
         super().__init__(parent, session)
         self.current_page = 1
         self.page_size = 50
+        self.cursor = None
         self.update_results()
         EVENT_SYSTEM.subscribe(NEW_GROUP_EVENT, self._update_groups)
         EVENT_SYSTEM.subscribe(RFC_ADDED_EVENT, self._update_rfcs)
@@ -106,6 +107,7 @@ class WordIndexTab(BaseTab):
 
     def reset_and_update(self, event=None):
         self.current_page = 1
+        self.cursor = None
         self.update_results()
 
     def update_results(self, event=None):
@@ -127,8 +129,9 @@ class WordIndexTab(BaseTab):
         self.word_nodes = {}
         self.title_nodes = {}
         results = self._query_words()
+        approx = "" if results.total_is_exact else "~"
         self.words_count_label.config(
-            text=f"fetched {len(results.words)} tokens out of {results.total_count} matching"
+            text=f"fetched {len(results.words)} tokens out of {approx}{results.total_count} matching"
         )
         for token, stem, count in results.words:
             node = self.tree.insert(
@@ -137,28 +140,36 @@ class WordIndexTab(BaseTab):
             self.tree.insert(node, 'end')
             self.word_nodes[node] = token
 
-        self.update_pagination_controls(results.total_count)
+        self.update_pagination_controls(results)
 
-    def update_pagination_controls(self, total_count):
-        total_pages = (total_count + self.page_size - 1) // self.page_size
+    def update_pagination_controls(self, results):
+        total_pages = (
+            results.total_count + self.page_size - 1
+        ) // self.page_size
+        approx = "" if results.total_is_exact else "~"
         self.page_label.config(
-            text=f"Page {self.current_page} of {total_pages}"
+            text=f"Page {self.current_page} of {approx}{total_pages}"
         )
+        self.next_cursor = results.next_cursor
+        self.prev_cursor = results.prev_cursor
         self.prev_button.config(
-            state=tk.NORMAL if self.current_page > 1 else tk.DISABLED
+            state=tk.NORMAL if self.prev_cursor else tk.DISABLED
         )
         self.next_button.config(
-            state=tk.NORMAL if self.current_page < total_pages else tk.DISABLED
+            state=tk.NORMAL if self.next_cursor else tk.DISABLED
         )
 
     def prev_page(self):
-        if self.current_page > 1:
+        if self.prev_cursor:
+            self.cursor = self.prev_cursor
             self.current_page -= 1
             self.update_results()
 
     def next_page(self):
-        self.current_page += 1
-        self.update_results()
+        if self.next_cursor:
+            self.cursor = self.next_cursor
+            self.current_page += 1
+            self.update_results()
 
     def _query_words(self):
         params = QueryFilteredWordsParams(
@@ -167,7 +178,7 @@ class WordIndexTab(BaseTab):
             partial_token=self.partial_token_entry.get() or None,
             sort_by=SortBy(self.sort_by_combobox.get()),
             sort_order=SortOrder(self.sort_order_combobox.get()),
-            page=self.current_page,
+            cursor=self.cursor,
             page_size=self.page_size,
         )
 
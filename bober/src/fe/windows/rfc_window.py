@@ -10,10 +10,14 @@ from bober.src.fe.handlers import (
 )
 from bober.src.fe.windows.base_window import BaseWindow
 from bober.src.fe.windows.statistical_data_window import StatisticalDataWindow
-from bober.src.parsing.statistical_analysis import StringStatisticsManager
+from bober.src.parsing.statistical_analysis import (
+    StoredStatisticsManager,
+    StringStatisticsManager,
+)
+from bober.src.search.line_statistics import get_line_statistics
 from bober.src.search.positions import AbsPosition
 from bober.src.search.rfc_content import (
-    get_pages_for_line_numbers,
+    get_line_page_map,
     load_rfc_content,
 )
 from bober.src.search.search_rfc import SearchRFCQuery, search_rfcs
@@ -39,13 +43,21 @@ class RFCWindow(BaseWindow):
 
         self.create_scroll_region(content, highlights)
 
-        line_to_page_mapping = get_pages_for_line_numbers(
-            session, rfc, 1, len(content.split('\n'))
-        )  # todo maybe start with 0
-        self.infer_page_for_first_empty_lines(line_to_page_mapping, 1)
-        self.file_statistical_data_manager = StringStatisticsManager(
-            content, line_to_page_mapping
-        )
+        # cached with the content, selections resolve pages without the DB
+        self.line_pages = get_line_page_map(self.session, rfc)
+        # counted at ingest, statistics need no tokenizing of the text
+        self.line_statistics = get_line_statistics(self.session, rfc)
+        if self.line_statistics is not None:
+            self.file_statistical_data_manager = StoredStatisticsManager(
+                self.line_statistics,
+                self.line_pages,
+                first_line=1,
+                last_line=self.line_statistics.line_count,
+            )
+        else:
+            self.file_statistical_data_manager = StringStatisticsManager(
+                content, self.line_pages
+            )
 
         if abs_line:
             self.scroll_to_line(abs_line)
@@ -209,27 +221,38 @@ class RFCWindow(BaseWindow):
 
     def show_statistical_data_selection(self):
         try:
-            selected_text = self.text_area.get(tk.SEL_FIRST, tk.SEL_LAST)
             start_index = self.text_area.index(tk.SEL_FIRST)
             end_index = self.text_area.index(tk.SEL_LAST)
-
-            start_row, _ = map(int, start_index.split('.'))
-            end_row, _ = map(int, end_index.split('.'))
         except TclError:
             self.show_error("No text selected!")
             return
-        if not selected_text:
+        if start_index == end_index:
             self.show_error("No text selected!")
             return
 
-        line_to_page_mapping = get_pages_for_line_numbers(
-            self.session, self.rfc, start_row, end_row
-        )  # todo check if start and end are good
-        self.infer_page_for_first_empty_lines(line_to_page_mapping, start_row)
-        self.selection_statistical_data_manager = StringStatisticsManager(
-            selected_text,
-            line_to_page_mapping,
-        )
+        start_row, _ = map(int, start_index.split('.'))
+        end_row, _ = map(int, end_index.split('.'))
+        if self.line_statistics is not None and end_row > start_row:
+            # whole lines come from the stored statistics, only the ends
+            # of the selection are counted
+            self.selection_statistical_data_manager = StoredStatisticsManager(
+                self.line_statistics,
+                self.line_pages,
+                first_line=start_row,
+                last_line=end_row,
+                partial_lines={
+                    start_row: self.text_area.get(
+                        start_index, f"{start_row}.end"
+                    ),
+                    end_row: self.text_area.get(f"{end_row}.0", end_index),
+                },
+            )
+        else:
+            self.selection_statistical_data_manager = StringStatisticsManager(
+                self.text_area.get(start_index, end_index),
+                self.line_pages,
+                first_line=start_row,
+            )
         self.show_statistical_data_window(
             "Selection statistical data",
             self.selection_statistical_data_manager,
@@ -242,13 +265,3 @@ class RFCWindow(BaseWindow):
             stats_manager=stats_manager,
             session=None,
         )
-
-    def infer_page_for_first_empty_lines(self, line_to_page_mapping, start_row):
-        if not line_to_page_mapping:
-            self.show_error("Cannot select empty text")
-        first_line = min(line_to_page_mapping.keys())
-        if first_line <= start_row:
-            return line_to_page_mapping
-        first_page = min(line_to_page_mapping.values())
-        for line in range(start_row, first_line):
-            line_to_page_mapping[line] = first_page
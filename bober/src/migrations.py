@@ -0,0 +1,199 @@
+"""
+Idempotent upgrades for databases created by an older version of the models.
+
+`Base.metadata.create_all` only creates missing tables, so every column or
+index added to an existing table needs a statement here as well.
+"""
+
+from sqlalchemy import Engine, create_engine, func, select, text
+from sqlalchemy.orm import Session
+
+from bober.src.db import get_database_url
+from bober.src.db_models import Base
+from bober.src.rfc_ingest.page_text import backfill_rfc_pages
+
+# advisory lock key, the same in every process preparing the database
+SCHEMA_LOCK_ID = 0x626F626572
+
+MIGRATIONS = [
+    "ALTER TABLE rfc ADD COLUMN IF NOT EXISTS content_hash VARCHAR",
+    "ALTER TABLE rfc_section ADD COLUMN IF NOT EXISTS content_hash VARCHAR",
+    # token.token became unique, ix_token_token is rebuilt as a unique index
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_index
+            WHERE indexrelid = to_regclass('ix_token_token') AND indisunique
+        ) THEN
+            DROP INDEX IF EXISTS ix_token_token;
+            CREATE UNIQUE INDEX ix_token_token ON token (token);
+        END IF;
+    END $$
+    """,
+    # the unique index an earlier migration added next to ix_token_token
+    "DROP INDEX IF EXISTS uq_token_token",
+    # statistics of rfcs ingested before the ingest maintained them
+    """
+    INSERT INTO stem_statistics (stem, document_frequency)
+    SELECT token.stem, count(DISTINCT rfc_token_count.rfc_num)
+    FROM token JOIN rfc_token_count ON rfc_token_count.token_id = token.id
+    WHERE NOT EXISTS (SELECT 1 FROM corpus_statistics)
+    GROUP BY token.stem
+    """,
+    # before the insert below, which leaves total_tokens to its default
+    """
+    ALTER TABLE corpus_statistics
+    ADD COLUMN IF NOT EXISTS total_tokens BIGINT DEFAULT 0
+    """,
+    "ALTER TABLE corpus_statistics ALTER COLUMN total_tokens SET DEFAULT 0",
+    """
+    ALTER TABLE corpus_statistics
+    ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0
+    """,
+    """
+    ALTER TABLE corpus_statistics
+    ADD COLUMN IF NOT EXISTS documents_version BIGINT NOT NULL DEFAULT 0
+    """,
+    """
+    INSERT INTO corpus_statistics (id, total_documents)
+    SELECT 1, count(*) FROM rfc
+    ON CONFLICT (id) DO NOTHING
+    """,
+    "ALTER TABLE rfc ADD COLUMN IF NOT EXISTS total_tokens INTEGER",
+    """
+    UPDATE rfc SET total_tokens = (
+        SELECT coalesce(sum(total_positions), 0) FROM rfc_token_count
+        WHERE rfc_token_count.rfc_num = rfc.num
+    )
+    WHERE total_tokens IS NULL
+    """,
+    """
+    UPDATE corpus_statistics
+    SET total_tokens = (SELECT coalesce(sum(total_tokens), 0) FROM rfc)
+    WHERE total_tokens = 0
+    """,
+    # substring filters (ilike '%x%') use trigram indexes where pg_trgm can
+    # be installed, and the in-process vocabulary index elsewhere
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'
+        ) THEN
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+            CREATE INDEX IF NOT EXISTS ix_token_token_trgm
+                ON token USING gin (token gin_trgm_ops);
+            CREATE INDEX IF NOT EXISTS ix_token_stem_trgm
+                ON token USING gin (stem gin_trgm_ops);
+            CREATE INDEX IF NOT EXISTS ix_rfc_title_trgm
+                ON rfc USING gin (title gin_trgm_ops);
+            CREATE INDEX IF NOT EXISTS ix_authors_author_name_trgm
+                ON authors USING gin (author_name gin_trgm_ops);
+        END IF;
+    EXCEPTION WHEN insufficient_privilege THEN
+        RAISE NOTICE 'pg_trgm not installed, no trigram indexes';
+    END $$
+    """,
+    # coordinates copied onto token_position, backfilled once from the joins
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'token_position' AND column_name = 'rfc_num'
+        ) THEN
+            ALTER TABLE token_position
+                ADD COLUMN rfc_num INTEGER,
+                ADD COLUMN section_index INTEGER,
+                ADD COLUMN line_in_section INTEGER,
+                ADD COLUMN abs_line INTEGER,
+                ADD COLUMN abs_column INTEGER,
+                ADD COLUMN abs_end_column INTEGER;
+            UPDATE token_position SET
+                rfc_num = rfc_section.rfc_num,
+                section_index = rfc_section.index,
+                line_in_section = rfc_line.line_number,
+                abs_line = rfc_line.abs_line_number,
+                abs_column = rfc_line.indentation + token_position.start_position,
+                abs_end_column = rfc_line.indentation + token_position.end_position
+            FROM rfc_line JOIN rfc_section ON rfc_section.id = rfc_line.section_id
+            WHERE rfc_line.id = token_position.line_id;
+            ALTER TABLE token_position
+                ALTER COLUMN rfc_num SET NOT NULL,
+                ALTER COLUMN section_index SET NOT NULL,
+                ALTER COLUMN line_in_section SET NOT NULL,
+                ALTER COLUMN abs_line SET NOT NULL,
+                ALTER COLUMN abs_column SET NOT NULL,
+                ALTER COLUMN abs_end_column SET NOT NULL;
+        END IF;
+    END $$
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_token_position_abs_coordinates
+    ON token_position (rfc_num, abs_line, abs_column)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_token_position_relative_coordinates
+    ON token_position (rfc_num, section_index, line_in_section, index)
+    """,
+    # token statistics of rfcs ingested before the ingest maintained them
+    """
+    INSERT INTO token_statistics (
+        token_id, token, stem, total_occurrences, rfc_count,
+        first_year, last_year
+    )
+    SELECT
+        token.id, token.token, token.stem,
+        sum(rfc_token_count.total_positions), count(rfc_token_count.rfc_num),
+        min(extract(year FROM rfc.published_at)::integer),
+        max(extract(year FROM rfc.published_at)::integer)
+    FROM token
+    JOIN rfc_token_count ON rfc_token_count.token_id = token.id
+    JOIN rfc ON rfc.num = rfc_token_count.rfc_num
+    WHERE NOT EXISTS (SELECT 1 FROM token_statistics)
+    GROUP BY token.id
+    """,
+    # occurrences of word groups per rfc, for databases created before them
+    """
+    INSERT INTO group_rfc_count (
+        group_id, rfc_num, total_occurrences, token_count
+    )
+    SELECT
+        token_to_group.group_id, rfc_token_count.rfc_num,
+        sum(rfc_token_count.total_positions), count(rfc_token_count.token_id)
+    FROM token_to_group
+    JOIN rfc_token_count ON rfc_token_count.token_id = token_to_group.token_id
+    WHERE NOT EXISTS (SELECT 1 FROM group_rfc_count)
+    GROUP BY token_to_group.group_id, rfc_token_count.rfc_num
+    """,
+]
+
+
+def migrate(engine: Engine) -> None:
+    with engine.begin() as connection:
+        for statement in MIGRATIONS:
+            connection.execute(text(statement))
+
+
+def prepare_database(engine: Engine) -> None:
+    """
+    Create missing tables, run the migrations and backfill data stored at
+    ingest, in one transaction. Processes starting together, like the GUI
+    and a deploy running `python -m bober.src.migrations`, take turns, and
+    all but the first find nothing to do.
+    """
+    with engine.begin() as connection:
+        connection.execute(select(func.pg_advisory_xact_lock(SCHEMA_LOCK_ID)))
+        Base.metadata.create_all(connection)
+        for statement in MIGRATIONS:
+            connection.execute(text(statement))
+        with Session(bind=connection) as session:
+            backfill_rfc_pages(session)
+            session.commit()
+
+
+if __name__ == "__main__":
+    engine = create_engine(get_database_url())
+    prepare_database(engine)
+    engine.dispose()
@@ -1,32 +1,22 @@
-import re
-from typing import List
+from typing import List, Sequence
 
 from bober.src.parsing.parsed_types import ParsedLine, ParsedToken
+from bober.src.parsing.tokenizer import DEFAULT_TOKENIZER, Token, Tokenizer
+from bober.src.timing import STAGE_TIMER
 
 
-def get_words_for_line(line: str) -> List[str]:
-    words = re.findall(r'\b\w+\b', line)
-    return words
+def get_words_for_line(
+    line: str, tokenizer: Tokenizer = DEFAULT_TOKENIZER
+) -> List[str]:
+    return tokenizer.words(line)
 
 
-def parse_line(line: str, abs_num: int) -> ParsedLine:
+def parse_line(
+    line: str, abs_num: int, tokenizer: Tokenizer = DEFAULT_TOKENIZER
+) -> ParsedLine:
     stripped = line.lstrip()
-    words = get_words_for_line(line)
-
-    tokens = []
-    current_position = 0
-    for word in words:
-        if not any(char.isalnum() for char in word):
-            # skip words without numeric or alpha
-            continue
-
-        start = stripped.index(word, current_position)
-        token = ParsedToken(
-            word=word.lower(),
-            start=start,
-        )
-        tokens.append(token)
-        current_position = start + len(word)
+    with STAGE_TIMER.stage("tokenize_stem"):
+        tokens = _parsed_tokens(tokenizer.tokenize(stripped))
 
     return ParsedLine(
         absolute_line=abs_num,
@@ -34,3 +24,32 @@ def parse_line(line: str, abs_num: int) -> ParsedLine:
         indentation=(len(line) - len(stripped)),
         tokens=tokens,
     )
+
+
+def parse_lines(
+    lines: Sequence[tuple[int, str]], tokenizer: Tokenizer = DEFAULT_TOKENIZER
+) -> List[ParsedLine]:
+    """
+    Parse `(abs_num, line)` pairs like `parse_line`, tokenizing all the lines
+    in one batch.
+    """
+    stripped = [line.lstrip() for _, line in lines]
+    with STAGE_TIMER.stage("tokenize_stem"):
+        lines_tokens = [
+            _parsed_tokens(tokens)
+            for tokens in tokenizer.tokenize_lines(stripped)
+        ]
+
+    return [
+        ParsedLine(
+            absolute_line=abs_num,
+            text=text,
+            indentation=(len(line) - len(text)),
+            tokens=tokens,
+        )
+        for (abs_num, line), text, tokens in zip(lines, stripped, lines_tokens)
+    ]
+
+
+def _parsed_tokens(tokens: List[Token]) -> List[ParsedToken]:
+    return [ParsedToken(word, start) for word, start, _ in tokens]
@@ -1,3 +1,8 @@
+import mmap
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
 from bober.src.parsing.parsed_types import ParsedDocument
 from bober.src.parsing.sections_parser import SectionsParser
 
@@ -5,3 +10,23 @@ from bober.src.parsing.sections_parser import SectionsParser
 def parse_rfc(doc: str) -> ParsedDocument:
     sections = list(SectionsParser(doc))
     return ParsedDocument(sections=sections)
+
+
+def parse_rfc_file(file_path: str | Path) -> ParsedDocument:
+    with stream_rfc_file(file_path) as sections:
+        return ParsedDocument(sections=list(sections))
+
+
+@contextmanager
+def stream_rfc_file(file_path: str | Path) -> Iterator[SectionsParser]:
+    """
+    Parse a file section by section over a read-only memory map, so the
+    document is never held in memory as a whole.
+    """
+    with open(file_path, "rb") as f:
+        if not Path(file_path).stat().st_size:
+            yield SectionsParser("")  # empty files can't be mapped
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield SectionsParser(mapped)
@@ -1,10 +1,12 @@
-from nltk import PorterStemmer
-from pydantic import BaseModel
+from dataclasses import dataclass
 
-STEMMER = PorterStemmer()
+from bober.src.parsing.stemmer import STEMMER
 
 
-class ParsedToken(BaseModel):
+# plain slotted dataclasses: one is allocated per token, so they must be cheap.
+# pydantic.TypeAdapter validates/serializes them where a boundary needs it
+@dataclass(slots=True)
+class ParsedToken:
     word: str
     start: int
 
@@ -17,19 +19,22 @@ class ParsedToken(BaseModel):
         return self.start + len(self.word)
 
 
-class ParsedLine(BaseModel):
+@dataclass(slots=True)
+class ParsedLine:
     absolute_line: int
     text: str
     indentation: int
     tokens: list[ParsedToken]
 
 
-class ParsedSection(BaseModel):
+@dataclass(slots=True)
+class ParsedSection:
     page: int
     page_line: int
     # line index in section
     lines: dict[int, ParsedLine]
 
 
-class ParsedDocument(BaseModel):
+@dataclass(slots=True)
+class ParsedDocument:
     sections: list[ParsedSection]
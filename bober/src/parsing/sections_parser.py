@@ -1,16 +1,48 @@
+import io
+import mmap
 import re
+from typing import Iterator, TextIO
 
-from bober.src.parsing.line_parser import parse_line
-from bober.src.parsing.parsed_types import ParsedLine, ParsedSection
+from bober.src.parsing.line_parser import parse_lines
+from bober.src.parsing.parsed_types import ParsedSection
+from bober.src.parsing.tokenizer import DEFAULT_TOKENIZER, Tokenizer
 
 # compile once for the whole program
 PAGE_END_PATTERN = re.compile(r'(?:(?:\S+\s+)?\S+\s+)?\[Page \d+\]\s*$')
 
 
+def iter_lines(
+    doc: str | TextIO | mmap.mmap, encoding: str = "utf-8"
+) -> Iterator[str]:
+    """
+    Lazily yield the lines of a document, split exactly like `str.splitlines`.
+
+    Streams and memory maps are read one physical line at a time, and every
+    physical line is split again so form feeds and other unicode line
+    boundaries still start new lines.
+    """
+    if isinstance(doc, str):
+        doc = io.StringIO(doc, newline="")
+
+    if isinstance(doc, mmap.mmap):
+        for raw_line in iter(doc.readline, b""):
+            yield from raw_line.decode(encoding).splitlines()
+        return
+
+    for line in doc:
+        yield from line.splitlines()
+
+
 class SectionsParser:
-    def __init__(self, doc: str):
-        self.lines = doc.splitlines()
-        self.current_section: dict[int, ParsedLine] = {}
+    def __init__(
+        self,
+        doc: str | TextIO | mmap.mmap,
+        tokenizer: Tokenizer = DEFAULT_TOKENIZER,
+    ):
+        self.lines = iter_lines(doc)
+        self.tokenizer = tokenizer
+        # (abs_num, line) of the section's lines, tokenized when it closes
+        self.current_section: list[tuple[int, str]] = []
         self.section_start_line: int | None = None
         self.current_page = 1
         self.current_line = 0
@@ -20,8 +52,7 @@ class SectionsParser:
         return self
 
     def __next__(self) -> ParsedSection:
-        while self.current_line < len(self.lines):
-            line = self.lines[self.current_line]
+        for line in self.lines:
             self.current_line += 1
             self.line_in_page += 1
 
@@ -33,9 +64,7 @@ class SectionsParser:
             if not self.current_section:  # new section
                 self.section_start_line = self.line_in_page
 
-            self.current_section[
-                self.line_in_page - self.section_start_line
-            ] = parse_line(line, self.current_line)
+            self.current_section.append((self.current_line, line))
 
             # Check if this line is a page ending
             if PAGE_END_PATTERN.search(line):
@@ -52,13 +81,15 @@ class SectionsParser:
 
     def _close_section(self) -> ParsedSection | None:
         if self.current_section:
+            parsed_lines = parse_lines(self.current_section, self.tokenizer)
             section = ParsedSection(
                 page_line=self.section_start_line,
-                lines=self.current_section,
+                # the lines of a section are consecutive
+                lines=dict(enumerate(parsed_lines)),
                 page=self.current_page,
             )
             # reset section info
-            self.current_section = {}
+            self.current_section = []
             self.section_start_line = None
             return section
 
@@ -1,37 +1,115 @@
-from collections import defaultdict
+from array import array
+from dataclasses import dataclass, field
+from itertools import compress, groupby
+from operator import itemgetter
 
-from bober.src.parsing.line_parser import get_words_for_line
+from bober.src.parsing.tokenizer import DEFAULT_TOKENIZER, Tokenizer
 
+# the counts of LineCounts, which the ingest stores per line
+LINE_COUNT_NAMES = ("words", "word_chars", "non_white_chars", "all_chars")
+
+
+class LineCounts:
+    """
+    Words, word characters, non white characters and all characters of every
+    line of a text, with the line's page.
+
+    The text is split and tokenized once, and every count is a column built
+    by one C-level pass over the lines.
+    """
 
-class StringStatistics:
     def __init__(
         self,
         input_string,
         line_to_page_mapping,
-        split_function,
-        split_description,
+        first_line: int = 1,
+        tokenizer: Tokenizer = DEFAULT_TOKENIZER,
     ):
-        self.split_description = split_description
-        self.total_items = 0
-        self.max_items_line = 0
-        self.min_items_line = float('inf')
-        items_per_page = defaultdict(int)
-        line_count = 0
-
         lines = input_string.split('\n')
-        starting_line = min(line_to_page_mapping.keys())
-        for i, line in enumerate(lines, start=starting_line):
-            items = split_function(line)
-            item_count = len(items)
-            if not item_count:
-                continue
-
-            self.total_items += item_count
-            self.max_items_line = max(self.max_items_line, item_count)
-            self.min_items_line = min(self.min_items_line, item_count)
-            page_number = line_to_page_mapping[i]
-            items_per_page[page_number] += item_count
-            line_count += 1
+        line_words = list(map(tokenizer.words, lines))
+
+        self.words = array('I', map(len, line_words))
+        self.word_chars = array('I', map(len, map(''.join, line_words)))
+        # split() drops exactly the characters isspace() is true for
+        self.non_white_chars = array(
+            'I', map(len, map(''.join, map(str.split, lines)))
+        )
+        self.all_chars = array('I', map(len, lines))
+        # without a mapping, only the counts are wanted
+        self.pages = array(
+            'H',
+            (
+                map(
+                    line_to_page_mapping.__getitem__,
+                    range(first_line, first_line + len(lines)),
+                )
+                if line_to_page_mapping is not None
+                else ()
+            ),
+        )
+
+
+@dataclass
+class ItemCounts:
+    """
+    One count aggregated over lines, skipping the lines without items, with
+    the total of every page that has items.
+    """
+
+    total_items: int = 0
+    line_count: int = 0
+    max_items_line: int = 0
+    min_items_line: int | float = float('inf')
+    items_per_page: dict[int, int] = field(default_factory=dict)
+
+    @classmethod
+    def of_lines(cls, item_counts, pages) -> 'ItemCounts':
+        # C-level passes over the lines, Python only steps through the runs
+        # of lines on a page. Lines without a page aren't counted.
+        item_counts = item_counts[: len(pages)]
+        present = list(compress(item_counts, item_counts))
+        if not present:
+            return cls()
+
+        items_per_page = {}
+        lines = zip(compress(pages, item_counts), present)
+        for page_number, run in groupby(lines, key=itemgetter(0)):
+            items_per_page[page_number] = items_per_page.get(
+                page_number, 0
+            ) + sum(map(itemgetter(1), run))
+        return cls(
+            total_items=sum(present),
+            line_count=len(present),
+            max_items_line=max(present),
+            min_items_line=min(present),
+            items_per_page=items_per_page,
+        )
+
+    def merge(self, other: 'ItemCounts') -> 'ItemCounts':
+        """The counts of the lines of both, which must not overlap."""
+        items_per_page = dict(self.items_per_page)
+        for page_number, items in other.items_per_page.items():
+            items_per_page[page_number] = (
+                items_per_page.get(page_number, 0) + items
+            )
+        return ItemCounts(
+            total_items=self.total_items + other.total_items,
+            line_count=self.line_count + other.line_count,
+            max_items_line=max(self.max_items_line, other.max_items_line),
+            min_items_line=min(self.min_items_line, other.min_items_line),
+            items_per_page=items_per_page,
+        )
+
+
+class StringStatistics:
+    def __init__(self, counts: ItemCounts, split_description):
+        """Statistics of one count per line, over the non-empty lines."""
+        self.split_description = split_description
+        self.total_items = counts.total_items
+        self.max_items_line = counts.max_items_line
+        self.min_items_line = counts.min_items_line
+        items_per_page = counts.items_per_page
+        line_count = counts.line_count
 
         self.avg_items_per_line = (
             self.total_items / line_count if line_count > 0 else 0
@@ -61,54 +139,98 @@ class StringStatistics:
 
 
 class StringStatisticsManager:
-    def __init__(self, input_string, line_to_page_mapping):
+    def __init__(
+        self,
+        input_string,
+        line_to_page_mapping,
+        first_line: int = 1,
+        tokenizer: Tokenizer = DEFAULT_TOKENIZER,
+    ):
         self.input_string = input_string
+        # page of an absolute line number, e.g. a LinePageMap
         self.line_to_page_mapping = line_to_page_mapping
-        self.word_stats = None
-        self.word_char_stats = None
-        self.non_white_char_stats = None
-        self.all_char_stats = None
+        # absolute line number of the first line of `input_string`
+        self.first_line = first_line
+        # the same words the ingest indexes
+        self.tokenizer = tokenizer
+        self.line_counts = None
+        self.statistics: dict[str, StringStatistics] = {}
 
-    def get_word_stats(self):
-        if not self.word_stats:
-            self.word_stats = StringStatistics(
-                input_string=self.input_string,
-                line_to_page_mapping=self.line_to_page_mapping,
-                split_function=get_words_for_line,
-                split_description="Words",
+    def _counts(self) -> LineCounts:
+        # every statistic is served from the one pass over the text
+        if self.line_counts is None:
+            self.line_counts = LineCounts(
+                self.input_string,
+                self.line_to_page_mapping,
+                self.first_line,
+                self.tokenizer,
             )
-        return str(self.word_stats)
+        return self.line_counts
 
-    def get_word_char_stats(self):
-        if not self.word_char_stats:
-            self.word_char_stats = StringStatistics(
-                input_string=self.input_string,
-                line_to_page_mapping=self.line_to_page_mapping,
-                split_function=lambda line: [
-                    char for word in get_words_for_line(line) for char in word
-                ],
-                split_description="Word characters",
+    def _item_counts(self, count_name: str) -> ItemCounts:
+        counts = self._counts()
+        return ItemCounts.of_lines(getattr(counts, count_name), counts.pages)
+
+    def _statistics(self, count_name: str, split_description: str) -> str:
+        if count_name not in self.statistics:
+            self.statistics[count_name] = StringStatistics(
+                self._item_counts(count_name), split_description
             )
-        return str(self.word_char_stats)
+        return str(self.statistics[count_name])
+
+    def get_word_stats(self):
+        return self._statistics("words", "Words")
+
+    def get_word_char_stats(self):
+        return self._statistics("word_chars", "Word characters")
 
     def get_non_white_char_stats(self):
-        if not self.non_white_char_stats:
-            self.non_white_char_stats = StringStatistics(
-                input_string=self.input_string,
-                line_to_page_mapping=self.line_to_page_mapping,
-                split_function=lambda line: [
-                    char for char in line if not char.isspace()
-                ],
-                split_description="Non white characters",
-            )
-        return str(self.non_white_char_stats)
+        return self._statistics("non_white_chars", "Non white characters")
 
     def get_all_char_stats(self):
-        if not self.all_char_stats:
-            self.all_char_stats = StringStatistics(
-                input_string=self.input_string,
-                line_to_page_mapping=self.line_to_page_mapping,
-                split_function=lambda line: list(line),
-                split_description="All characters",
+        return self._statistics("all_chars", "All characters")
+
+
+class StoredStatisticsManager(StringStatisticsManager):
+    """
+    Statistics of lines `first_line` to `last_line` of a stored document.
+
+    Whole lines are answered by the document's stored line statistics, an
+    object whose `range_counts(count_name, start, end)` returns the
+    `ItemCounts` of a line range, e.g. a LineStatisticsIndex. Only the
+    lines in `partial_lines`, like the ends of a selection that start or
+    stop mid-line, are counted from their text.
+    """
+
+    def __init__(
+        self,
+        line_statistics,
+        line_to_page_mapping,
+        first_line: int,
+        last_line: int,
+        partial_lines: dict[int, str] | None = None,
+        tokenizer: Tokenizer = DEFAULT_TOKENIZER,
+    ):
+        super().__init__("", line_to_page_mapping, first_line, tokenizer)
+        self.line_statistics = line_statistics
+        self.last_line = last_line
+        self.partial_lines = partial_lines or {}
+        self.partial_line_counts = {
+            line: LineCounts(text, line_to_page_mapping, line, tokenizer)
+            for line, text in self.partial_lines.items()
+        }
+
+    def _item_counts(self, count_name: str) -> ItemCounts:
+        counts = ItemCounts()
+        start = self.first_line
+        for line in sorted(self.partial_line_counts):
+            partial = self.partial_line_counts[line]
+            counts = counts.merge(
+                self.line_statistics.range_counts(count_name, start, line - 1)
+            ).merge(
+                ItemCounts.of_lines(getattr(partial, count_name), partial.pages)
             )
-        return str(self.all_char_stats)
+            start = line + 1
+        return counts.merge(
+            self.line_statistics.range_counts(count_name, start, self.last_line)
+        )
@@ -0,0 +1,40 @@
+from functools import lru_cache
+from typing import Iterable
+
+from nltk import PorterStemmer
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from bober.src.db_models import Token
+
+
+class CachedStemmer:
+    """
+    Porter stemmer shared by every code path that stems words.
+
+    Lookups go to a word -> stem dictionary first, which is warm-loaded from
+    the `token` table (the persisted dictionary of every stemmed word), and
+    fall back to the NLTK stemmer behind a bounded LRU cache.
+    """
+
+    def __init__(self, maxsize: int = 2**16):
+        self._dictionary: dict[str, str] = {}
+        self._cached_stem = lru_cache(maxsize=maxsize)(PorterStemmer().stem)
+
+    def stem(self, word: str) -> str:
+        try:
+            return self._dictionary[word]
+        except KeyError:
+            return self._cached_stem(word)
+
+    def warm(self, stems: Iterable[tuple[str, str]]) -> None:
+        self._dictionary.update(stems)
+
+    def warm_from_db(self, session: Session) -> None:
+        self.warm(session.execute(select(Token.token, Token.stem)).all())
+
+    def cache_info(self):
+        return self._cached_stem.cache_info()
+
+
+STEMMER = CachedStemmer()
@@ -0,0 +1,78 @@
+import re
+from typing import Protocol, Sequence
+
+# a run of word characters with at least one letter or digit, so runs of
+# underscores alone are not words
+WORD_PATTERN = re.compile(r'\w*[^\W_]\w*')
+
+# lowercased word, start and end offsets in the tokenized text
+Token = tuple[str, int, int]
+
+
+class Tokenizer(Protocol):
+    def tokenize(self, text: str) -> list[Token]: ...
+
+    def tokenize_lines(self, lines: Sequence[str]) -> list[list[Token]]: ...
+
+    def words(self, text: str) -> list[str]: ...
+
+
+class RegexTokenizer:
+    """
+    Splits text into words with a single `finditer` pass per call.
+
+    Words are lowercased, and offsets index the text as given. `tokenize_lines`
+    tokenizes a whole section or document in one pass, with offsets relative
+    to each line.
+    """
+
+    def __init__(self, pattern: str | re.Pattern = WORD_PATTERN):
+        self.pattern = re.compile(pattern)
+
+    def tokenize(self, text: str) -> list[Token]:
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            return [
+                (match.group().lower(), match.start(), match.end())
+                for match in self.pattern.finditer(text)
+            ]
+        return [
+            (match.group(), match.start(), match.end())
+            for match in self.pattern.finditer(lowered)
+        ]
+
+    def tokenize_lines(self, lines: Sequence[str]) -> list[list[Token]]:
+        if not lines:
+            return []
+
+        # a newline is not a word character, so no word spans two lines
+        text = "\n".join(lines)
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # some characters lowercase to several, so offsets would shift
+            return [self.tokenize(line) for line in lines]
+
+        tokens: list[list[Token]] = [[] for _ in lines]
+        line_index = 0
+        line_start = 0
+        next_line_start = len(lines[0]) + 1
+        line_tokens = tokens[0]
+        for match in self.pattern.finditer(lowered):
+            start, end = match.span()
+            if start >= next_line_start:
+                while start >= next_line_start:
+                    line_index += 1
+                    line_start = next_line_start
+                    next_line_start += len(lines[line_index]) + 1
+                line_tokens = tokens[line_index]
+            line_tokens.append(
+                (match.group(), start - line_start, end - line_start)
+            )
+        return tokens
+
+    def words(self, text: str) -> list[str]:
+        """The words of `text` as written, without lowercasing or offsets."""
+        return self.pattern.findall(text)
+
+
+DEFAULT_TOKENIZER = RegexTokenizer()
@@ -0,0 +1,106 @@
+import csv
+import json
+from pathlib import Path
+from typing import Mapping
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from bober.src.db import commit
+from bober.src.db_models import Phrase, PhraseToken
+from bober.src.rfc_ingest.corpus_version import CORPUS_VERSION
+from bober.src.rfc_ingest.token_ids import TOKEN_IDS
+
+CSV_HEADER = ["phrase_name", "phrase"]
+
+
+@commit
+def import_phrases(session: Session, phrases: Mapping[str, str]) -> int:
+    """
+    Save phrases by name in a few statements whatever their number. A
+    phrase that already exists gets the imported content. Returns the
+    number of phrases saved. Names and phrases are lowercased, as the GUI
+    saves and looks them up.
+    """
+    phrases = {
+        phrase_name.lower(): phrase.lower()
+        for phrase_name, phrase in phrases.items()
+    }
+    if not phrases:
+        return 0
+
+    upsert = insert(Phrase)
+    phrase_ids = dict(
+        session.execute(
+            upsert.on_conflict_do_update(
+                index_elements=[Phrase.phrase_name],
+                set_={"content": upsert.excluded.content},
+            ).returning(Phrase.phrase_name, Phrase.id),
+            [
+                {"phrase_name": phrase_name, "content": phrase}
+                for phrase_name, phrase in sorted(phrases.items())
+            ],
+        ).all()
+    )
+    words = {
+        phrase_name: phrase.split() for phrase_name, phrase in phrases.items()
+    }
+    token_ids = TOKEN_IDS.resolve(
+        session, {word for phrase in words.values() for word in phrase}
+    )
+
+    # the tokens of phrases that existed are replaced
+    session.execute(
+        delete(PhraseToken).where(
+            PhraseToken.phrase_id.in_(list(phrase_ids.values()))
+        )
+    )
+    rows = [
+        {
+            "phrase_id": phrase_ids[phrase_name],
+            "token_id": token_ids[word],
+            "index": index,
+        }
+        for phrase_name, phrase in words.items()
+        for index, word in enumerate(phrase)
+    ]
+    if rows:
+        session.execute(insert(PhraseToken), rows)
+    CORPUS_VERSION.mark_changed(session)
+    return len(phrase_ids)
+
+
+def export_phrases(session: Session) -> dict[str, str]:
+    return dict(
+        session.execute(
+            select(Phrase.phrase_name, Phrase.content).order_by(
+                Phrase.phrase_name
+            )
+        ).all()
+    )
+
+
+def read_phrases(path: Path) -> dict[str, str]:
+    """
+    Phrases from a JSON object of phrase names to phrases, or a CSV file of
+    `phrase_name,phrase` rows.
+    """
+    path = Path(path)
+    with open(path, newline="") as f:
+        if path.suffix.lower() != ".csv":
+            return json.load(f)
+        return {row["phrase_name"]: row["phrase"] for row in csv.DictReader(f)}
+
+
+def write_phrases(path: Path, phrases: Mapping[str, str]) -> None:
+    """Write phrases in the format `read_phrases` reads for the suffix."""
+    path = Path(path)
+    with open(path, "w", newline="") as f:
+        if path.suffix.lower() != ".csv":
+            json.dump(phrases, f, indent=2)
+            return
+
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        writer.writerows(phrases.items())
@@ -0,0 +1,213 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Iterable
+
+from sqlalchemy import Integer, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from bober.src.db_models import Rfc, Token, TokenPosition
+from bober.src.rfc_ingest.corpus_version import CORPUS_VERSION
+
+# rfc_num -> abs_index -> token_position id
+Postings = dict[int, dict[int, int]]
+
+
+@dataclass
+class PhraseOccurrence:
+    rfc_num: int
+    rfc_title: str
+    section_index: int
+    phrase: str
+    # line and indentation of the first word
+    abs_line_number: int
+    indentation: int
+    # start of the first word and end of the last word within their lines
+    start_pos: int
+    end_pos: int
+
+
+class PhraseIndex:
+    """
+    Positional inverted index over token_position for phrase search.
+
+    The postings of a token map each RFC to the `abs_index` of every
+    occurrence. They are loaded from the DB the first time a phrase uses the
+    token, and the least recently used tokens are dropped once more than
+    `max_postings` positions are held. All are dropped when an ingest of any
+    process moves the stored documents version. A phrase matches where
+    every word's postings hold the start offset plus the word's index in the
+    phrase, inside a single section.
+    """
+
+    def __init__(self, max_postings: int = 2**21):
+        self.max_postings = max_postings
+        self._postings: OrderedDict[int, Postings] = OrderedDict()
+        self._sizes: dict[int, int] = {}
+        self._total_size = 0
+        self._version: int | None = None
+        self._lock = Lock()
+
+    def search(self, session: Session, phrase: str) -> list[PhraseOccurrence]:
+        words = phrase.lower().split()
+        if not words:
+            return []
+
+        token_ids = dict(
+            session.execute(
+                select(Token.token, Token.id).where(Token.token.in_(words))
+            ).all()
+        )
+        if len(token_ids) < len(set(words)):
+            return []  # a word that never occurs
+
+        postings = self._load(session, {token_ids[word] for word in words})
+        matches = _intersect([postings[token_ids[word]] for word in words])
+        return _occurrences(session, " ".join(words), matches)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._sizes.clear()
+            self._total_size = 0
+            self._version = None
+
+    def _load(
+        self, session: Session, token_ids: set[int]
+    ) -> dict[int, Postings]:
+        version = CORPUS_VERSION.current(session, documents=True)
+        with self._lock:
+            if self._version != version:
+                self._postings.clear()
+                self._sizes.clear()
+                self._total_size = 0
+                self._version = version
+
+            if missing := token_ids - self._postings.keys():
+                loaded: dict[int, Postings] = {
+                    token_id: {} for token_id in missing
+                }
+                rows = session.execute(
+                    select(
+                        TokenPosition.token_id,
+                        TokenPosition.rfc_num,
+                        TokenPosition.abs_index,
+                        TokenPosition.id,
+                    ).where(TokenPosition.token_id.in_(missing))
+                )
+                for token_id, rfc_num, abs_index, position_id in rows:
+                    loaded[token_id].setdefault(rfc_num, {})[
+                        abs_index
+                    ] = position_id
+                for token_id, token_postings in loaded.items():
+                    self._postings[token_id] = token_postings
+                    self._sizes[token_id] = _size(token_postings)
+                    self._total_size += self._sizes[token_id]
+
+            found = {}
+            for token_id in token_ids:
+                found[token_id] = self._postings[token_id]
+                self._postings.move_to_end(token_id)
+            # the tokens of this phrase go last, a token over the bound alone
+            # isn't kept
+            while self._total_size > self.max_postings:
+                token_id, _ = self._postings.popitem(last=False)
+                self._total_size -= self._sizes.pop(token_id)
+            return found
+
+
+def _intersect(postings: list[Postings]) -> list[tuple[int, int, int, int]]:
+    """
+    (rfc_num, abs_index, first position id, last position id) of every
+    offset where the words of the phrase follow each other.
+    """
+    # the rarest word bounds the candidates
+    rarest = min(range(len(postings)), key=lambda i: _size(postings[i]))
+    matches = []
+    for rfc_num, rarest_offsets in postings[rarest].items():
+        rfc_postings = [
+            word_postings.get(rfc_num) for word_postings in postings
+        ]
+        if not all(rfc_postings):
+            continue
+
+        for offset in rarest_offsets:
+            start = offset - rarest
+            if all(
+                start + index in word_offsets
+                for index, word_offsets in enumerate(rfc_postings)
+            ):
+                matches.append(
+                    (
+                        rfc_num,
+                        start,
+                        rfc_postings[0][start],
+                        rfc_postings[-1][start + len(postings) - 1],
+                    )
+                )
+    matches.sort()
+    return matches
+
+
+def _size(postings: Postings) -> int:
+    return sum(map(len, postings.values()))
+
+
+def _occurrences(
+    session: Session,
+    phrase: str,
+    matches: Iterable[tuple[int, int, int, int]],
+) -> list[PhraseOccurrence]:
+    matches = list(matches)
+    position_ids = {first for *_, first, _ in matches}
+    position_ids.update(last for *_, last in matches)
+    if not position_ids:
+        return []
+
+    # one array parameter instead of a bind parameter per position
+    rows = session.execute(
+        select(
+            TokenPosition.id,
+            TokenPosition.start_position,
+            TokenPosition.end_position,
+            TokenPosition.abs_line,
+            TokenPosition.abs_column - TokenPosition.start_position,
+            TokenPosition.section_index,
+            Rfc.title,
+        )
+        .join(Rfc, Rfc.num == TokenPosition.rfc_num)
+        .where(
+            TokenPosition.id
+            == any_(
+                bindparam(
+                    "position_ids", list(position_ids), type_=ARRAY(Integer)
+                )
+            )
+        )
+    )
+    positions = {row[0]: row[1:] for row in rows.tuples()}
+
+    occurrences = []
+    for rfc_num, _, first_id, last_id in matches:
+        start, _, line, indentation, section_index, title = positions[first_id]
+        end, last_section_index = positions[last_id][1], positions[last_id][4]
+        if section_index != last_section_index:
+            continue  # phrases don't span sections
+
+        occurrences.append(
+            PhraseOccurrence(
+                rfc_num,
+                title,
+                section_index,
+                phrase,
+                line,
+                indentation,
+                start,
+                end,
+            )
+        )
+    return occurrences
+
+
+PHRASE_INDEX = PhraseIndex()
@@ -0,0 +1,171 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, Sequence
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from bober.src.parsing.parse_rfc import parse_rfc
+from bober.src.parsing.stemmer import STEMMER
+from bober.src.rfc_ingest.ingest_rfc import (
+    StagedSections,
+    stage_rfc,
+    stored_content_hashes,
+    stored_rfc_sections,
+)
+from bober.src.rfc_ingest.load_from_file import (
+    RFCMetadata,
+    content_hash,
+    load_staged_document,
+)
+
+_DONE = None
+
+
+async def ingest_files_async(
+    database_url: str,
+    files: Sequence[tuple[str | Path, RFCMetadata]],
+    parse_workers: int | None = None,
+    writers: int = 4,
+    queue_size: int = 8,
+) -> int:
+    """
+    Ingest files with reading, parsing and writing overlapping.
+
+    `parse_workers` readers read files in threads, then parse and stage them
+    in a process pool against the stored sections of their RFC, so hashing,
+    row building, stemming and compression happen there. `writers` tasks
+    write the staged documents concurrently, each on its own pooled asyncpg
+    connection, leaving the event loop to resolve ids and COPY. Readers
+    block on a queue of `queue_size` documents when the writers fall behind,
+    so at most `queue_size + parse_workers` documents are held in memory.
+
+    Files whose content is already stored are skipped before being parsed.
+
+    :param database_url: SQLAlchemy URL with an async driver, e.g.
+        `postgresql+asyncpg://...`
+    :param files: Files to ingest with the metadata of their RFC
+    :param parse_workers: Number of parsing processes, defaults to the CPU
+        count
+    :param writers: Number of concurrent DB writers
+    :param queue_size: Maximum number of parsed documents waiting for a writer
+    :return: Number of ingested files
+    """
+    engine = create_async_engine(
+        database_url, pool_size=writers, max_overflow=0
+    )
+    make_session = async_sessionmaker(engine)
+    try:
+        async with make_session() as session:
+            await session.run_sync(STEMMER.warm_from_db)
+            stored_hashes = await session.run_sync(
+                stored_content_hashes,
+                [metadata["num"] for _, metadata in files],
+            )
+
+        # workers start lazily, after the event loop's threads exist, and
+        # forking a multi-threaded process can deadlock the child
+        with ProcessPoolExecutor(
+            max_workers=parse_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            pipeline = _Pipeline(
+                make_session, pool, stored_hashes, len(files), queue_size
+            )
+            return await pipeline.run(
+                files, parse_workers or os.cpu_count() or 1, writers
+            )
+    finally:
+        await engine.dispose()
+
+
+class _Pipeline:
+    def __init__(
+        self,
+        make_session: async_sessionmaker,
+        pool: ProcessPoolExecutor,
+        stored_hashes: dict[int, str | None],
+        total: int,
+        queue_size: int,
+    ):
+        self.make_session = make_session
+        self.pool = pool
+        self.stored_hashes = stored_hashes
+        self.total = total
+        self.parsed: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.ingested = 0
+
+    async def run(
+        self,
+        files: Sequence[tuple[str | Path, RFCMetadata]],
+        readers: int,
+        writers: int,
+    ) -> int:
+        # readers share one iterator, so every file is taken exactly once
+        to_read = iter(files)
+        async with asyncio.TaskGroup() as writers_group:
+            for _ in range(writers):
+                writers_group.create_task(self.write())
+
+            async with asyncio.TaskGroup() as readers_group:
+                for _ in range(readers):
+                    readers_group.create_task(self.read(to_read))
+
+            for _ in range(writers):
+                await self.parsed.put(_DONE)
+        return self.ingested
+
+    async def read(
+        self, to_read: Iterator[tuple[str | Path, RFCMetadata]]
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        for file_path, rfc_metadata in to_read:
+            content = await asyncio.to_thread(Path(file_path).read_bytes)
+            file_hash = content_hash(content)
+            if self.stored_hashes.get(rfc_metadata["num"]) == file_hash:
+                logger.info(f"Skipping unchanged rfc {rfc_metadata['num']}")
+                continue
+
+            stored_sections = {}
+            # new rfcs have no sections to keep, and don't wait on the writers
+            # for a connection
+            if rfc_metadata["num"] in self.stored_hashes:
+                async with self.make_session() as session:
+                    stored_sections = await session.run_sync(
+                        stored_rfc_sections, rfc_metadata["num"]
+                    )
+            staged = await loop.run_in_executor(
+                self.pool,
+                _stage_content,
+                content,
+                rfc_metadata["num"],
+                stored_sections,
+            )
+            # for the tokens the written words add
+            STEMMER.warm(staged.stems.items())
+            await self.parsed.put((staged, rfc_metadata, file_hash))
+
+    async def write(self) -> None:
+        while (item := await self.parsed.get()) is not _DONE:
+            staged, rfc_metadata, file_hash = item
+            async with self.make_session() as session:
+                # the sync writes run as is, with asyncpg under them
+                await session.run_sync(
+                    load_staged_document, staged, rfc_metadata, file_hash
+                )
+            self.ingested += 1
+            logger.info(
+                f"Finish loading rfc {rfc_metadata['num']}"
+                f" - {self.ingested}/{self.total}"
+            )
+
+
+def _stage_content(
+    content: bytes,
+    rfc_num: int,
+    stored_sections: dict[int, tuple[int, str, int | None]],
+) -> StagedSections:
+    return stage_rfc(rfc_num, parse_rfc(content.decode()), stored_sections)
@@ -0,0 +1,145 @@
+import io
+from typing import Any, Iterator
+
+from sqlalchemy import Table, bindparam, func, insert, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+
+from bober.src.db_models import Base
+
+# COPY text format: backslash, tab, newline and carriage return must be escaped
+COPY_ESCAPES = str.maketrans(
+    {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"}
+)
+
+
+class ColumnBuffer:
+    """
+    Columnar staging buffer for a single table.
+
+    Values are appended row by row but kept as one list per column, so staging
+    a document never allocates an ORM object per row.
+    """
+
+    def __init__(self, table: Table, *columns: str):
+        self.table = table
+        self.columns = columns
+        self.data: dict[str, list[Any]] = {column: [] for column in columns}
+
+    def append(self, *values: Any) -> None:
+        for column, value in zip(self.columns, values, strict=True):
+            self.data[column].append(value)
+
+    def __len__(self) -> int:
+        return len(self.data[self.columns[0]])
+
+    def rows(self) -> Iterator[tuple]:
+        return zip(*self.data.values())
+
+    def __reduce__(self):
+        # by table name, so a buffer staged in another process refers to
+        # this process's table instead of a pickled copy of the schema
+        return _unpickle_buffer, (self.table.name, self.columns, self.data)
+
+
+def _unpickle_buffer(
+    table_name: str, columns: tuple[str, ...], data: dict[str, list[Any]]
+) -> ColumnBuffer:
+    buffer = ColumnBuffer(Base.metadata.tables[table_name], *columns)
+    buffer.data = data
+    return buffer
+
+
+def unnest_rows(name: str, **columns: tuple[Any, list[Any]]):
+    """
+    A table named `name` of rows given as one list per column, each passed
+    as `column=(type, values)`. Every column is bound as a single array, so
+    a statement over thousands of rows compiles and binds a few parameters
+    instead of one per value.
+    """
+    return (
+        func.unnest(
+            *(
+                bindparam(f"{name}_{key}", values, type_=ARRAY(type_))
+                for key, (type_, values) in columns.items()
+            )
+        )
+        .table_valued(*columns, name=name)
+        .render_derived()
+    )
+
+
+def reserve_ids(session: Session, table: Table, count: int) -> list[int]:
+    """
+    Allocate `count` ids from the serial sequence of `table`, so rows that
+    are referenced by other staged rows can be written with explicit ids.
+    """
+    if not count:
+        return []
+
+    return list(
+        session.execute(
+            text(
+                "SELECT nextval(pg_get_serial_sequence(:table, 'id')) "
+                "FROM generate_series(1, :count)"
+            ),
+            {"table": table.name, "count": count},
+        ).scalars()
+    )
+
+
+def write_buffer(session: Session, buffer: ColumnBuffer) -> None:
+    """
+    Write a staged buffer in the session's transaction, with PostgreSQL COPY
+    when the driver supports it and a multi-row executemany otherwise.
+    """
+    if not len(buffer):
+        return
+
+    connection = session.connection().connection
+    if hasattr(connection.driver_connection, "copy_records_to_table"):
+        # asyncpg, reached through AsyncSession.run_sync
+        await_only(
+            connection.driver_connection.copy_records_to_table(
+                buffer.table.name,
+                records=list(buffer.rows()),
+                columns=list(buffer.columns),
+            )
+        )
+        return
+
+    cursor = connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):
+            _copy(cursor, buffer)
+            return
+    finally:
+        cursor.close()
+
+    columns = buffer.columns
+    session.execute(
+        insert(buffer.table),
+        [dict(zip(columns, row)) for row in buffer.rows()],
+    )
+
+
+def _copy(cursor, buffer: ColumnBuffer) -> None:
+    stream = io.StringIO()
+    for row in buffer.rows():
+        stream.write("\t".join(map(_copy_value, row)))
+        stream.write("\n")
+    stream.seek(0)
+
+    columns = ", ".join(f'"{column}"' for column in buffer.columns)
+    cursor.copy_expert(
+        f"COPY {buffer.table.name} ({columns}) FROM STDIN", stream
+    )
+
+
+def _copy_value(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, str):
+        return value.translate(COPY_ESCAPES)
+    return str(value)
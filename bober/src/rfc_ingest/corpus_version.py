@@ -0,0 +1,122 @@
+import time
+from typing import Callable
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from bober.src.db_models import CORPUS_STATISTICS_ID, CorpusStatistics
+
+_CHANGED = "corpus_changed"
+_DOCUMENTS_CHANGED = "documents_changed"
+
+# seconds a version read from the DB is trusted before it's read again
+STORED_CHECK_INTERVAL = 1.0
+
+
+class CorpusVersion:
+    """
+    Counts committed changes to the ingested corpus and the groups and
+    phrases saved over it.
+
+    In-memory indexes and cached query results remember the version they
+    were built at and rebuild when it moved. Writers mark their session
+    with `mark_changed`, and the version only moves when that session
+    commits. The count is per process, commits of other processes don't
+    move it. Indexes that must follow them use `stored`, the count of
+    changes committed by any process, kept in corpus_statistics, or
+    `current` on hot paths, which reads it at most once per
+    `check_interval` seconds unless this process committed a change since.
+    Both also count the changes to ingested documents alone, for indexes of
+    token positions that groups and phrases don't change.
+    """
+
+    def __init__(
+        self,
+        check_interval: float = STORED_CHECK_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.value = 0
+        self.check_interval = check_interval
+        self._clock = clock
+        # documents -> (value, read at, stored version) of the last read
+        self._checked: dict[bool, tuple[int, float, int]] = {}
+
+    def mark_changed(self, session: Session, documents: bool = False) -> None:
+        """
+        :param documents: Whether ingested documents changed, not only the
+            groups and phrases over them
+        """
+        session.info[_CHANGED] = True
+        if documents:
+            session.info[_DOCUMENTS_CHANGED] = True
+
+    def bump(self) -> None:
+        self.value += 1
+
+    def stored(self, session: Session, documents: bool = False) -> int:
+        column = (
+            CorpusStatistics.documents_version
+            if documents
+            else CorpusStatistics.version
+        )
+        return (
+            session.scalar(
+                select(column).where(
+                    CorpusStatistics.id == CORPUS_STATISTICS_ID
+                )
+            )
+            or 0
+        )
+
+    def current(self, session: Session, documents: bool = False) -> int:
+        value, now = self.value, self._clock()
+        if checked := self._checked.get(documents):
+            checked_value, checked_at, stored = checked
+            if (
+                checked_value == value
+                and now - checked_at < self.check_interval
+            ):
+                return stored
+        stored = self.stored(session, documents)
+        self._checked[documents] = (value, now, stored)
+        return stored
+
+    def clear(self) -> None:
+        self._checked.clear()
+
+
+CORPUS_VERSION = CorpusVersion()
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_stored_version(session: Session) -> None:
+    if session.info.get(_CHANGED):
+        documents = int(session.info.get(_DOCUMENTS_CHANGED, False))
+        upsert = insert(CorpusStatistics).values(
+            id=CORPUS_STATISTICS_ID, version=1, documents_version=documents
+        )
+        session.execute(
+            upsert.on_conflict_do_update(
+                index_elements=[CorpusStatistics.id],
+                set_={
+                    "version": CorpusStatistics.version + 1,
+                    "documents_version": (
+                        CorpusStatistics.documents_version + documents
+                    ),
+                },
+            )
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_corpus_version(session: Session) -> None:
+    session.info.pop(_DOCUMENTS_CHANGED, None)
+    if session.info.pop(_CHANGED, False):
+        CORPUS_VERSION.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_corpus_change(session: Session) -> None:
+    session.info.pop(_CHANGED, None)
+    session.info.pop(_DOCUMENTS_CHANGED, None)
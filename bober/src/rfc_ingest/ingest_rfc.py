@@ -1,7 +1,19 @@
 import datetime
-from collections import defaultdict
+import hashlib
+from collections import Counter
+from typing import Iterable
 
-from sqlalchemy import exists, select
+from sqlalchemy import (
+    Integer,
+    column,
+    delete,
+    exists,
+    func,
+    insert,
+    select,
+    update,
+    values,
+)
 from sqlalchemy.orm import Session
 
 from bober.src.db_models import (
@@ -10,10 +22,34 @@ from bober.src.db_models import (
     RfcLine,
     RfcSection,
     RfcTokenCount,
-    Token,
     TokenPosition,
 )
-from bober.src.parsing.parsed_types import ParsedDocument, ParsedToken
+from bober.src.parsing.parsed_types import ParsedDocument, ParsedSection
+from bober.src.parsing.stemmer import STEMMER
+from bober.src.rfc_ingest.bulk_write import (
+    ColumnBuffer,
+    reserve_ids,
+    write_buffer,
+)
+from bober.src.rfc_ingest.corpus_version import CORPUS_VERSION
+from bober.src.rfc_ingest.page_text import (
+    PagedText,
+    line_statistics_row,
+    rfc_page_rows,
+    write_line_statistics,
+    write_rfc_pages,
+)
+from bober.src.rfc_ingest.statistics import (
+    record_changed_document,
+    record_new_document,
+    record_token_counts,
+    rfc_stems,
+    rfc_token_counts,
+    rfc_total_tokens,
+)
+from bober.src.rfc_ingest.token_ids import TOKEN_IDS
+from bober.src.timing import STAGE_TIMER
+from bober.src.word_groups.word_groups import refresh_rfc_group_counts
 
 
 def ingest_rfc(
@@ -22,89 +58,468 @@ def ingest_rfc(
     rfc_title: str,
     rfc_published_at: datetime.date,
     rfc_authors: list[str],
-    parsed_doc: ParsedDocument,
+    parsed_doc: ParsedDocument | Iterable[ParsedSection],
+    content_hash: str | None = None,
 ) -> Rfc:
+    """
+    Ingest a parsed RFC, creating the rfc row if it does not exist yet.
+
+    Re-ingesting an RFC with an unchanged `content_hash` returns before the
+    sections are consumed. Otherwise the sections are diffed against the
+    stored ones by hash, and only the sections that changed are replaced.
+    The positions of kept sections are moved by the tokens added or removed
+    before them.
+    """
     # Create or get the Rfc object
     rfc = session.execute(
         select(Rfc).where(Rfc.num == rfc_num)
     ).scalar_one_or_none()
-    if not rfc:
+    if rfc and content_hash is not None and rfc.content_hash == content_hash:
+        return rfc
+
+    stored_sections = stored_rfc_sections(session, rfc_num) if rfc else {}
+    staged = stage_rfc(rfc_num, parsed_doc, stored_sections)
+    return _write_staged(
+        session,
+        rfc,
+        staged,
+        rfc_title,
+        rfc_published_at,
+        rfc_authors,
+        content_hash,
+    )
+
+
+def ingest_staged_rfc(
+    session: Session,
+    staged: "StagedSections",
+    rfc_title: str,
+    rfc_published_at: datetime.date,
+    rfc_authors: list[str],
+    content_hash: str | None = None,
+) -> Rfc:
+    """
+    Ingest an RFC staged by `stage_rfc`, e.g. in a parsing process, against
+    the stored sections of `stored_rfc_sections`. Raises a ValueError if
+    the stored sections changed since.
+    """
+    rfc = session.execute(
+        select(Rfc).where(Rfc.num == staged.rfc_num)
+    ).scalar_one_or_none()
+    stored_ids = (
+        set(
+            session.scalars(
+                select(RfcSection.id).where(
+                    RfcSection.rfc_num == staged.rfc_num
+                )
+            )
+        )
+        if rfc
+        else set()
+    )
+    if stored_ids != {
+        section_id for section_id, *_ in staged.stored_sections.values()
+    }:
+        raise ValueError(
+            f"The sections of rfc {staged.rfc_num} changed since it was staged"
+        )
+    return _write_staged(
+        session,
+        rfc,
+        staged,
+        rfc_title,
+        rfc_published_at,
+        rfc_authors,
+        content_hash,
+    )
+
+
+def stored_rfc_sections(
+    session: Session, rfc_num: int
+) -> dict[int, tuple[int, str, int | None]]:
+    """
+    Index -> id, hash and abs_index of the first token of the stored
+    sections of an RFC.
+    """
+    first_abs_index = (
+        select(
+            TokenPosition.section_index,
+            func.min(TokenPosition.abs_index).label("abs_index"),
+        )
+        .where(TokenPosition.rfc_num == rfc_num)
+        .group_by(TokenPosition.section_index)
+        .subquery()
+    )
+    return {
+        section.index: (section.id, section.content_hash, section.abs_index)
+        for section in session.execute(
+            select(
+                RfcSection.index,
+                RfcSection.id,
+                RfcSection.content_hash,
+                first_abs_index.c.abs_index,
+            )
+            .outerjoin(
+                first_abs_index,
+                first_abs_index.c.section_index == RfcSection.index,
+            )
+            .where(RfcSection.rfc_num == rfc_num)
+        )
+    }
+
+
+def stage_rfc(
+    rfc_num: int,
+    parsed_doc: ParsedDocument | Iterable[ParsedSection],
+    stored_sections: dict[int, tuple[int, str, int | None]],
+) -> "StagedSections":
+    """The rows to write for a parsed RFC, without touching the DB."""
+    if isinstance(parsed_doc, ParsedDocument):
+        parsed_doc = parsed_doc.sections
+
+    staged = StagedSections(rfc_num, stored_sections)
+    with STAGE_TIMER.stage("stage_rows"):
+        for section_index, parsed_section in enumerate(parsed_doc):
+            staged.add(section_index, parsed_section)
+        staged.finish()
+    return staged
+
+
+def _write_staged(
+    session: Session,
+    rfc: Rfc | None,
+    staged: "StagedSections",
+    rfc_title: str,
+    rfc_published_at: datetime.date,
+    rfc_authors: list[str],
+    content_hash: str | None,
+) -> Rfc:
+    rfc_num = staged.rfc_num
+    is_new = rfc is None
+    if is_new:
         rfc = Rfc(num=rfc_num, title=rfc_title, published_at=rfc_published_at)
         rfc.authors = [Author(author_name=name) for name in rfc_authors]
         session.add(rfc)
+    session.flush()  # the rfc row must exist before the bulk writes
+
+    stale_section_ids = staged.stale_section_ids()
+    changed = bool(stale_section_ids or len(staged.sections))
+    old_stems = set()
+    old_token_counts = {}
+    if changed and not is_new:
+        old_stems = rfc_stems(session, rfc_num)
+        old_token_counts = rfc_token_counts(session, rfc_num)
+    if stale_section_ids:
+        with STAGE_TIMER.stage("delete_stale"):
+            _delete_sections(session, stale_section_ids)
+    if staged.shifts:
+        with STAGE_TIMER.stage("row_insert"):
+            _shift_positions(session, rfc_num, staged.shifts)
+
+    token_counts = staged.write(session)
+    with STAGE_TIMER.stage("row_insert"):
+        if staged.stored_sections:
+            if changed:
+                _refresh_token_counts(session, rfc_num)
+        else:
+            write_buffer(session, token_counts)
+        if changed:
+            write_rfc_pages(session, rfc_num, staged.page_rows)
+            write_line_statistics(session, rfc_num, staged.line_statistics)
+            refresh_rfc_group_counts(session, rfc_num)
 
-    # Collect all unique tokens
-    parsed_tokens: dict[str, ParsedToken] = {}
-    token_positions = defaultdict(list)
-
-    abs_index = 0
-    for section_index, parsed_section in enumerate(parsed_doc.sections):
-        section = RfcSection(
-            rfc=rfc,
-            index=section_index,
-            page=parsed_section.page,
-            row_start=parsed_section.page_line,
-            row_end=parsed_section.page_line + len(parsed_section.lines) - 1,
+    # last, as concurrent ingests serialize on the corpus statistics row
+    with STAGE_TIMER.stage("statistics"):
+        year = rfc.published_at.year if rfc.published_at else None
+        if is_new:
+            rfc.total_tokens = staged.word_counts.total()
+            record_token_counts(
+                session,
+                year,
+                {},
+                dict(
+                    zip(
+                        token_counts.data["token_id"],
+                        token_counts.data["total_positions"],
+                    )
+                ),
+            )
+            record_new_document(
+                session, set(staged.stems.values()), rfc.total_tokens
+            )
+        elif changed:
+            record_token_counts(
+                session,
+                year,
+                old_token_counts,
+                rfc_token_counts(session, rfc_num),
+            )
+            old_total_tokens = rfc.total_tokens or 0
+            rfc.total_tokens = rfc_total_tokens(session, rfc_num)
+            record_changed_document(
+                session,
+                old_stems,
+                rfc_stems(session, rfc_num),
+                rfc.total_tokens - old_total_tokens,
+            )
+
+    rfc.content_hash = content_hash
+    CORPUS_VERSION.mark_changed(session, documents=True)
+    # relationships were written behind the ORM's back
+    session.expire(rfc, ["sections", "token_counts"])
+    return rfc
+
+
+class StagedSections:
+    """
+    Columnar rows of the sections that have to be written for one RFC.
+
+    Sections whose hash matches the stored section at the same index are
+    hashed but not staged, only the move of their first token's `abs_index`
+    is. Ids are staged as ordinals within the document until they are
+    reserved, and token ids as words until they are resolved. Everything
+    but `write` is CPU work, and a staging pickles to the process writing
+    it.
+    """
+
+    def __init__(
+        self,
+        rfc_num: int,
+        stored_sections: dict[int, tuple[int, str, int | None]],
+    ):
+        self.rfc_num = rfc_num
+        # index -> id, hash and abs_index of the first token
+        self.stored_sections = stored_sections
+        self.kept_section_ids: set[int] = set()
+        # index of a kept section -> offset of its positions' abs_index
+        self.shifts: dict[int, int] = {}
+        self.word_counts: Counter[str] = Counter()
+        self.abs_index = 0
+        # the text of every section, kept or not
+        self.text = PagedText()
+        # set by finish
+        self.stems: dict[str, str] = {}
+        self.page_rows: list[dict] = []
+        self.line_statistics: dict | None = None
+
+        self.sections = ColumnBuffer(
+            RfcSection.__table__,
+            "id",
+            "rfc_num",
+            "index",
+            "page",
+            "row_start",
+            "row_end",
+            "content_hash",
+        )
+        self.lines = ColumnBuffer(
+            RfcLine.__table__,
+            "id",
+            "section_id",
+            "line_number",
+            "abs_line_number",
+            "line",
+            "indentation",
+        )
+        self.positions = ColumnBuffer(
+            TokenPosition.__table__,
+            "token_id",
+            "line_id",
+            "start_position",
+            "end_position",
+            "index",
+            "abs_index",
+            "rfc_num",
+            "section_index",
+            "line_in_section",
+            "abs_line",
+            "abs_column",
+            "abs_end_column",
+        )
+
+    def add(self, section_index: int, parsed_section: ParsedSection) -> None:
+        self.text.add(
+            parsed_section.page,
+            parsed_section.page_line,
+            [
+                " " * line.indentation + line.text
+                for line in parsed_section.lines.values()
+            ],
+        )
+        section_hash = _section_hash(parsed_section)
+        stored_id, stored_hash, stored_abs_index = self.stored_sections.get(
+            section_index, (None, None, None)
+        )
+        if stored_hash == section_hash:
+            self.kept_section_ids.add(stored_id)
+            # sections without tokens have no positions to move
+            if stored_abs_index not in (None, self.abs_index):
+                self.shifts[section_index] = self.abs_index - stored_abs_index
+            self.abs_index += sum(
+                len(line.tokens) for line in parsed_section.lines.values()
+            )
+            return
+
+        section_ordinal = len(self.sections)
+        self.sections.append(
+            section_ordinal,
+            self.rfc_num,
+            section_index,
+            parsed_section.page,
+            parsed_section.page_line,
+            parsed_section.page_line + len(parsed_section.lines) - 1,
+            section_hash,
         )
-        session.add(section)
 
         for line_num, parsed_line in parsed_section.lines.items():
-            line = RfcLine(
-                section=section,
-                line_number=line_num,
-                abs_line_number=parsed_line.absolute_line,
-                line=parsed_line.text,
-                indentation=parsed_line.indentation,
+            line_ordinal = len(self.lines)
+            self.lines.append(
+                line_ordinal,
+                section_ordinal,
+                line_num,
+                parsed_line.absolute_line,
+                parsed_line.text,
+                parsed_line.indentation,
             )
-            session.add(line)
 
             for token_index, parsed_token in enumerate(parsed_line.tokens):
-                parsed_tokens[parsed_token.word] = parsed_token
-                token_positions[parsed_token.word].append(
-                    TokenPosition(
-                        line=line,
-                        start_position=parsed_token.start,
-                        end_position=parsed_token.end,
-                        index=token_index,
-                        abs_index=abs_index,
-                    )
+                self.positions.append(
+                    parsed_token.word,
+                    line_ordinal,
+                    parsed_token.start,
+                    parsed_token.end,
+                    token_index,
+                    self.abs_index,
+                    self.rfc_num,
+                    section_index,
+                    line_num,
+                    parsed_line.absolute_line,
+                    parsed_line.indentation + parsed_token.start,
+                    parsed_line.indentation + parsed_token.end,
                 )
-                abs_index += 1
+                self.abs_index += 1
 
-    # tokens
-    query_existing_tokens = session.execute(
-        select(Token).where(Token.token.in_(parsed_tokens.keys()))
-    )
-    existing_tokens = {
-        token.token: token for token in query_existing_tokens.scalars()
-    }
+    def finish(self) -> None:
+        """Count, stem and compress what was added, ready to be written."""
+        self.word_counts = Counter(self.positions.data["token_id"])
+        self.stems = {word: STEMMER.stem(word) for word in self.word_counts}
+        self.page_rows = rfc_page_rows(self.rfc_num, self.text)
+        self.line_statistics = line_statistics_row(self.rfc_num, self.text)
+
+    def stale_section_ids(self) -> list[int]:
+        return [
+            section_id
+            for section_id, *_ in self.stored_sections.values()
+            if section_id not in self.kept_section_ids
+        ]
 
-    new_tokens = []
-    for parsed_token in parsed_tokens.values():
-        if parsed_token.word not in existing_tokens:
-            new_token = Token(token=parsed_token.word, stem=parsed_token.stem)
-            new_tokens.append(new_token)
-            existing_tokens[parsed_token.word] = new_token
-
-    session.add_all(new_tokens)
-    session.flush()  # This will assign ids to the new tokens
-
-    # positions
-    for tokens, positions in token_positions.items():
-        token = existing_tokens[tokens]
-        for position in positions:
-            position.token = token
-
-        session.add_all(positions)
-        session.add(
-            RfcTokenCount(
-                rfc_num=rfc_num, token=token, total_positions=len(positions)
+    def write(self, session: Session) -> ColumnBuffer:
+        """
+        Write the staged sections, lines and positions, and return the
+        staged rfc_token_count rows of the written positions.
+        """
+        with STAGE_TIMER.stage("row_insert"):
+            section_ids = reserve_ids(
+                session, RfcSection.__table__, len(self.sections)
             )
+            line_ids = reserve_ids(session, RfcLine.__table__, len(self.lines))
+        self.sections.data["id"] = section_ids
+        self.lines.data["id"] = line_ids
+        self.lines.data["section_id"] = [
+            section_ids[i] for i in self.lines.data["section_id"]
+        ]
+        self.positions.data["line_id"] = [
+            line_ids[i] for i in self.positions.data["line_id"]
+        ]
+
+        with STAGE_TIMER.stage("token_resolution"):
+            position_words = self.positions.data["token_id"]
+            token_ids = TOKEN_IDS.resolve(session, self.word_counts.keys())
+            self.positions.data["token_id"] = [
+                token_ids[w] for w in position_words
+            ]
+
+        with STAGE_TIMER.stage("row_insert"):
+            write_buffer(session, self.sections)
+            write_buffer(session, self.lines)
+        with STAGE_TIMER.stage("position_insert"):
+            write_buffer(session, self.positions)
+
+        counts = ColumnBuffer(
+            RfcTokenCount.__table__, "rfc_num", "token_id", "total_positions"
         )
+        for word, total in self.word_counts.items():
+            counts.append(self.rfc_num, token_ids[word], total)
+        return counts
+
+
+def _section_hash(parsed_section: ParsedSection) -> str:
+    # covers the section's own content, not where its tokens start in the
+    # document, so edits before it only shift its positions
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(
+        f"{parsed_section.page}\0{parsed_section.page_line}\n".encode()
+    )
+    for line_num, parsed_line in parsed_section.lines.items():
+        digest.update(
+            f"{line_num}\0{parsed_line.absolute_line}\0"
+            f"{parsed_line.indentation}\0{parsed_line.text}\n".encode()
+        )
+    return digest.hexdigest()
+
+
+def _delete_sections(session: Session, section_ids: list[int]) -> None:
+    line_ids = select(RfcLine.id).where(RfcLine.section_id.in_(section_ids))
+    session.execute(
+        delete(TokenPosition).where(TokenPosition.line_id.in_(line_ids))
+    )
+    session.execute(delete(RfcLine).where(RfcLine.section_id.in_(section_ids)))
+    session.execute(delete(RfcSection).where(RfcSection.id.in_(section_ids)))
 
-    session.flush()
-    return rfc
+
+def _shift_positions(
+    session: Session, rfc_num: int, shifts: dict[int, int]
+) -> None:
+    """Move the abs_index of the positions of kept sections, in one UPDATE."""
+    offsets = values(
+        column("section_index", Integer),
+        column("offset", Integer),
+        name="offsets",
+    ).data(list(shifts.items()))
+    session.execute(
+        update(TokenPosition)
+        .where(
+            TokenPosition.rfc_num == rfc_num,
+            TokenPosition.section_index == offsets.c.section_index,
+        )
+        .values(abs_index=TokenPosition.abs_index + offsets.c.offset)
+    )
+
+
+def _refresh_token_counts(session: Session, rfc_num: int) -> None:
+    session.execute(
+        delete(RfcTokenCount).where(RfcTokenCount.rfc_num == rfc_num)
+    )
+    session.execute(
+        insert(RfcTokenCount).from_select(
+            ["rfc_num", "token_id", "total_positions"],
+            select(TokenPosition.rfc_num, TokenPosition.token_id, func.count())
+            .where(TokenPosition.rfc_num == rfc_num)
+            .group_by(TokenPosition.rfc_num, TokenPosition.token_id),
+        )
+    )
 
 
 def rfc_exists(session: Session, rfc_num: int) -> bool:
     return session.query(exists().where(Rfc.num == rfc_num)).scalar()
+
+
+def stored_content_hashes(
+    session: Session, rfc_nums: Iterable[int]
+) -> dict[int, str | None]:
+    """The content hash of every stored rfc of `rfc_nums`, None if unknown."""
+    return dict(
+        session.execute(
+            select(Rfc.num, Rfc.content_hash).where(Rfc.num.in_(list(rfc_nums)))
+        ).all()
+    )
@@ -1,12 +1,18 @@
 import datetime
+import hashlib
 from pathlib import Path
-from typing import TypedDict
+from typing import Iterable, TypedDict
 
 from sqlalchemy.orm import Session
 
 from bober.src.db import commit
-from bober.src.parsing.parse_rfc import parse_rfc
-from bober.src.rfc_ingest.ingest_rfc import ingest_rfc
+from bober.src.parsing.parse_rfc import stream_rfc_file
+from bober.src.parsing.parsed_types import ParsedDocument, ParsedSection
+from bober.src.rfc_ingest.ingest_rfc import (
+    StagedSections,
+    ingest_rfc,
+    ingest_staged_rfc,
+)
 
 
 class RFCMetadata(TypedDict):
@@ -16,19 +22,66 @@ class RFCMetadata(TypedDict):
     authors: list[str]
 
 
+def content_hash(content: bytes) -> str:
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def file_content_hash(file_path: str | Path) -> str:
+    with open(file_path, "rb") as f:
+        digest = hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16))
+    return digest.hexdigest()
+
+
 @commit
 def load_single_file(
-    session: Session, file_path: str, rfc_metadata: RFCMetadata
+    session: Session, file_path: str | Path, rfc_metadata: RFCMetadata
+):
+    # sections are parsed lazily, so an unchanged file is never parsed
+    with stream_rfc_file(file_path) as sections:
+        _ingest_document(
+            session, sections, rfc_metadata, file_content_hash(file_path)
+        )
+
+
+@commit
+def load_parsed_document(
+    session: Session,
+    parsed_doc: ParsedDocument,
+    rfc_metadata: RFCMetadata,
+    content_hash: str | None = None,
 ):
-    content = Path(file_path).read_text()
-    parsed_doc = parse_rfc(content)
+    _ingest_document(session, parsed_doc, rfc_metadata, content_hash)
 
-    rfc_num = rfc_metadata["num"]
+
+@commit
+def load_staged_document(
+    session: Session,
+    staged: StagedSections,
+    rfc_metadata: RFCMetadata,
+    content_hash: str | None = None,
+):
+    ingest_staged_rfc(
+        session,
+        staged,
+        rfc_title=rfc_metadata["title"],
+        rfc_published_at=rfc_metadata["publish_at"],
+        rfc_authors=rfc_metadata["authors"],
+        content_hash=content_hash,
+    )
+
+
+def _ingest_document(
+    session: Session,
+    parsed_doc: ParsedDocument | Iterable[ParsedSection],
+    rfc_metadata: RFCMetadata,
+    content_hash: str | None,
+):
     ingest_rfc(
         session,
-        rfc_num=rfc_num,
+        rfc_num=rfc_metadata["num"],
         rfc_title=rfc_metadata["title"],
         rfc_published_at=rfc_metadata["publish_at"],
         rfc_authors=rfc_metadata["authors"],
         parsed_doc=parsed_doc,
+        content_hash=content_hash,
     )
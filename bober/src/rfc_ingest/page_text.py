@@ -0,0 +1,140 @@
+import zlib
+from itertools import accumulate, repeat
+from typing import Iterable, Iterator
+
+from sqlalchemy import delete, exists, insert, or_, select
+from sqlalchemy.orm import Session, selectinload
+
+from bober.src.db_models import Rfc, RfcLineStatistics, RfcPage, RfcSection
+from bober.src.parsing.statistical_analysis import LINE_COUNT_NAMES, LineCounts
+from bober.src.rfc_ingest.corpus_version import CORPUS_VERSION
+
+
+class PagedText:
+    """
+    The text of a document rebuilt from its sections, in runs of lines that
+    share a page.
+
+    Lines missing between sections, like page headers and footers, come back
+    as empty lines, so line numbers match the absolute line numbers of the
+    ingest.
+    """
+
+    def __init__(self):
+        # (page, lines) per run of consecutive lines on one page
+        self.runs: list[tuple[int, list[str]]] = []
+        self._page = 1
+        self._page_line = 1  # counting lines in page starts from 1
+
+    def add(self, page: int, row_start: int, lines: Iterable[str]) -> None:
+        if page != self._page:
+            self._page = page
+            self._page_line = 1
+        if not self.runs or self.runs[-1][0] != page:
+            self.runs.append((page, []))
+
+        run = self.runs[-1][1]
+        run.extend(repeat("", row_start - self._page_line))
+        self._page_line = row_start
+        for line in lines:
+            run.append(line)
+            self._page_line += 1
+
+    def lines(self) -> Iterator[str]:
+        for _, lines in self.runs:
+            yield from lines
+
+    def rows(self, rfc_num: int) -> Iterator[dict]:
+        first_line = 1
+        for page, lines in self.runs:
+            if not lines:
+                continue
+            yield {
+                "rfc_num": rfc_num,
+                "first_line": first_line,
+                "line_count": len(lines),
+                "page": page,
+                "content": compress_lines(lines),
+            }
+            first_line += len(lines)
+
+
+def compress_lines(lines: list[str]) -> bytes:
+    return zlib.compress("\n".join(lines).encode())
+
+
+def decompress_lines(content: bytes) -> list[str]:
+    return zlib.decompress(content).decode().split("\n")
+
+
+def rfc_page_rows(rfc_num: int, text: PagedText) -> list[dict]:
+    """The rfc_page rows of a text, compressed."""
+    return list(text.rows(rfc_num))
+
+
+def line_statistics_row(rfc_num: int, text: PagedText) -> dict | None:
+    """The rfc_line_statistics row of a text, None for an empty one."""
+    lines = list(text.lines())
+    if not lines:
+        return None
+    counts = LineCounts("\n".join(lines), None)
+    return {
+        "rfc_num": rfc_num,
+        **{
+            name: list(accumulate(getattr(counts, name), initial=0))
+            for name in LINE_COUNT_NAMES
+        },
+    }
+
+
+def write_rfc_pages(session: Session, rfc_num: int, rows: list[dict]) -> None:
+    session.execute(delete(RfcPage).where(RfcPage.rfc_num == rfc_num))
+    if rows:
+        session.execute(insert(RfcPage), rows)
+
+
+def write_line_statistics(
+    session: Session, rfc_num: int, row: dict | None
+) -> None:
+    session.execute(
+        delete(RfcLineStatistics).where(RfcLineStatistics.rfc_num == rfc_num)
+    )
+    if row is not None:
+        session.execute(insert(RfcLineStatistics), row)
+
+
+def backfill_rfc_pages(session: Session) -> int:
+    """
+    Store the text and line statistics of RFCs ingested before they were
+    stored at ingest, rebuilt from their lines. Returns the number of RFCs
+    backfilled.
+    """
+    rfc_nums = session.scalars(
+        select(Rfc.num).where(
+            or_(
+                ~exists().where(RfcPage.rfc_num == Rfc.num),
+                ~exists().where(RfcLineStatistics.rfc_num == Rfc.num),
+            )
+        )
+    ).all()
+    for rfc_num in rfc_nums:
+        text = PagedText()
+        sections = session.scalars(
+            select(RfcSection)
+            .options(selectinload(RfcSection.lines))
+            .where(RfcSection.rfc_num == rfc_num)
+            .order_by(RfcSection.index)
+        )
+        for section in sections:
+            text.add(
+                section.page,
+                section.row_start,
+                [" " * line.indentation + line.line for line in section.lines],
+            )
+        write_rfc_pages(session, rfc_num, rfc_page_rows(rfc_num, text))
+        write_line_statistics(
+            session, rfc_num, line_statistics_row(rfc_num, text)
+        )
+    if rfc_nums:
+        CORPUS_VERSION.mark_changed(session)
+    return len(rfc_nums)
@@ -0,0 +1,68 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, Sequence
+
+from bober.src.parsing.parse_rfc import parse_rfc_file
+from bober.src.parsing.parsed_types import ParsedDocument
+from bober.src.parsing.stemmer import STEMMER
+
+
+def parse_files_in_pool(
+    file_paths: Sequence[str | Path],
+    workers: int | None = None,
+    queue_size: int = 8,
+) -> Iterator[ParsedDocument]:
+    """
+    Parse files in a process pool and yield the documents in input order.
+    The workers also stem the words of their documents, and this process's
+    stemmer learns the stems before the documents are yielded, so the
+    ingest doesn't run the stemmer.
+
+    At most `queue_size` documents are parsed or in flight, the one the
+    caller is handling included. The next file is only submitted when the
+    caller asks for another document, so a slow consumer (the DB writer)
+    applies backpressure instead of letting parsed documents pile up.
+
+    :param file_paths: Files to parse
+    :param workers: Number of parsing processes, defaults to the CPU count
+    :param queue_size: Maximum number of parsed or in-flight documents
+    """
+    remaining = iter(file_paths)
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = deque(
+            pool.submit(_parse_and_stem, file_path)
+            for file_path in islice(remaining, queue_size)
+        )
+        while pending:
+            document, stems = pending.popleft().result()
+            STEMMER.warm(stems.items())
+            yield document
+            # the caller is done with the previous document
+            if (file_path := next(remaining, None)) is not None:
+                pending.append(pool.submit(_parse_and_stem, file_path))
+    finally:
+        # files not started yet are dropped if the consumer stopped early
+        pool.shutdown(cancel_futures=True)
+
+
+def document_stems(document: ParsedDocument) -> dict[str, str]:
+    """The stem of every word of `document`."""
+    return {
+        word: STEMMER.stem(word)
+        for word in {
+            token.word
+            for section in document.sections
+            for line in section.lines.values()
+            for token in line.tokens
+        }
+    }
+
+
+def _parse_and_stem(
+    file_path: str | Path,
+) -> tuple[ParsedDocument, dict[str, str]]:
+    document = parse_rfc_file(file_path)
+    return document, document_stems(document)
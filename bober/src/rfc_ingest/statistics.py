@@ -0,0 +1,307 @@
+from typing import Iterable
+
+from sqlalchemy import (
+    BigInteger,
+    Integer,
+    String,
+    any_,
+    bindparam,
+    delete,
+    distinct,
+    extract,
+    func,
+    literal,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import Session
+
+from bober.src.db_models import (
+    CORPUS_STATISTICS_ID,
+    CorpusStatistics,
+    Rfc,
+    RfcTokenCount,
+    StemStatistics,
+    Token,
+    TokenStatistics,
+)
+from bober.src.rfc_ingest.bulk_write import unnest_rows
+
+
+def rfc_stems(session: Session, rfc_num: int) -> set[str]:
+    return set(
+        session.scalars(
+            select(distinct(Token.stem))
+            .join(Token.rfc_counts)
+            .where(RfcTokenCount.rfc_num == rfc_num)
+        )
+    )
+
+
+def rfc_total_tokens(session: Session, rfc_num: int) -> int:
+    return session.scalar(
+        select(func.coalesce(func.sum(RfcTokenCount.total_positions), 0)).where(
+            RfcTokenCount.rfc_num == rfc_num
+        )
+    )
+
+
+def rfc_token_counts(session: Session, rfc_num: int) -> dict[int, int]:
+    return dict(
+        session.execute(
+            select(RfcTokenCount.token_id, RfcTokenCount.total_positions).where(
+                RfcTokenCount.rfc_num == rfc_num
+            )
+        ).all()
+    )
+
+
+def record_token_counts(
+    session: Session,
+    year: int | None,
+    old_counts: dict[int, int],
+    new_counts: dict[int, int],
+) -> None:
+    """
+    Move the token statistics by the change of an RFC's occurrences per
+    token id, from `old_counts` (empty for a new RFC) to `new_counts`.
+    `year` is the RFC's publication year.
+    """
+    deltas = []
+    for token_id in sorted(old_counts.keys() | new_counts.keys()):
+        old = old_counts.get(token_id, 0)
+        new = new_counts.get(token_id, 0)
+        if old != new:
+            deltas.append((token_id, new - old, bool(new) - bool(old)))
+    if not deltas:
+        return
+
+    token_ids, occurrences, rfcs = zip(*deltas)
+    token_deltas = unnest_rows(
+        "token_deltas",
+        token_id=(Integer, list(token_ids)),
+        occurrences=(BigInteger, list(occurrences)),
+        rfcs=(Integer, list(rfcs)),
+    )
+    upsert = insert(TokenStatistics).from_select(
+        [
+            "token_id",
+            "token",
+            "stem",
+            "total_occurrences",
+            "rfc_count",
+            "first_year",
+            "last_year",
+        ],
+        select(
+            Token.id,
+            Token.token,
+            Token.stem,
+            token_deltas.c.occurrences,
+            token_deltas.c.rfcs,
+            literal(year, Integer),
+            literal(year, Integer),
+        ).join(token_deltas, token_deltas.c.token_id == Token.id)
+        # so concurrent ingests lock the rows in the same order
+        .order_by(Token.id),
+    )
+    session.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[TokenStatistics.token_id],
+            set_={
+                "total_occurrences": TokenStatistics.total_occurrences
+                + upsert.excluded.total_occurrences,
+                "rfc_count": TokenStatistics.rfc_count
+                + upsert.excluded.rfc_count,
+                "first_year": func.least(
+                    TokenStatistics.first_year, upsert.excluded.first_year
+                ),
+                "last_year": func.greatest(
+                    TokenStatistics.last_year, upsert.excluded.last_year
+                ),
+            },
+        )
+    )
+
+    # tokens that left the RFC may have lost their first or last year, which
+    # only the RFCs still containing them can tell
+    lost_token_ids = [token_id for token_id, _, rfcs in deltas if rfcs < 0]
+    if lost_token_ids:
+        lost = TokenStatistics.token_id == any_(
+            bindparam("lost_token_ids", lost_token_ids, type_=ARRAY(Integer))
+        )
+        session.execute(
+            delete(TokenStatistics).where(
+                lost,
+                TokenStatistics.rfc_count <= 0,
+            )
+        )
+        session.execute(
+            update(TokenStatistics)
+            .where(lost)
+            .values(
+                first_year=_token_year(func.min),
+                last_year=_token_year(func.max),
+            )
+        )
+
+
+def record_new_document(
+    session: Session, stems: Iterable[str], total_tokens: int
+) -> None:
+    """Count a newly ingested RFC, its length and the stems it contains."""
+    _add_document_frequencies(session, {stem: 1 for stem in stems})
+    _add_corpus_totals(session, 1, total_tokens)
+
+
+def record_changed_document(
+    session: Session,
+    old_stems: set[str],
+    new_stems: set[str],
+    total_tokens_delta: int,
+) -> None:
+    """
+    Move the frequencies of the stems a re-ingested RFC gained or lost, and
+    the corpus length by the change of its length.
+    """
+    deltas = {stem: 1 for stem in new_stems - old_stems}
+    deltas.update({stem: -1 for stem in old_stems - new_stems})
+    _add_document_frequencies(session, deltas)
+    if total_tokens_delta:
+        _add_corpus_totals(session, 0, total_tokens_delta)
+
+
+def rebuild_statistics(session: Session) -> None:
+    """Recompute the statistics and rfc lengths from rfc_token_count."""
+    session.execute(
+        update(Rfc).values(
+            total_tokens=select(
+                func.coalesce(func.sum(RfcTokenCount.total_positions), 0)
+            )
+            .where(RfcTokenCount.rfc_num == Rfc.num)
+            .scalar_subquery()
+        )
+    )
+    session.execute(delete(StemStatistics))
+    session.execute(
+        insert(StemStatistics).from_select(
+            ["stem", "document_frequency"],
+            select(Token.stem, func.count(distinct(RfcTokenCount.rfc_num)))
+            .join(Token.rfc_counts)
+            .group_by(Token.stem),
+        )
+    )
+    session.execute(delete(TokenStatistics))
+    session.execute(
+        insert(TokenStatistics).from_select(
+            [
+                "token_id",
+                "token",
+                "stem",
+                "total_occurrences",
+                "rfc_count",
+                "first_year",
+                "last_year",
+            ],
+            select(
+                Token.id,
+                Token.token,
+                Token.stem,
+                func.sum(RfcTokenCount.total_positions),
+                func.count(RfcTokenCount.rfc_num),
+                func.min(_year(Rfc.published_at)),
+                func.max(_year(Rfc.published_at)),
+            )
+            .join(Token.rfc_counts)
+            .join(RfcTokenCount.rfc)
+            .group_by(Token.id),
+        )
+    )
+    # updated in place, keeping the version of the row
+    totals = insert(CorpusStatistics).from_select(
+        ["id", "total_documents", "total_tokens"],
+        select(
+            literal(CORPUS_STATISTICS_ID),
+            func.count(Rfc.num),
+            func.coalesce(func.sum(Rfc.total_tokens), 0),
+        ),
+    )
+    session.execute(
+        totals.on_conflict_do_update(
+            index_elements=[CorpusStatistics.id],
+            set_={
+                "total_documents": totals.excluded.total_documents,
+                "total_tokens": totals.excluded.total_tokens,
+            },
+        )
+    )
+
+
+def _year(published_at):
+    return extract("year", published_at).cast(Integer)
+
+
+def _token_year(aggregate):
+    """`aggregate` of the publication years of a token statistics row."""
+    return (
+        select(aggregate(_year(Rfc.published_at)))
+        .select_from(RfcTokenCount)
+        .join(RfcTokenCount.rfc)
+        .where(RfcTokenCount.token_id == TokenStatistics.token_id)
+        .scalar_subquery()
+    )
+
+
+def _add_document_frequencies(session: Session, deltas: dict[str, int]) -> None:
+    if not deltas:
+        return
+
+    stem_deltas = unnest_rows(
+        "stem_deltas",
+        stem=(String, list(deltas.keys())),
+        delta=(Integer, list(deltas.values())),
+    )
+    upsert = insert(StemStatistics).from_select(
+        ["stem", "document_frequency"],
+        select(stem_deltas.c.stem, stem_deltas.c.delta)
+        # so concurrent ingests lock the rows in the same order
+        .order_by(stem_deltas.c.stem),
+    )
+    session.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[StemStatistics.stem],
+            set_={
+                "document_frequency": StemStatistics.document_frequency
+                + upsert.excluded.document_frequency
+            },
+        )
+    )
+    if min(deltas.values()) < 0:
+        lost_stems = [stem for stem, delta in deltas.items() if delta < 0]
+        session.execute(
+            delete(StemStatistics).where(
+                StemStatistics.stem
+                == any_(
+                    bindparam("lost_stems", lost_stems, type_=ARRAY(String))
+                ),
+                StemStatistics.document_frequency <= 0,
+            )
+        )
+
+
+def _add_corpus_totals(session: Session, documents: int, tokens: int) -> None:
+    upsert = insert(CorpusStatistics).values(
+        id=CORPUS_STATISTICS_ID, total_documents=documents, total_tokens=tokens
+    )
+    session.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[CorpusStatistics.id],
+            set_={
+                "total_documents": CorpusStatistics.total_documents
+                + upsert.excluded.total_documents,
+                "total_tokens": CorpusStatistics.total_tokens
+                + upsert.excluded.total_tokens,
+            },
+        )
+    )
@@ -0,0 +1,116 @@
+from typing import Iterable
+
+from sqlalchemy import String, any_, bindparam, event, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import Session
+
+from bober.src.db_models import Token
+from bober.src.parsing.stemmer import STEMMER
+from bober.src.rfc_ingest.bulk_write import unnest_rows
+from bober.src.timing import STAGE_TIMER
+
+# session.info key of the ids learned in the session's current transaction
+_PENDING = "pending_token_ids"
+
+
+class TokenIdCache:
+    """
+    Process-wide word -> token id map shared by every ingest.
+
+    The whole vocabulary is loaded on first use and the map is then extended
+    as tokens are resolved, so later documents only go to the DB for words
+    nobody has seen yet. Ids learned inside a transaction are kept on the
+    session until it commits, so a rollback never leaves ids of tokens that
+    were not stored in the shared map.
+    """
+
+    def __init__(self):
+        self._ids: dict[str, int] = {}
+        self._loaded = False
+
+    def resolve(self, session: Session, words: Iterable[str]) -> dict[str, int]:
+        if not self._loaded:
+            self._ids.update(
+                session.execute(select(Token.token, Token.id)).all()
+            )
+            self._loaded = True
+
+        pending = session.info.setdefault(_PENDING, {})
+        token_ids = {}
+        missing = set()
+        for word in words:
+            token_id = self._ids.get(word) or pending.get(word)
+            if token_id is None:
+                missing.add(word)
+            else:
+                token_ids[word] = token_id
+
+        if missing:
+            learned = self._fetch_or_create(session, missing)
+            pending.update(learned)
+            token_ids.update(learned)
+
+        return token_ids
+
+    def clear(self) -> None:
+        self._ids.clear()
+        self._loaded = False
+
+    def _fetch_or_create(self, session: Session, words: set[str]):
+        # tokens may have been added by other processes or by phrases/groups
+        token_ids = _stored_token_ids(session, words)
+
+        new_words = list(words - token_ids.keys())
+        if new_words:
+            with STAGE_TIMER.stage("tokenize_stem"):
+                stems = [STEMMER.stem(word) for word in new_words]
+            new_tokens = unnest_rows(
+                "new_tokens",
+                token=(String, new_words),
+                stem=(String, stems),
+            )
+            inserted = session.execute(
+                insert(Token)
+                .from_select(
+                    ["token", "stem"],
+                    select(new_tokens.c.token, new_tokens.c.stem)
+                    # so concurrent ingests lock new tokens in the same order
+                    .order_by(new_tokens.c.token),
+                )
+                .on_conflict_do_nothing(index_elements=["token"])
+                .returning(Token.token, Token.id)
+            )
+            token_ids.update(inserted.all())
+
+        # inserted concurrently by another transaction that has committed since
+        if raced := words - token_ids.keys():
+            token_ids.update(_stored_token_ids(session, raced))
+
+        return token_ids
+
+    def _promote(self, session: Session) -> None:
+        self._ids.update(session.info.pop(_PENDING, {}))
+
+
+def _stored_token_ids(session: Session, words: set[str]) -> dict[str, int]:
+    return dict(
+        session.execute(
+            select(Token.token, Token.id).where(
+                Token.token
+                == any_(bindparam("words", list(words), type_=ARRAY(String)))
+            )
+        ).all()
+    )
+
+
+TOKEN_IDS = TokenIdCache()
+
+
+@event.listens_for(Session, "after_commit")
+def _promote_pending_token_ids(session: Session) -> None:
+    TOKEN_IDS._promote(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending_token_ids(session: Session) -> None:
+    session.info.pop(_PENDING, None)
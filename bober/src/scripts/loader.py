@@ -1,24 +1,120 @@
+import argparse
+import asyncio
+import datetime
 import json
 from pathlib import Path
 
 from loguru import logger
+from sqlalchemy import create_engine
 from sqlalchemy.orm import Session
 
-from bober.src.rfc_ingest.load_from_file import load_single_file
+from bober.src.db import get_database_url
+from bober.src.migrations import prepare_database
+from bober.src.parsing.stemmer import STEMMER
+from bober.src.rfc_ingest.async_pipeline import ingest_files_async
+from bober.src.rfc_ingest.ingest_rfc import stored_content_hashes
+from bober.src.rfc_ingest.load_from_file import (
+    RFCMetadata,
+    file_content_hash,
+    load_parsed_document,
+)
+from bober.src.rfc_ingest.parse_pool import parse_files_in_pool
 
+EXAMPLES_DIR = Path(__file__).parent.parent.parent / "resources" / "examples"
 
-def load_examples(session: Session):
-    example_dir_path = (
-        Path(__file__).parent.parent.parent / "resources" / "examples"
-    )
-    with open(example_dir_path / "examples.json") as f:
+
+def _examples_metadata() -> list[RFCMetadata]:
+    with open(EXAMPLES_DIR / "examples.json") as f:
         rfcs_metadata = json.load(f)
+    for rfc_metadata in rfcs_metadata:
+        rfc_metadata["num"] = int(rfc_metadata["num"])
+        rfc_metadata["publish_at"] = datetime.datetime.strptime(
+            rfc_metadata["publish_at"], "%Y/%m/%d"
+        ).date()
+    return rfcs_metadata
+
+
+def load_examples(session: Session, workers: int | None = None):
+    """
+    Load the bundled examples, parsing them in `workers` processes while
+    this process writes the parsed documents to the DB one at a time.
+    Files whose content is already stored are skipped without parsing.
+    """
+    rfcs_metadata = _examples_metadata()
+
+    STEMMER.warm_from_db(session)
+    stored_hashes = stored_content_hashes(
+        session, [rfc_metadata["num"] for rfc_metadata in rfcs_metadata]
+    )
+
+    to_load = []
+    for rfc_metadata in rfcs_metadata:
+        rfc_num = rfc_metadata["num"]
+        file_path = EXAMPLES_DIR / f"{rfc_num}.txt"
+        content_hash = file_content_hash(file_path)
+        if stored_hashes.get(rfc_num) == content_hash:
+            logger.info(f"Skipping unchanged rfc {rfc_num}")
+            continue
+        to_load.append((rfc_metadata, file_path, content_hash))
+
+    parsed_docs = parse_files_in_pool(
+        [file_path for _, file_path, _ in to_load], workers
+    )
+    for index, ((rfc_metadata, _, content_hash), parsed_doc) in enumerate(
+        zip(to_load, parsed_docs, strict=True), 1
+    ):
+        rfc_num = rfc_metadata["num"]
+        load_parsed_document(session, parsed_doc, rfc_metadata, content_hash)
+        logger.info(f"Finish loading rfc {rfc_num} - {index}/{len(to_load)}")
+
 
-    for index, rfc_metadata in enumerate(rfcs_metadata, 1):
-        rfc_num = int(rfc_metadata["num"])
-        file_path = example_dir_path / f"{rfc_num}.txt"
+async def load_examples_async(
+    database_url: str, workers: int | None = None, writers: int = 4
+) -> int:
+    """
+    Load the bundled examples through the asyncio pipeline, writing up to
+    `writers` RFCs concurrently over asyncpg.
+    """
+    files = [
+        (EXAMPLES_DIR / f"{rfc_metadata['num']}.txt", rfc_metadata)
+        for rfc_metadata in _examples_metadata()
+    ]
 
-        load_single_file(session, file_path, rfc_metadata)
-        logger.info(
-            f"Finish loading rfc {rfc_num} - {index}/{len(rfcs_metadata)}"
+    return await ingest_files_async(
+        database_url, files, parse_workers=workers, writers=writers
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Load the bundled example RFCs into the database."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="parsing processes, defaults to the CPU count",
+    )
+    parser.add_argument(
+        "--writers",
+        type=int,
+        help="write this many RFCs concurrently over asyncpg, instead of "
+        "one at a time",
+    )
+    args = parser.parse_args()
+
+    engine = create_engine(get_database_url())
+    prepare_database(engine)
+    if args.writers:
+        asyncio.run(
+            load_examples_async(
+                get_database_url("asyncpg"), args.workers, args.writers
+            )
         )
+    else:
+        with Session(engine) as session:
+            load_examples(session, args.workers)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,14 @@
+import asyncio
+
 from loguru import logger
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from bober.src.db import drop_schema, get_database_url
-from bober.src.db_models import Base
-from bober.src.phrases.phrases import save_new_phrase
-from bober.src.scripts.loader import load_examples as _load_examples
-from bober.src.word_groups.word_groups import create_word_group
+from bober.src.migrations import prepare_database
+from bober.src.phrases.bulk import import_phrases
+from bober.src.scripts.loader import load_examples_async
+from bober.src.word_groups.bulk import import_groups
 
 
 def init_db():
@@ -17,14 +19,14 @@ def init_db():
     drop_schema(engine)
 
     logger.info("Creating database")
-    Base.metadata.create_all(engine)
+    prepare_database(engine)
     session = sessionmaker(engine)
     return session()
 
 
-def load_examples(session):
+def load_examples():
     logger.info("Loading examples")
-    _load_examples(session)
+    asyncio.run(load_examples_async(get_database_url("asyncpg")))
 
 
 def add_phrases(session):
@@ -38,9 +40,10 @@ def add_phrases(session):
         "the internet society",
         "sun microsystems",
     ]
-    for phrase in phrases_to_add:
-        logger.info(f"Adding phrase {phrase.lower()}")
-        save_new_phrase(session, phrase.lower(), phrase.lower())
+    logger.info(f"Adding {len(phrases_to_add)} phrases")
+    import_phrases(
+        session, {phrase.lower(): phrase.lower() for phrase in phrases_to_add}
+    )
 
 
 def add_groups(session):
@@ -69,16 +72,13 @@ def add_groups(session):
         ],
     }
 
-    for group_name, group_items in groups_to_add.items():
-        lower_group_name = group_name.lower()
-        lower_group_items = [x.lower() for x in group_items]
-        logger.info(f"Adding group {lower_group_name}: {lower_group_items}")
-        create_word_group(session, lower_group_name, lower_group_items)
+    logger.info(f"Adding groups {', '.join(groups_to_add)}")
+    import_groups(session, groups_to_add)
 
 
 def main():
     session = init_db()
-    load_examples(session)
+    load_examples()
     add_phrases(session)
     add_groups(session)
 
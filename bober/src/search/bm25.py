@@ -0,0 +1,85 @@
+from sqlalchemy import Float, func, select
+from sqlalchemy.orm import Query, Session
+
+from bober.src.db_models import (
+    CORPUS_STATISTICS_ID,
+    CorpusStatistics,
+    Rfc,
+    RfcTokenCount,
+    StemStatistics,
+    Token,
+)
+from bober.src.parsing.stemmer import STEMMER
+
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+
+
+def build_bm25_query(
+    session: Session,
+    tokens: list[str],
+    k1: float = DEFAULT_K1,
+    b: float = DEFAULT_B,
+) -> Query:
+    """
+    Okapi BM25 score per rfc over the query stems.
+
+    The frequency of a stem in an rfc is the sum over its tokens, saturated
+    by `k1` and normalized by the rfc's length relative to the average length
+    as much as `b` says. Rfcs without a stored length count as average ones.
+    Lengths, df and corpus totals are the ones the ingest stores, so only
+    the counts of the query stems are read.
+    """
+    stems = [STEMMER.stem(token.lower()) for token in tokens]
+
+    corpus = select(CorpusStatistics).where(
+        CorpusStatistics.id == CORPUS_STATISTICS_ID
+    )
+    total_documents = (
+        corpus.with_only_columns(CorpusStatistics.total_documents)
+        .scalar_subquery()
+        .cast(Float)
+    )
+    total_tokens = (
+        corpus.with_only_columns(CorpusStatistics.total_tokens)
+        .scalar_subquery()
+        .cast(Float)
+    )
+    average_length = total_tokens / func.nullif(total_documents, 0)
+
+    stem_frequency = (
+        session.query(
+            RfcTokenCount.rfc_num,
+            Token.stem,
+            func.sum(RfcTokenCount.total_positions).cast(Float).label('tf'),
+        )
+        .join(Token, Token.id == RfcTokenCount.token_id)
+        .filter(Token.stem.in_(stems))
+        .group_by(RfcTokenCount.rfc_num, Token.stem)
+        .subquery()
+    )
+
+    df = StemStatistics.document_frequency.cast(Float)
+    idf = func.ln(1 + (total_documents - df + 0.5) / (df + 0.5))
+    tf = stem_frequency.c.tf
+    relative_length = func.coalesce(
+        Rfc.total_tokens.cast(Float) / func.nullif(average_length, 0), 1.0
+    )
+    length_norm = 1 - b + b * relative_length
+
+    bm25 = (
+        session.query(
+            stem_frequency.c.rfc_num,
+            (idf * tf * (k1 + 1) / (tf + k1 * length_norm)).label('bm25_score'),
+        )
+        .join(StemStatistics, StemStatistics.stem == stem_frequency.c.stem)
+        .join(Rfc, Rfc.num == stem_frequency.c.rfc_num)
+        .subquery()
+    )
+
+    bm25_summary = session.query(
+        bm25.c.rfc_num,
+        func.sum(bm25.c.bm25_score).label('total_bm25_score'),
+    ).group_by(bm25.c.rfc_num)
+
+    return bm25_summary
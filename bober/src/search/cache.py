@@ -0,0 +1,109 @@
+import time
+from collections import OrderedDict
+from dataclasses import asdict, is_dataclass
+from functools import wraps
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from bober.src.rfc_ingest.corpus_version import CORPUS_VERSION
+
+
+class QueryCache:
+    """
+    Results of read-only queries, keyed by the query and the corpus version.
+
+    An entry is dropped when it is the least recently used one over
+    `max_entries`, when it is older than `ttl` seconds, or when the stored
+    corpus version moves. Writes committed by this process are never served
+    stale, and writes of other processes at most for the interval the
+    stored version is trusted, see `CorpusVersion.current`. Cached results
+    are shared between callers, so cached queries return immutable ones:
+    tuples and frozen models.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._version: int | None = None
+        self._lock = Lock()
+
+    def cached(self, func: Callable) -> Callable:
+        """Cache `func(session, *args, **kwargs)` by its arguments."""
+
+        @wraps(func)
+        def wrapper(session: Session, *args, **kwargs):
+            version = CORPUS_VERSION.current(session)
+            key = (
+                func.__module__,
+                func.__qualname__,
+                # the same query against another database is another entry
+                session.get_bind().engine.url,
+                version,
+                _normalize(args),
+                _normalize(kwargs),
+            )
+            found, result = self._get(key, version)
+            if not found:
+                result = func(session, *args, **kwargs)
+                self._put(key, result)
+            return result
+
+        return wrapper
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def _get(self, key: Hashable, version: int) -> tuple[bool, Any]:
+        with self._lock:
+            if self._version != version:
+                self._entries.clear()
+                self._version = version
+
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+
+            self._entries.pop(key, None)
+            self.misses += 1
+            return False, None
+
+    def _put(self, key: Hashable, result: Any) -> None:
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def _normalize(value: Any) -> Hashable:
+    """A hashable key equal for equal queries."""
+    if isinstance(value, BaseModel):
+        return type(value).__name__, _normalize(value.model_dump())
+    if is_dataclass(value) and not isinstance(value, type):
+        return type(value).__name__, _normalize(asdict(value))
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(map(_normalize, value)))
+    if isinstance(value, (list, tuple)):
+        return tuple(map(_normalize, value))
+    return value
+
+
+QUERY_CACHE = QueryCache()
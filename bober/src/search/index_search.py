@@ -1,9 +1,24 @@
 from dataclasses import dataclass
 
-from sqlalchemy import func, select
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from bober.src.db_models import Rfc, RfcLine, RfcSection, Token, TokenPosition
+from bober.src.db_models import Rfc, Token, TokenPosition
+from bober.src.search.pagination import KeysetPage, SortKey, paginate
+
+# the columns of the coordinate indexes on token_position, which also make
+# every row's key unique
+ABS_POSITION_ORDER = [
+    SortKey("rfc_num"),
+    SortKey("abs_line"),
+    SortKey("abs_column"),
+]
+RELATIVE_POSITION_ORDER = [
+    SortKey("rfc_num"),
+    SortKey("section_index"),
+    SortKey("line_in_section"),
+    SortKey("word_index"),
+]
 
 
 @dataclass
@@ -11,8 +26,10 @@ class AbsPositionQuery:
     title: None | str = None
     abs_line: None | int = None
     column: None | int = None
-    page: int = 1
+    # continuation token of a previous page, None for the first page
+    cursor: None | str = None
     page_size: int = 50
+    exact_count: bool = False
 
     def __bool__(self) -> bool:
         return any(map(bool, [self.title, self.abs_line, self.column]))
@@ -24,8 +41,10 @@ class RelativePositionQuery:
     section: None | int = None
     line_in_section: None | int = None
     word_in_line: None | int = None
-    page: int = 1
+    # continuation token of a previous page, None for the first page
+    cursor: None | str = None
     page_size: int = 50
+    exact_count: bool = False
 
     def __bool__(self) -> bool:
         return any(
@@ -55,6 +74,22 @@ class PaginatedResults:
     results: list[SearchResult]
     total_count: int
     total_pages: int
+    next_cursor: None | str = None
+    prev_cursor: None | str = None
+    total_is_exact: bool = True
+
+    @classmethod
+    def from_page(
+        cls, page: KeysetPage, results: list[SearchResult], page_size: int
+    ) -> "PaginatedResults":
+        return cls(
+            results=results,
+            total_count=page.total_count,
+            total_pages=(page.total_count + page_size - 1) // page_size,
+            next_cursor=page.next_cursor,
+            prev_cursor=page.prev_cursor,
+            total_is_exact=page.total_is_exact,
+        )
 
 
 def abs_position_search(
@@ -62,64 +97,49 @@ def abs_position_search(
 ) -> PaginatedResults:
     query = (
         select(
-            Rfc.num,
+            TokenPosition.rfc_num,
             Rfc.title,
-            RfcLine.abs_line_number.label("abs_line"),
+            TokenPosition.abs_line,
+            TokenPosition.abs_column,
             Token.token,
             Token.stem,
-            TokenPosition.start_position,
-            RfcLine.indentation,
         )
-        .join(Token.positions)
-        .join(TokenPosition.line)
-        .join(RfcLine.section)
-        .join(RfcSection.rfc)
-        .order_by(RfcLine.abs_line_number, TokenPosition.start_position)
+        .join(Token, Token.id == TokenPosition.token_id)
+        .join(Rfc, Rfc.num == TokenPosition.rfc_num)
     )
 
     if criteria.title:
         query = query.where(Rfc.title.ilike(f"%{criteria.title}%"))
 
     if criteria.abs_line is not None:
-        query = query.where(RfcLine.abs_line_number == criteria.abs_line)
+        query = query.where(TokenPosition.abs_line == criteria.abs_line)
 
     if criteria.column is not None:
         query = query.where(
-            (
-                (RfcLine.indentation + TokenPosition.start_position)
-                <= criteria.column
-            )
-            & (
-                (RfcLine.indentation + TokenPosition.end_position)
-                >= criteria.column
-            )
+            TokenPosition.abs_column <= criteria.column,
+            TokenPosition.abs_end_column >= criteria.column,
         )
 
-    # Count total results
-    count_query = select(func.count()).select_from(query.subquery())
-    total_count = session.execute(count_query).scalar_one()
-
-    # Apply pagination
-    offset = (criteria.page - 1) * criteria.page_size
-    query = query.offset(offset).limit(criteria.page_size)
-
-    results = session.execute(query).all()
+    page = paginate(
+        session,
+        query,
+        ABS_POSITION_ORDER,
+        criteria.page_size,
+        cursor=criteria.cursor,
+        exact_count=criteria.exact_count,
+    )
     search_results = [
         SearchResult(
-            rfc=result.num,
+            rfc=result.rfc_num,
             abs_line=result.abs_line,
             stem=result.stem,
             word=result.token,
-            context=f"{result.title} - Line {result.abs_line}, Start Column {result.indentation + result.start_position}",
+            context=f"{result.title} - Line {result.abs_line}, Start Column {result.abs_column}",
         )
-        for result in results
+        for result in page.rows
     ]
 
-    total_pages = (total_count + criteria.page_size - 1) // criteria.page_size
-
-    return PaginatedResults(
-        results=search_results, total_count=total_count, total_pages=total_pages
-    )
+    return PaginatedResults.from_page(page, search_results, criteria.page_size)
 
 
 def relative_position_search(
@@ -127,53 +147,47 @@ def relative_position_search(
 ) -> PaginatedResults:
     query = (
         select(
-            Rfc.num,
+            TokenPosition.rfc_num,
             Rfc.title,
-            RfcLine.abs_line_number.label("abs_line"),
+            TokenPosition.abs_line,
             Token.token,
             Token.stem,
-            RfcLine.line_number,
+            TokenPosition.section_index,
+            TokenPosition.line_in_section,
             TokenPosition.index.label("word_index"),
-            RfcSection.index.label("section_index"),
         )
-        .join(Token.positions)
-        .join(TokenPosition.line)
-        .join(RfcLine.section)
-        .join(RfcSection.rfc)
-        .order_by(RfcSection.index, RfcLine.id, TokenPosition.start_position)
+        .join(Token, Token.id == TokenPosition.token_id)
+        .join(Rfc, Rfc.num == TokenPosition.rfc_num)
     )
 
     if criteria.title:
         query = query.where(Rfc.title.ilike(f"%{criteria.title}%"))
     if criteria.section is not None:
-        query = query.where(RfcSection.index == criteria.section)
+        query = query.where(TokenPosition.section_index == criteria.section)
     if criteria.line_in_section is not None:
-        query = query.where(RfcLine.line_number == criteria.line_in_section)
+        query = query.where(
+            TokenPosition.line_in_section == criteria.line_in_section
+        )
     if criteria.word_in_line is not None:
         query = query.where(TokenPosition.index == criteria.word_in_line)
 
-    # Count total results
-    count_query = select(func.count()).select_from(query.subquery())
-    total_count = session.execute(count_query).scalar_one()
-
-    # Apply pagination
-    offset = (criteria.page - 1) * criteria.page_size
-    query = query.offset(offset).limit(criteria.page_size)
-
-    results = session.execute(query).all()
+    page = paginate(
+        session,
+        query,
+        RELATIVE_POSITION_ORDER,
+        criteria.page_size,
+        cursor=criteria.cursor,
+        exact_count=criteria.exact_count,
+    )
     search_results = [
         SearchResult(
-            rfc=result.num,
+            rfc=result.rfc_num,
             abs_line=result.abs_line,
             stem=result.stem,
             word=result.token,
-            context=f"{result.title} - Section {result.section_index}, Line {result.line_number}, Word {result.word_index}",
+            context=f"{result.title} - Section {result.section_index}, Line {result.line_in_section}, Word {result.word_index}",
         )
-        for result in results
+        for result in page.rows
     ]
 
-    total_pages = (total_count + criteria.page_size - 1) // criteria.page_size
-
-    return PaginatedResults(
-        results=search_results, total_count=total_count, total_pages=total_pages
-    )
+    return PaginatedResults.from_page(page, search_results, criteria.page_size)
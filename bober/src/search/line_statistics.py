@@ -0,0 +1,114 @@
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, pairwise
+from typing import Mapping, Sequence
+
+from sqlalchemy.orm import Session
+
+from bober.src.db_models import RfcLineStatistics
+from bober.src.parsing.statistical_analysis import LINE_COUNT_NAMES, ItemCounts
+from bober.src.search.rfc_content import (
+    DOCUMENT_CACHE,
+    LinePageMap,
+    get_line_page_map,
+)
+
+
+class LineStatisticsIndex:
+    """
+    The line counts of a document, from their stored prefix sums, answering
+    the `ItemCounts` of any line range.
+
+    Totals take two lookups. Page totals and line extremes take one step per
+    run of lines on a page in the range, as the extremes of every run are
+    computed on load, and only runs cut by the range ends are scanned.
+    """
+
+    def __init__(
+        self, prefix_sums: Mapping[str, Sequence[int]], line_pages: LinePageMap
+    ):
+        self.line_pages = line_pages
+        self.prefix_sums = {
+            name: array('q', prefix_sums[name]) for name in LINE_COUNT_NAMES
+        }
+        self.line_count = len(self.prefix_sums[LINE_COUNT_NAMES[0]]) - 1
+        self.run_starts = line_pages.first_lines
+        self.run_ends = array('I', [start - 1 for start in self.run_starts[1:]])
+        self.run_ends.append(self.line_count)
+
+        self.line_counts = {}
+        self.non_empty_lines = {}
+        self.run_max = {}
+        self.run_min = {}
+        for name, sums in self.prefix_sums.items():
+            counts = array('q', [b - a for a, b in pairwise(sums)])
+            self.line_counts[name] = counts
+            self.non_empty_lines[name] = array(
+                'q', accumulate(map(bool, counts), initial=0)
+            )
+            runs = [
+                counts[start - 1 : end]
+                for start, end in zip(self.run_starts, self.run_ends)
+            ]
+            self.run_max[name] = array(
+                'q', [max(run, default=0) for run in runs]
+            )
+            # 0 for runs without items
+            self.run_min[name] = array(
+                'q', [min(filter(None, run), default=0) for run in runs]
+            )
+
+    def range_counts(self, count_name: str, start: int, end: int) -> ItemCounts:
+        """The counts of lines `start` to `end`, inclusive and from 1."""
+        start = max(start, 1)
+        end = min(end, self.line_count)
+        if start > end:
+            return ItemCounts()
+
+        sums = self.prefix_sums[count_name]
+        non_empty = self.non_empty_lines[count_name]
+        counts = ItemCounts(
+            total_items=sums[end] - sums[start - 1],
+            line_count=non_empty[end] - non_empty[start - 1],
+        )
+
+        run = max(bisect_right(self.run_starts, start) - 1, 0)
+        while run < len(self.run_starts) and self.run_starts[run] <= end:
+            run_start = max(self.run_starts[run], start)
+            run_end = min(self.run_ends[run], end)
+            items = sums[run_end] - sums[run_start - 1]
+            if items:
+                page = self.line_pages.pages[run]
+                counts.items_per_page[page] = (
+                    counts.items_per_page.get(page, 0) + items
+                )
+                if (run_start, run_end) == (
+                    self.run_starts[run],
+                    self.run_ends[run],
+                ):
+                    run_max = self.run_max[count_name][run]
+                    run_min = self.run_min[count_name][run]
+                else:
+                    lines = self.line_counts[count_name][
+                        run_start - 1 : run_end
+                    ]
+                    run_max = max(lines)
+                    run_min = min(filter(None, lines))
+                counts.max_items_line = max(counts.max_items_line, run_max)
+                counts.min_items_line = min(counts.min_items_line, run_min)
+            run += 1
+        return counts
+
+
+@DOCUMENT_CACHE.cached
+def get_line_statistics(
+    session: Session, rfc_num: int
+) -> LineStatisticsIndex | None:
+    statistics = session.get(RfcLineStatistics, rfc_num)
+    line_pages = get_line_page_map(session, rfc_num)
+    if statistics is None or line_pages is None:
+        return None
+    return LineStatisticsIndex(
+        {name: getattr(statistics, name) for name in LINE_COUNT_NAMES},
+        line_pages,
+    )
@@ -0,0 +1,189 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Any, Sequence
+
+from sqlalchemy import (
+    ColumnElement,
+    Row,
+    Select,
+    and_,
+    func,
+    or_,
+    select,
+    tuple_,
+)
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+class InvalidCursor(ValueError):
+    """A continuation token that wasn't produced by `paginate`."""
+
+
+class Direction(StrEnum):
+    AFTER = "after"
+    BEFORE = "before"
+
+
+@dataclass
+class SortKey:
+    # label of the column in the paginated query
+    column: str
+    descending: bool = False
+
+
+@dataclass
+class KeysetPage:
+    rows: list[Row]
+    next_cursor: str | None
+    prev_cursor: str | None
+    total_count: int
+    # whether total_count was counted or estimated by the planner
+    total_is_exact: bool
+
+
+def paginate(
+    session: Session,
+    query: Select,
+    sort_keys: Sequence[SortKey],
+    page_size: int,
+    cursor: str | None = None,
+    exact_count: bool = False,
+    total_count: int | None = None,
+    total_column: str | None = None,
+) -> KeysetPage:
+    """
+    Fetch one page of `query` after or before the row a cursor points at.
+
+    The rows are ordered by `sort_keys`, which must identify a row uniquely.
+    A page seeks past the previous one with a WHERE on the sort keys instead
+    of an OFFSET, so late pages cost the same as the first. The total is the
+    planner's estimate unless `exact_count`, which counts the whole query,
+    a `total_count` the caller already knows, or a `total_column` the query
+    selects next to every row.
+    """
+    rows_query = query.subquery()
+    columns = [rows_query.c[key.column] for key in sort_keys]
+
+    direction, after = (
+        decode_cursor(cursor) if cursor else (Direction.AFTER, None)
+    )
+    backwards = direction == Direction.BEFORE
+    descending = [key.descending != backwards for key in sort_keys]
+
+    page_query = select(rows_query)
+    if after is not None:
+        page_query = page_query.where(_seek(columns, descending, after))
+    page_query = page_query.order_by(
+        *[
+            column.desc() if desc else column.asc()
+            for column, desc in zip(columns, descending)
+        ]
+    ).limit(page_size + 1)
+
+    rows = session.execute(page_query).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    def cursor_at(row: Row, to: Direction) -> str:
+        return encode_cursor(
+            to, [getattr(row, key.column) for key in sort_keys]
+        )
+
+    next_cursor = prev_cursor = None
+    if rows:
+        # moving one way always leaves a page behind in the other way
+        if has_more or backwards:
+            next_cursor = cursor_at(rows[-1], Direction.AFTER)
+        if (has_more and backwards) or (after is not None and not backwards):
+            prev_cursor = cursor_at(rows[0], Direction.BEFORE)
+
+    if total_count is None and total_column is not None:
+        if rows:
+            total_count = getattr(rows[0], total_column)
+        elif after is None:
+            total_count = 0  # the first page is empty, so is the query
+    total_is_exact = exact_count or total_count is not None
+    if total_count is None:
+        if exact_count:
+            total_count = session.execute(
+                select(func.count()).select_from(rows_query)
+            ).scalar_one()
+        else:
+            total_count = estimate_count(session, query)
+
+    return KeysetPage(
+        rows=rows,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        total_count=total_count,
+        total_is_exact=total_is_exact,
+    )
+
+
+def encode_cursor(direction: Direction, values: list[Any]) -> str:
+    payload = json.dumps([direction.value, values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[Direction, list[Any]]:
+    try:
+        direction, values = json.loads(base64.urlsafe_b64decode(cursor))
+        return Direction(direction), values
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise InvalidCursor(f"Invalid cursor {cursor!r}") from e
+
+
+def estimate_count(session: Session, query: Select) -> int:
+    """Number of rows the planner expects `query` to return."""
+    plan = session.execute(Explain(query)).scalar_one()
+    if isinstance(plan, str):  # drivers that don't decode json
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, without running it."""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def _seek(
+    columns: list[ColumnElement], descending: list[bool], values: list[Any]
+) -> ColumnElement[bool]:
+    if len(set(descending)) == 1:
+        # a row comparison, which an index on the keys can serve
+        keys, bound = tuple_(*columns), tuple_(*values)
+        return keys < bound if descending[0] else keys > bound
+
+    # mixed directions: (a > x) or (a = x and b < y) or ...
+    return or_(
+        *[
+            and_(
+                *[
+                    column == value
+                    for column, value in zip(columns, values[:i])
+                ],
+                (
+                    columns[i] < values[i]
+                    if descending[i]
+                    else columns[i] > values[i]
+                ),
+            )
+            for i in range(len(columns))
+        ]
+    )
@@ -1,45 +1,110 @@
-from itertools import repeat
-from typing import Dict
-
-from sqlalchemy import and_
-from sqlalchemy.orm import Session, selectinload
-
-from bober.src.db_models import RfcLine, RfcSection, Token, TokenPosition
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from bober.src.db_models import (
+    RfcLine,
+    RfcPage,
+    RfcSection,
+    Token,
+    TokenPosition,
+)
+from bober.src.rfc_ingest.page_text import decompress_lines
+from bober.src.search.cache import QueryCache
 from bober.src.search.positions import AbsPosition
 
 
 def load_rfc_content(session: Session, rfc_num: int) -> str | None:
-    sections = (
-        session.query(RfcSection)
-        .options(selectinload(RfcSection.lines))
-        .filter(RfcSection.rfc_num == rfc_num)
-        .order_by(RfcSection.index)
-        .all()
-    )
-    if not sections:
+    document = _load_document(session, rfc_num)
+    if document is None:
         return None
+    return "\n".join(document.lines)
+
+
+def load_rfc_lines(
+    session: Session, rfc_num: int, start_line: int, end_line: int
+) -> list[str]:
+    """Lines `start_line` to `end_line` (inclusive, from 1) of an RFC."""
+    runs = session.execute(
+        select(RfcPage.first_line, RfcPage.content)
+        .where(
+            RfcPage.rfc_num == rfc_num,
+            RfcPage.first_line <= end_line,
+            RfcPage.first_line + RfcPage.line_count > start_line,
+        )
+        .order_by(RfcPage.first_line)
+    ).all()
+    if not runs:
+        return []
+
+    first_line = runs[0].first_line
+    lines = [line for run in runs for line in decompress_lines(run.content)]
+    return lines[start_line - first_line : end_line - first_line + 1]
+
+
+def load_rfc_page(session: Session, rfc_num: int, page: int) -> list[str]:
+    """The lines of one page of an RFC."""
+    runs = session.scalars(
+        select(RfcPage.content)
+        .where(RfcPage.rfc_num == rfc_num, RfcPage.page == page)
+        .order_by(RfcPage.first_line)
+    )
+    return [line for content in runs for line in decompress_lines(content)]
+
+
+class LinePageMap:
+    """
+    The page of every line of a document, from the first line of each run
+    of lines on a page. Lines before the first run are on its page.
+    """
+
+    def __init__(self, first_lines: Iterable[int], pages: Iterable[int]):
+        self.first_lines = array("I", first_lines)
+        self.pages = array("H", pages)
+
+    def __getitem__(self, line: int) -> int:
+        run = bisect_right(self.first_lines, line) - 1
+        return self.pages[max(run, 0)]
 
-    curr_page = 1
-    curr_line = 1  # counting lines in page starts from 1
-    raw_lines = []
 
-    section: RfcSection
-    for section in sections:
-        if curr_page != section.page:
-            curr_page = section.page
-            curr_line = 1  # counting lines in page starts from 1
+@dataclass(frozen=True)
+class StoredDocument:
+    lines: tuple[str, ...]
+    line_pages: LinePageMap
 
-        empty_lines_count = section.row_start - curr_line
-        raw_lines.extend(repeat("", empty_lines_count))
-        curr_line = section.row_start
 
-        line: RfcLine
-        for line in section.lines:
-            raw_line = " " * line.indentation + line.line
-            raw_lines.append(raw_line)
-            curr_line += 1
+def get_line_page_map(session: Session, rfc_num: int) -> LinePageMap | None:
+    document = _load_document(session, rfc_num)
+    if document is None:
+        return None
+    return document.line_pages
+
 
-    return "\n".join(raw_lines)
+# decompressed documents, a few are enough for the open viewer windows
+DOCUMENT_CACHE = QueryCache(max_entries=32, ttl=600.0)
+
+
+@DOCUMENT_CACHE.cached
+def _load_document(session: Session, rfc_num: int) -> StoredDocument | None:
+    runs = session.execute(
+        select(RfcPage.first_line, RfcPage.page, RfcPage.content)
+        .where(RfcPage.rfc_num == rfc_num)
+        .order_by(RfcPage.first_line)
+    ).all()
+    if not runs:
+        return None
+    return StoredDocument(
+        lines=tuple(
+            line for run in runs for line in decompress_lines(run.content)
+        ),
+        line_pages=LinePageMap(
+            [run.first_line for run in runs], [run.page for run in runs]
+        ),
+    )
 
 
 def get_absolute_positions(
@@ -67,30 +132,3 @@ def get_absolute_positions(
         )
         abs_pos.append(abs_position)
     return abs_pos
-
-
-def get_pages_for_line_numbers(
-    session: Session, rfc_num: int, start_line: int, end_line: int
-) -> Dict[int, int]:
-    result = {}
-
-    # Query the RfcLine and RfcSection tables
-    lines = (
-        session.query(RfcLine.abs_line_number, RfcSection.page)
-        .join(RfcSection, RfcLine.section_id == RfcSection.id)
-        .filter(
-            and_(
-                RfcSection.rfc_num == rfc_num,
-                RfcLine.abs_line_number >= start_line,
-                RfcLine.abs_line_number <= end_line,
-            )
-        )
-        .order_by(RfcLine.abs_line_number)
-        .all()
-    )
-
-    # Process the results
-    for line_number, page in lines:
-        result[line_number] = page
-
-    return result
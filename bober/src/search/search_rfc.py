@@ -1,18 +1,28 @@
 from datetime import datetime
+from enum import StrEnum
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 from sqlalchemy import Integer, and_, case, desc, distinct, func, or_, select
 from sqlalchemy.orm import Session, selectinload
 
 from bober.src.db_models import Author, Rfc
+from bober.src.search.bm25 import DEFAULT_B, DEFAULT_K1, build_bm25_query
+from bober.src.search.cache import QUERY_CACHE
 from bober.src.search.tfidf import build_tfid_query
 
 
+class Ranking(StrEnum):
+    TFIDF = "tf-idf"
+    BM25 = "bm25"
+
+
 class RFCMeta(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     num: int
     title: str
     published_at: datetime
-    authors: list[str]
+    authors: tuple[str, ...]
     rank: float | None
 
 
@@ -22,11 +32,18 @@ class SearchRFCQuery(BaseModel):
     date_range: tuple[datetime, datetime] | None = None
     title: str | None = None
     tokens: list[str] | None = None
+    ranking: Ranking = Ranking.TFIDF
+    # BM25 term frequency saturation and length normalization
+    k1: float = Field(DEFAULT_K1, ge=0)
+    b: float = Field(DEFAULT_B, ge=0, le=1)
+    # only the top `limit` results, ranked or newest
+    limit: int | None = Field(None, gt=0)
 
 
+@QUERY_CACHE.cached
 def search_rfcs(
     session: Session, search_query: SearchRFCQuery
-) -> list[RFCMeta]:
+) -> tuple[RFCMeta, ...]:
     query = session.query(Rfc).options(selectinload(Rfc.authors))
 
     if search_query.num:
@@ -74,31 +91,35 @@ def search_rfcs(
     if search_query.title:
         query = query.filter(Rfc.title.ilike(f"%{search_query.title.lower()}%"))
 
-    # If tokens are provided, calculate TF-IDF and rank results
+    # If tokens are provided, score them and rank results
     if search_query.tokens:
-        tfidf_summary = build_tfid_query(
-            session, search_query.tokens
-        ).subquery()
-        query = query.join(
-            tfidf_summary, Rfc.num == tfidf_summary.c.rfc_num
-        ).order_by(desc(tfidf_summary.c.total_tfidf_score))
-        query = query.add_columns(
-            tfidf_summary.c.total_tfidf_score.label("rank")
+        if search_query.ranking == Ranking.BM25:
+            scores = build_bm25_query(
+                session, search_query.tokens, search_query.k1, search_query.b
+            )
+        else:
+            scores = build_tfid_query(session, search_query.tokens)
+        scores = scores.subquery()
+        rfc_num, score = scores.c
+        query = query.join(scores, Rfc.num == rfc_num).order_by(
+            desc(score), Rfc.num
         )
+        query = query.add_columns(score.label("rank"))
     else:
         query = query.add_columns(func.cast(None, type_=Integer).label('rank'))
         query = query.order_by(desc(Rfc.published_at))
 
-    output = []
-    for rfc, rank in query.all():
-        rfc_meta = RFCMeta(
+    if search_query.limit:
+        # ORDER BY ... LIMIT lets postgres keep the top k, not sort everything
+        query = query.limit(search_query.limit)
+
+    return tuple(
+        RFCMeta(
             num=rfc.num,
             title=rfc.title,
             published_at=rfc.published_at,
-            authors=[author.author_name for author in rfc.authors],
+            authors=tuple(author.author_name for author in rfc.authors),
             rank=rank,
         )
-
-        output.append(rfc_meta)
-
-    return output
+        for rfc, rank in query.all()
+    )
@@ -1,61 +1,45 @@
-from sqlalchemy import Float, func
+from sqlalchemy import Float, func, select
 from sqlalchemy.orm import Query, Session
 
 from bober.src.db_models import (
-    Rfc,
+    CORPUS_STATISTICS_ID,
+    CorpusStatistics,
     RfcTokenCount,
+    StemStatistics,
     Token,
 )
-from bober.src.parsing.parsed_types import STEMMER
+from bober.src.parsing.stemmer import STEMMER
 
 
 def build_tfid_query(session: Session, tokens: list[str]) -> Query:
-    stems = [STEMMER.stem(token.lower()) for token in tokens]
+    """
+    Sum of tf * log(N / df) per rfc over the tokens with the query's stems.
 
-    term_frequency = (
-        session.query(
-            Token.stem,
-            RfcTokenCount.rfc_num,
-            RfcTokenCount.total_positions.label('tf'),
-        )
-        .join(Token.rfc_counts)
-        .filter(Token.stem.in_(stems))
-        .subquery()
-    )
+    df and N are read from the statistics the ingest maintains, so only the
+    counts of the query stems are touched, however large the corpus is.
+    """
+    stems = [STEMMER.stem(token.lower()) for token in tokens]
 
-    document_frequency = (
-        session.query(
-            Token.stem,
-            func.count(func.distinct(RfcTokenCount.rfc_num)).label('df'),
-        )
-        .join(Token.rfc_counts)
-        .filter(Token.stem.in_(stems))
-        .group_by(Token.stem)
-        .subquery()
+    total_documents = (
+        select(CorpusStatistics.total_documents)
+        .where(CorpusStatistics.id == CORPUS_STATISTICS_ID)
+        .scalar_subquery()
     )
 
-    total_documents = session.query(func.count(Rfc.num)).scalar_subquery()
-
     tfidf = (
         session.query(
-            Rfc.num.label("rfc_num"),
-            term_frequency.c.stem,
-            term_frequency.c.tf,
-            document_frequency.c.df,
-            total_documents.label('total_docs'),
+            RfcTokenCount.rfc_num,
             (
-                term_frequency.c.tf
+                RfcTokenCount.total_positions
                 * func.log(
                     total_documents.cast(Float)
-                    / document_frequency.c.df.cast(Float)
+                    / StemStatistics.document_frequency.cast(Float)
                 )
             ).label('tfidf_score'),
         )
-        .join(Rfc, Rfc.num == term_frequency.c.rfc_num)
-        .join(
-            document_frequency,
-            term_frequency.c.stem == document_frequency.c.stem,
-        )
+        .join(Token, Token.id == RfcTokenCount.token_id)
+        .join(StemStatistics, StemStatistics.stem == Token.stem)
+        .filter(Token.stem.in_(stems))
         .subquery()
     )
 
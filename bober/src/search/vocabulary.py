@@ -0,0 +1,168 @@
+from collections import defaultdict
+from threading import Lock
+from typing import Iterable
+
+from sqlalchemy import (
+    ColumnElement,
+    String,
+    bindparam,
+    func,
+    or_,
+    select,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from bober.src.db_models import Token
+from bober.src.rfc_ingest.corpus_version import CORPUS_VERSION
+
+# created by the migrations when the pg_trgm extension is available
+TOKEN_TRIGRAM_INDEX = "ix_token_token_trgm"
+NGRAM_SIZE = 3
+
+
+class NgramIndex:
+    """
+    Substring lookup over a set of words.
+
+    Every word is posted under each of its n-grams. A substring of at least n
+    characters can only occur in the words posted under all of its n-grams,
+    so only those are checked. Shorter substrings scan the words.
+    """
+
+    def __init__(self, words: Iterable[str] = (), n: int = NGRAM_SIZE):
+        self.n = n
+        self._words: set[str] = set()
+        self._grams: dict[str, set[str]] = defaultdict(set)
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def add(self, word: str) -> None:
+        if word in self._words:
+            return
+        self._words.add(word)
+        for start in range(len(word) - self.n + 1):
+            self._grams[word[start : start + self.n]].add(word)
+
+    def containing(self, substring: str) -> set[str]:
+        if len(substring) < self.n:
+            return {word for word in self._words if substring in word}
+
+        grams = {
+            substring[start : start + self.n]
+            for start in range(len(substring) - self.n + 1)
+        }
+        postings = sorted(
+            (self._grams.get(gram, set()) for gram in grams), key=len
+        )
+        candidates = postings[0].intersection(*postings[1:])
+        if len(substring) == self.n:
+            return candidates
+        return {word for word in candidates if substring in word}
+
+
+class TokenVocabulary:
+    """
+    In-process substring matching over the tokens and stems of the corpus.
+
+    `ilike('%x%')` on the token table is a sequential scan unless the DB has
+    trigram indexes. Without them, the vocabulary is loaded into an
+    `NgramIndex` the first time it's needed and kept until the stored corpus
+    version moves, which it does for ingests of any process. Whether the
+    trigram indexes exist is checked again then. Substrings shorter than an
+    n-gram match most of the vocabulary and no index helps them, so they
+    stay an `ilike`.
+    """
+
+    def __init__(self):
+        self._index: NgramIndex | None = None
+        self._token_stems: dict[str, str] = {}
+        self._stems: set[str] = set()
+        self._version: int | None = None
+        self._trigram_indexed: bool | None = None
+        self._lock = Lock()
+
+    def partial_token_filter(
+        self,
+        session: Session,
+        partial_token: str,
+        stem_column: ColumnElement[str] = Token.stem,
+    ) -> ColumnElement[bool]:
+        """Tokens whose stem contains `partial_token` or is the stem of a
+        token containing it. `stem_column` holds the stem of the filtered
+        rows, for tables that copy it from the token table."""
+        self._check_version(session)
+        if len(partial_token) < NGRAM_SIZE or self._uses_trigram_index(session):
+            pattern = f"%{partial_token}%"
+            return or_(
+                stem_column.in_(
+                    select(Token.stem).filter(Token.token.ilike(pattern))
+                ),
+                stem_column.ilike(pattern),
+            )
+
+        stems = self.matching_stems(session, partial_token)
+        # a semi-join over the unnested array, which plans better than
+        # `= ANY` once there are thousands of stems
+        return stem_column.in_(
+            select(
+                func.unnest(
+                    bindparam(
+                        "partial_stems", sorted(stems), type_=ARRAY(String)
+                    )
+                )
+            )
+        )
+
+    def matching_stems(self, session: Session, partial_token: str) -> set[str]:
+        self._check_version(session)
+        index = self._load(session)
+        stems = set()
+        for word in index.containing(partial_token.lower()):
+            if word in self._token_stems:
+                stems.add(self._token_stems[word])
+            if word in self._stems:
+                stems.add(word)
+        return stems
+
+    def clear(self) -> None:
+        with self._lock:
+            self._index = None
+            self._token_stems = {}
+            self._stems = set()
+            self._version = None
+            self._trigram_indexed = None
+
+    def _check_version(self, session: Session) -> None:
+        # the token table only changes on ingests
+        version = CORPUS_VERSION.current(session, documents=True)
+        with self._lock:
+            if self._version != version:
+                self._index = None
+                self._trigram_indexed = None
+                self._version = version
+
+    def _uses_trigram_index(self, session: Session) -> bool:
+        if self._trigram_indexed is None:
+            self._trigram_indexed = session.scalar(
+                text("SELECT to_regclass(:index) IS NOT NULL"),
+                {"index": TOKEN_TRIGRAM_INDEX},
+            )
+        return self._trigram_indexed
+
+    def _load(self, session: Session) -> NgramIndex:
+        with self._lock:
+            if self._index is None:
+                self._token_stems = dict(
+                    session.execute(select(Token.token, Token.stem)).all()
+                )
+                self._stems = set(self._token_stems.values())
+                self._index = NgramIndex(self._token_stems.keys() | self._stems)
+            return self._index
+
+
+VOCABULARY = TokenVocabulary()
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from enum import StrEnum
 
-from sqlalchemy import desc, func, or_, select
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from bober.src.db_models import (
@@ -12,10 +12,14 @@ from bober.src.db_models import (
     Token,
     TokenGroup,
     TokenPosition,
+    TokenStatistics,
     TokenToGroup,
 )
 from bober.src.fe.utils import ellipsis_around
+from bober.src.search.cache import QUERY_CACHE
+from bober.src.search.pagination import SortKey, paginate
 from bober.src.search.positions import AbsPosition, RelativePosition
+from bober.src.search.vocabulary import VOCABULARY
 
 
 @dataclass
@@ -65,82 +69,93 @@ class QueryFilteredWordsParams:
     partial_token: str | None = None
     sort_by: SortBy = SortBy.ALPHABETICAL
     sort_order: SortOrder = SortOrder.DESC
-    page: int = 1
+    # continuation token of a previous page, None for the first page
+    cursor: str | None = None
     page_size: int = 100
+    exact_count: bool = False
 
+    def sort_keys(self) -> list[SortKey]:
+        descending = self.sort_order == SortOrder.DESC
+        # tokens are unique, so they break ties between equal counts
+        keys = [SortKey("token", descending)]
+        if self.sort_by == SortBy.OCCURRENCES:
+            keys.insert(0, SortKey("count", descending))
+        return keys
 
-@dataclass
+
+@dataclass(frozen=True)
 class QueryFilteredWordsResult:
-    words: list[tuple[str, str, int]]
+    words: tuple[tuple[str, str, int], ...]
     total_count: int
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+    total_is_exact: bool = True
 
 
+@QUERY_CACHE.cached
 def query_filtered_words(
     session: Session, params: QueryFilteredWordsParams
 ) -> QueryFilteredWordsResult:
-    query = (
-        select(
-            Token.token,
-            Token.stem,
-            func.sum(RfcTokenCount.total_positions).label('count'),
+    if params.rfc_title is None:
+        # counted over the whole corpus, maintained by the ingest, so a page
+        # is a scan of the index of the sort order
+        query = select(
+            TokenStatistics.token,
+            TokenStatistics.stem,
+            TokenStatistics.total_occurrences.label('count'),
         )
-        .select_from(Token)
-        .join(RfcTokenCount, Token.id == RfcTokenCount.token_id)
-        .join(Rfc, RfcTokenCount.rfc_num == Rfc.num)
-    )
-
-    if params.token_groups is not None:
-        query = query.filter(
-            Token.id.in_(
-                select(TokenToGroup.token_id)
-                .join(TokenGroup)
-                .filter(TokenGroup.group_name.in_(params.token_groups))
+        token_id = TokenStatistics.token_id
+        stem = TokenStatistics.stem
+    else:
+        query = (
+            select(
+                Token.token,
+                Token.stem,
+                func.sum(RfcTokenCount.total_positions).label('count'),
             )
+            .select_from(Token)
+            .join(RfcTokenCount, Token.id == RfcTokenCount.token_id)
+            .join(Rfc, RfcTokenCount.rfc_num == Rfc.num)
+            .filter(Rfc.title.ilike(f"%{params.rfc_title}%"))
+            .group_by(Token.token, Token.stem)
         )
+        token_id = Token.id
+        stem = Token.stem
 
-    if params.rfc_title is not None:
-        query = query.filter(Rfc.title.ilike(f"%{params.rfc_title}%"))
-
-    if params.partial_token is not None:
-        subquery = (
-            select(Token.stem)
-            .filter(Token.token.ilike(f'%{params.partial_token}%'))
+    if params.token_groups is not None:
+        # distinct, a word in several of the groups is still one row
+        group_tokens = (
+            select(TokenToGroup.token_id)
+            .join(TokenGroup)
+            .where(TokenGroup.group_name.in_(params.token_groups))
             .distinct()
+            .subquery()
         )
+        query = query.join(group_tokens, group_tokens.c.token_id == token_id)
+
+    if params.partial_token is not None:
         query = query.filter(
-            or_(
-                Token.stem.in_(subquery),
-                Token.stem.ilike(f'%{params.partial_token}%'),
+            VOCABULARY.partial_token_filter(
+                session, params.partial_token, stem_column=stem
             )
         )
 
-    # Add GROUP BY to the base query
-    query = query.group_by(Token.token, Token.stem)
-
-    # Calculate total count
-    total_count_query = select(func.count()).select_from(query.subquery())
-    total_count = session.execute(total_count_query).scalar_one()
-
-    # Apply ordering to the main query
-    order_by_clause = (
-        'count' if params.sort_by == SortBy.OCCURRENCES else Token.token
-    )
-
-    if params.sort_order == SortOrder.DESC:
-        order_by_clause = desc(order_by_clause)
-
-    # Calculate offset from page number and page size
-    offset = (params.page - 1) * params.page_size
-
-    query = (
-        query.order_by(order_by_clause).offset(offset).limit(params.page_size)
+    page = paginate(
+        session,
+        query,
+        params.sort_keys(),
+        params.page_size,
+        cursor=params.cursor,
+        exact_count=params.exact_count,
     )
-    results = session.execute(query).fetchall()
 
-    words = [(line[0], line[1], line[2]) for line in results]
+    words = tuple((line.token, line.stem, line.count) for line in page.rows)
     return QueryFilteredWordsResult(
         words=words,
-        total_count=total_count,
+        total_count=page.total_count,
+        next_cursor=page.next_cursor,
+        prev_cursor=page.prev_cursor,
+        total_is_exact=page.total_is_exact,
     )
 
 
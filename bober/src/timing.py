@@ -0,0 +1,80 @@
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+
+class StageTimer:
+    """
+    Accumulates wall time per named stage of the ingest pipeline.
+
+    Stages nest, and a stage's time excludes the stages opened inside it, so
+    the totals add up to the wall time spent inside stages. Open stages are
+    tracked per thread and asyncio task, so concurrent ingests nest their
+    own stages, and their totals add up to more than the wall time. The
+    timer is off until `enable`, and a disabled stage is a shared no-op
+    context manager.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.totals: dict[str, float] = defaultdict(float)
+        self.calls: Counter[str] = Counter()
+        # a tuple, so tasks copying the context don't share one stack
+        self._open: ContextVar[tuple[_Stage, ...]] = ContextVar(
+            "open_stages", default=()
+        )
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        self.totals.clear()
+        self.calls.clear()
+
+    def stage(self, name: str) -> "_Stage | _NoStage":
+        if not self.enabled:
+            return _NO_STAGE
+        return _Stage(self, name)
+
+
+class _Stage:
+    __slots__ = ("timer", "name", "start", "nested", "outer")
+
+    def __init__(self, timer: StageTimer, name: str):
+        self.timer = timer
+        self.name = name
+        self.start = 0.0
+        self.nested = 0.0
+        self.outer: tuple[_Stage, ...] = ()
+
+    def __enter__(self) -> "_Stage":
+        self.outer = self.timer._open.get()
+        self.timer._open.set((*self.outer, self))
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        elapsed = time.perf_counter() - self.start
+        self.timer._open.set(self.outer)
+        self.timer.totals[self.name] += elapsed - self.nested
+        self.timer.calls[self.name] += 1
+        if self.outer:
+            self.outer[-1].nested += elapsed
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NO_STAGE = _NoStage()
+
+STAGE_TIMER = StageTimer()
@@ -0,0 +1,115 @@
+import csv
+import json
+from pathlib import Path
+from typing import Iterable, Mapping
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from bober.src.db import commit
+from bober.src.db_models import Token, TokenGroup, TokenToGroup
+from bober.src.rfc_ingest.corpus_version import CORPUS_VERSION
+from bober.src.rfc_ingest.token_ids import TOKEN_IDS
+from bober.src.word_groups.word_groups import refresh_group_counts
+
+CSV_HEADER = ["group_name", "word"]
+
+
+@commit
+def import_groups(session: Session, groups: Mapping[str, Iterable[str]]) -> int:
+    """
+    Create the groups that don't exist yet and add the words to all of
+    them, in a few statements whatever the number of groups and words.
+    Returns the number of words added.
+    """
+    groups = {
+        group_name.lower(): sorted({word.lower() for word in words})
+        for group_name, words in groups.items()
+    }
+    if not groups:
+        return 0
+
+    session.execute(
+        insert(TokenGroup).on_conflict_do_nothing(
+            index_elements=[TokenGroup.group_name]
+        ),
+        [{"group_name": group_name} for group_name in sorted(groups)],
+    )
+    group_ids = dict(
+        session.execute(
+            select(TokenGroup.group_name, TokenGroup.id).where(
+                TokenGroup.group_name.in_(list(groups))
+            )
+        ).all()
+    )
+    token_ids = TOKEN_IDS.resolve(
+        session, {word for words in groups.values() for word in words}
+    )
+
+    rows = [
+        {"group_id": group_ids[group_name], "token_id": token_ids[word]}
+        for group_name, words in groups.items()
+        for word in words
+    ]
+    added = 0
+    if rows:
+        added = len(
+            session.execute(
+                insert(TokenToGroup)
+                .on_conflict_do_nothing()
+                .returning(TokenToGroup.token_id),
+                rows,
+            ).all()
+        )
+    refresh_group_counts(session, list(group_ids.values()))
+    CORPUS_VERSION.mark_changed(session)
+    return added
+
+
+def export_groups(session: Session) -> dict[str, list[str]]:
+    """Every group with its words, groups without words included."""
+    groups = {
+        group_name: []
+        for group_name in session.scalars(
+            select(TokenGroup.group_name).order_by(TokenGroup.group_name)
+        )
+    }
+    for group_name, word in session.execute(
+        select(TokenGroup.group_name, Token.token)
+        .join(TokenToGroup, TokenToGroup.group_id == TokenGroup.id)
+        .join(Token, Token.id == TokenToGroup.token_id)
+        .order_by(TokenGroup.group_name, Token.token)
+    ):
+        groups[group_name].append(word)
+    return groups
+
+
+def read_groups(path: Path) -> dict[str, list[str]]:
+    """
+    Groups from a JSON object of group names to word lists, or a CSV file
+    of `group_name,word` rows.
+    """
+    path = Path(path)
+    with open(path, newline="") as f:
+        if path.suffix.lower() != ".csv":
+            return json.load(f)
+
+        groups: dict[str, list[str]] = {}
+        for row in csv.DictReader(f):
+            groups.setdefault(row["group_name"], []).append(row["word"])
+        return groups
+
+
+def write_groups(path: Path, groups: Mapping[str, list[str]]) -> None:
+    """Write groups in the format `read_groups` reads for the suffix."""
+    path = Path(path)
+    with open(path, "w", newline="") as f:
+        if path.suffix.lower() != ".csv":
+            json.dump(groups, f, indent=2)
+            return
+
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        for group_name, words in groups.items():
+            writer.writerows([group_name, word] for word in words)
@@ -1,8 +1,62 @@
+from dataclasses import dataclass
+
+from sqlalchemy import delete, func, insert, select
 from sqlalchemy.orm import Session, selectinload
 
 from bober.src.db import commit
-from bober.src.db_models import Token, TokenGroup, TokenToGroup
-from bober.src.parsing.parsed_types import STEMMER
+from bober.src.db_models import (
+    GroupRfcCount,
+    Rfc,
+    RfcTokenCount,
+    Token,
+    TokenGroup,
+    TokenPosition,
+    TokenToGroup,
+)
+from bober.src.parsing.stemmer import STEMMER
+from bober.src.rfc_ingest.corpus_version import CORPUS_VERSION
+from bober.src.search.cache import QUERY_CACHE
+from bober.src.search.pagination import SortKey, paginate
+from bober.src.search.positions import AbsPosition, RelativePosition
+
+# the columns of the absolute coordinate index on token_position
+GROUP_OCCURRENCE_ORDER = [
+    SortKey("rfc_num"),
+    SortKey("abs_line"),
+    SortKey("abs_column"),
+]
+
+
+@dataclass(frozen=True)
+class GroupMeta:
+    id: int
+    group_name: str
+
+
+@dataclass(frozen=True)
+class GroupRfcOccurrences:
+    rfc_num: int
+    title: str
+    count: int
+    # number of the group's words found in the rfc
+    words: int
+
+
+@dataclass
+class GroupOccurrence:
+    word: str
+    rfc_num: int
+    abs_pos: AbsPosition
+    rel_pos: RelativePosition
+
+
+@dataclass
+class GroupOccurrencesPage:
+    occurrences: list[GroupOccurrence]
+    total_count: int
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+    total_is_exact: bool = True
 
 
 @commit
@@ -11,6 +65,7 @@ def create_word_group(
 ) -> TokenGroup:
     new_group = TokenGroup(group_name=group_name)
     session.add(new_group)
+    CORPUS_VERSION.mark_changed(session)
 
     if words:
         add_words_to_group(session, group_name, words)
@@ -26,6 +81,7 @@ def add_words_to_group(
     group = session.query(TokenGroup).filter_by(group_name=group_name).first()
     if not group:
         raise ValueError(f"Group '{group_name}' does not exist")
+    CORPUS_VERSION.mark_changed(session)
 
     existing_tokens = session.query(Token).filter(Token.token.in_(words)).all()
     existing_token_dict = {token.token: token for token in existing_tokens}
@@ -68,6 +124,8 @@ def add_words_to_group(
             )
 
     session.add_all(new_associations)
+    session.flush()
+    refresh_group_counts(session, [group.id])
 
 
 @commit
@@ -77,6 +135,7 @@ def remove_words_from_group(
     group = session.query(TokenGroup).filter_by(group_name=group_name).first()
     if not group:
         raise ValueError(f"Group '{group_name}' does not exist")
+    CORPUS_VERSION.mark_changed(session)
 
     # Get tokens for the words
     tokens = session.query(Token).filter(Token.token.in_(words)).all()
@@ -86,10 +145,16 @@ def remove_words_from_group(
     session.query(TokenToGroup).filter(
         TokenToGroup.group == group, TokenToGroup.token_id.in_(token_ids)
     ).delete(synchronize_session=False)
+    refresh_group_counts(session, [group.id])
 
 
-def list_groups(session):
-    return session.query(TokenGroup).all()
+@QUERY_CACHE.cached
+def list_groups(session) -> tuple[GroupMeta, ...]:
+    # plain values, so the cached result doesn't hold a session's instances
+    return tuple(
+        GroupMeta(id=group.id, group_name=group.group_name)
+        for group in session.query(TokenGroup).all()
+    )
 
 
 def list_words_in_group(session, group_name) -> list[str]:
@@ -103,3 +168,138 @@ def list_words_in_group(session, group_name) -> list[str]:
         return []
 
     return [t.token.token for t in group.tokens]
+
+
+@QUERY_CACHE.cached
+def group_rfc_occurrences(
+    session: Session, group_name: str
+) -> tuple[GroupRfcOccurrences, ...]:
+    """The RFCs with words of a group, most occurrences first."""
+    query = (
+        select(
+            Rfc.num,
+            Rfc.title,
+            GroupRfcCount.total_occurrences,
+            GroupRfcCount.token_count,
+        )
+        .join(GroupRfcCount.group)
+        .join(Rfc, Rfc.num == GroupRfcCount.rfc_num)
+        .where(TokenGroup.group_name == group_name)
+        .order_by(GroupRfcCount.total_occurrences.desc(), Rfc.num)
+    )
+    return tuple(
+        GroupRfcOccurrences(
+            rfc_num=row.num,
+            title=row.title,
+            count=row.total_occurrences,
+            words=row.token_count,
+        )
+        for row in session.execute(query)
+    )
+
+
+def group_occurrences(
+    session: Session,
+    group_name: str,
+    rfc_num: int | None = None,
+    cursor: str | None = None,
+    page_size: int = 100,
+) -> GroupOccurrencesPage:
+    """
+    One page of the positions of every word of a group, optionally in one
+    RFC, ordered by RFC and absolute position. The page and its total are
+    one statement. The total comes from the group's rollup, so it is exact
+    without counting the positions.
+    """
+    total = (
+        select(func.coalesce(func.sum(GroupRfcCount.total_occurrences), 0))
+        .join(GroupRfcCount.group)
+        .where(TokenGroup.group_name == group_name)
+    )
+    query = (
+        select(
+            Token.token,
+            TokenPosition.rfc_num,
+            TokenPosition.abs_line,
+            TokenPosition.abs_column,
+            TokenPosition.abs_end_column,
+            TokenPosition.section_index,
+            TokenPosition.line_in_section,
+            TokenPosition.index.label("word_index"),
+        )
+        .select_from(TokenGroup)
+        .join(TokenToGroup, TokenToGroup.group_id == TokenGroup.id)
+        .join(TokenPosition, TokenPosition.token_id == TokenToGroup.token_id)
+        .join(Token, Token.id == TokenPosition.token_id)
+        .where(TokenGroup.group_name == group_name)
+    )
+    if rfc_num is not None:
+        query = query.where(TokenPosition.rfc_num == rfc_num)
+        total = total.where(GroupRfcCount.rfc_num == rfc_num)
+    # computed once, not for every position
+    query = query.add_columns(
+        total.correlate(None).scalar_subquery().label("total_count")
+    )
+
+    page = paginate(
+        session,
+        query,
+        GROUP_OCCURRENCE_ORDER,
+        page_size,
+        cursor=cursor,
+        total_column="total_count",
+    )
+    return GroupOccurrencesPage(
+        occurrences=[
+            GroupOccurrence(
+                word=row.token,
+                rfc_num=row.rfc_num,
+                abs_pos=AbsPosition(
+                    line=row.abs_line,
+                    column=row.abs_column,
+                    length=row.abs_end_column - row.abs_column,
+                ),
+                rel_pos=RelativePosition(
+                    section=row.section_index,
+                    line=row.line_in_section,
+                    word=row.word_index,
+                ),
+            )
+            for row in page.rows
+        ],
+        total_count=page.total_count,
+        next_cursor=page.next_cursor,
+        prev_cursor=page.prev_cursor,
+        total_is_exact=page.total_is_exact,
+    )
+
+
+def refresh_group_counts(session: Session, group_ids: list[int]) -> None:
+    """Recount the occurrences of groups per RFC, after their words changed."""
+    session.execute(
+        delete(GroupRfcCount).where(GroupRfcCount.group_id.in_(group_ids))
+    )
+    session.execute(_insert_group_counts(TokenToGroup.group_id.in_(group_ids)))
+
+
+def refresh_rfc_group_counts(session: Session, rfc_num: int) -> None:
+    """Recount the occurrences of every group in an RFC, after its ingest."""
+    session.execute(
+        delete(GroupRfcCount).where(GroupRfcCount.rfc_num == rfc_num)
+    )
+    session.execute(_insert_group_counts(RfcTokenCount.rfc_num == rfc_num))
+
+
+def _insert_group_counts(condition):
+    return insert(GroupRfcCount).from_select(
+        ["group_id", "rfc_num", "total_occurrences", "token_count"],
+        select(
+            TokenToGroup.group_id,
+            RfcTokenCount.rfc_num,
+            func.sum(RfcTokenCount.total_positions),
+            func.count(RfcTokenCount.token_id),
+        )
+        .join(RfcTokenCount, RfcTokenCount.token_id == TokenToGroup.token_id)
+        .where(condition)
+        .group_by(TokenToGroup.group_id, RfcTokenCount.rfc_num),
+    )
@@ -1,4 +1,6 @@
+import datetime
 import os
+from pathlib import Path
 
 import psycopg2
 import pytest
@@ -7,6 +9,24 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import scoped_session, sessionmaker
 
 from bober.src.db_models import Base
+from bober.src.phrases.phrase_index import PHRASE_INDEX
+from bober.src.rfc_ingest.corpus_version import CORPUS_VERSION
+from bober.src.rfc_ingest.load_from_file import load_single_file
+from bober.src.rfc_ingest.token_ids import TOKEN_IDS
+from bober.src.search.cache import QUERY_CACHE
+from bober.src.search.rfc_content import DOCUMENT_CACHE
+from bober.src.search.vocabulary import VOCABULARY
+
+EXAMPLES_DIR = Path(__file__).parent.parent / "resources" / "examples"
+
+
+def clear_caches():
+    TOKEN_IDS.clear()
+    PHRASE_INDEX.clear()
+    VOCABULARY.clear()
+    QUERY_CACHE.clear()
+    DOCUMENT_CACHE.clear()
+    CORPUS_VERSION.clear()
 
 
 @pytest.fixture(scope='session')
@@ -48,6 +68,25 @@ def create_test_database(base_db_url):
     conn.close()
 
 
+@pytest.fixture
+def empty_db_url(base_db_url, test_db_url):
+    """A database without tables, for code that creates the schema itself."""
+    conn = psycopg2.connect(base_db_url)
+    conn.autocommit = True
+    cur = conn.cursor()
+    cur.execute("DROP DATABASE IF EXISTS test_empty")
+    cur.execute("CREATE DATABASE test_empty")
+    # ids cached from the test database don't exist in this one
+    clear_caches()
+    try:
+        yield test_db_url.rsplit("/", 1)[0] + "/test_empty"
+    finally:
+        clear_caches()
+        cur.execute("DROP DATABASE IF EXISTS test_empty WITH (FORCE)")
+        cur.close()
+        conn.close()
+
+
 @pytest.fixture(scope='function')
 def db_session(test_db_url):
     engine = create_engine(test_db_url)
@@ -65,6 +104,9 @@ def db_session(test_db_url):
     transaction = connection.begin()
     session.bind = connection
 
+    # every test is rolled back, so ids cached by a previous test are gone
+    clear_caches()
+
     try:
         yield session
     finally:
@@ -73,3 +115,39 @@ def db_session(test_db_url):
         transaction.rollback()
         connection.close()
         Session.remove()
+
+
+@pytest.fixture
+def load_example(db_session):
+    """
+    Load an example RFC in the test's transaction: `load_example(2324)`.
+    Metadata not given is a placeholder, `path` replaces the example file.
+    """
+
+    def load(rfc_num: int, path: Path | None = None, **metadata) -> None:
+        load_single_file(
+            db_session,
+            path or EXAMPLES_DIR / f"{rfc_num}.txt",
+            {
+                "num": rfc_num,
+                "title": f"rfc {rfc_num}",
+                "publish_at": datetime.date.today(),
+                "authors": ["Eli"],
+            }
+            | metadata,
+        )
+
+    return load
+
+
+@pytest.fixture
+def rfc_nums() -> list[int]:
+    """The examples `loaded_rfcs` loads, overridden or parametrized."""
+    return [2324]
+
+
+@pytest.fixture
+def loaded_rfcs(load_example, rfc_nums) -> list[int]:
+    for rfc_num in rfc_nums:
+        load_example(rfc_num)
+    return rfc_nums
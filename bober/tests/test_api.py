@@ -0,0 +1,141 @@
+import datetime
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from bober.src.api.app import create_app, get_session
+from bober.src.api.schemas import MAX_PAGE_SIZE, MAX_RESULTS_LIMIT
+from bober.src.migrations import prepare_database
+from bober.src.phrases.phrases import search_phrase
+from bober.src.rfc_ingest.load_from_file import load_single_file
+from bober.src.search.index_search import AbsPositionQuery, abs_position_search
+from bober.src.search.rfc_content import load_rfc_content
+
+CURR_DIR = Path(__file__).parent
+DOC_TO_TEST = CURR_DIR.parent / "resources" / "examples" / "2324.txt"
+RFC_NUM = 2324
+TITLE = "Hyper Text Coffee Pot Control Protocol"
+
+
+@pytest.fixture
+def client(test_db_url, db_session, load_example):
+    with TestClient(create_app(test_db_url)) as client:
+        load_example(RFC_NUM, title=TITLE)
+        client.app.dependency_overrides[get_session] = lambda: db_session
+        yield client
+
+
+def test_deploy_on_an_empty_database(empty_db_url):
+    engine = create_engine(empty_db_url)
+    app = create_app(empty_db_url)
+    try:
+        # the migration step of a deploy, then the workers start
+        prepare_database(engine)
+        with TestClient(app) as client:
+            response = client.get(
+                "/phrases/search", params={"phrase": "coffee"}
+            )
+            assert response.json() == []
+
+            with Session(engine) as session:
+                load_single_file(
+                    session,
+                    DOC_TO_TEST,
+                    {
+                        "num": RFC_NUM,
+                        "title": TITLE,
+                        "publish_at": datetime.date.today(),
+                        "authors": ["Eli"],
+                    },
+                )
+
+        # a redeploy finds the schema in place and serves what's stored
+        prepare_database(engine)
+        with TestClient(app) as client:
+            response = client.post("/rfcs/search", json={"title": "coffee"})
+            assert [rfc["num"] for rfc in response.json()] == [RFC_NUM]
+    finally:
+        engine.dispose()
+
+
+def test_search_rfcs(client):
+    response = client.post("/rfcs/search", json={"title": "coffee"})
+
+    assert response.status_code == 200
+    assert [rfc["num"] for rfc in response.json()] == [RFC_NUM]
+
+
+def test_search_rfcs_is_limited(client):
+    assert client.post("/rfcs/search", json={"limit": 1}).json()
+    response = client.post(
+        "/rfcs/search", json={"limit": MAX_RESULTS_LIMIT + 1}
+    )
+
+    assert response.status_code == 422
+
+
+def test_rfc_content(client, db_session):
+    assert client.get(f"/rfcs/{RFC_NUM}/content").text == (
+        load_rfc_content(db_session, RFC_NUM)
+    )
+    assert client.get("/rfcs/1/content").status_code == 404
+
+
+def test_word_occurrences(client):
+    rfcs = client.get("/words/coffee/rfcs").json()
+    assert len(rfcs) == 1
+    assert rfcs[0]["num"] == RFC_NUM
+
+    occurrences = client.get(f"/words/coffee/rfcs/{RFC_NUM}").json()
+    assert len(occurrences) == rfcs[0]["count"]
+
+
+def test_words_search(client):
+    response = client.post(
+        "/words/search",
+        json={"partial_token": "coff", "sort_by": "occurrences"},
+    )
+
+    assert response.status_code == 200
+    assert [word[0] for word in response.json()["words"]] == [
+        "coffee",
+        "coffeepot",
+    ]
+
+
+def test_phrase_search_matches_search_phrase(client, db_session):
+    response = client.get("/phrases/search", params={"phrase": "coffee pot"})
+
+    assert response.json() == [
+        asdict(occurrence)
+        for occurrence in search_phrase(db_session, "coffee pot")
+    ]
+
+
+def test_index_search_pages(client, db_session):
+    query = AbsPositionQuery(title="coffee", abs_line=10, page_size=5)
+    response = client.post("/index/absolute", json=asdict(query))
+
+    assert response.json() == asdict(abs_position_search(db_session, query))
+
+
+def test_invalid_cursor_is_a_bad_request(client):
+    response = client.post(
+        "/index/relative", json={"title": "coffee", "cursor": "garbage"}
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "path", ["/words/search", "/index/absolute", "/index/relative"]
+)
+def test_page_size_is_bounded(client, path):
+    response = client.post(path, json={"page_size": MAX_PAGE_SIZE + 1})
+
+    assert response.status_code == 422
+    assert client.post(path, json={"page_size": MAX_PAGE_SIZE}).is_success
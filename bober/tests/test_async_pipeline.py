@@ -0,0 +1,130 @@
+import asyncio
+import datetime
+import shutil
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, func, make_url, select
+from sqlalchemy.orm import Session
+
+from bober.src.db_models import (
+    Base,
+    Rfc,
+    RfcSection,
+    RfcTokenCount,
+    TokenPosition,
+)
+from bober.src.rfc_ingest.async_pipeline import ingest_files_async
+from bober.src.rfc_ingest.corpus_version import CORPUS_VERSION
+from bober.src.rfc_ingest.token_ids import TOKEN_IDS
+from bober.src.timing import StageTimer
+
+EXAMPLES_DIR = Path(__file__).parent.parent / "resources" / "examples"
+RFC_NUMS = [2324, 1149]
+
+
+@pytest.fixture
+def committed_engine(test_db_url):
+    # the pipeline commits through its own connections, so the tables are
+    # recreated instead of relying on a rolled back transaction
+    engine = create_engine(test_db_url)
+    Base.metadata.create_all(engine)
+    TOKEN_IDS.clear()
+    try:
+        yield engine
+    finally:
+        Base.metadata.drop_all(engine)
+        TOKEN_IDS.clear()
+        engine.dispose()
+
+
+def ingest(test_db_url, examples_dir=EXAMPLES_DIR):
+    files = [
+        (
+            examples_dir / f"{rfc_num}.txt",
+            {
+                "num": rfc_num,
+                "title": "hellp",
+                "publish_at": datetime.date.today(),
+                "authors": ["Eli"],
+            },
+        )
+        for rfc_num in RFC_NUMS
+    ]
+    async_url = make_url(test_db_url).set(drivername="postgresql+asyncpg")
+    return asyncio.run(
+        ingest_files_async(
+            async_url.render_as_string(hide_password=False),
+            files,
+            parse_workers=1,
+            writers=2,
+        )
+    )
+
+
+def test_ingest_files_async(committed_engine, test_db_url):
+    assert ingest(test_db_url) == len(RFC_NUMS)
+
+    with Session(committed_engine) as session:
+        assert session.scalars(select(Rfc.num).order_by(Rfc.num)).all() == (
+            sorted(RFC_NUMS)
+        )
+        positions = session.scalar(select(func.count(TokenPosition.id)))
+        counted = session.scalar(
+            select(func.sum(RfcTokenCount.total_positions))
+        )
+        assert positions and positions == counted
+        # every write committed a corpus change other processes can see
+        assert CORPUS_VERSION.stored(session) == len(RFC_NUMS)
+
+    # unchanged files are skipped before they are parsed
+    assert ingest(test_db_url) == 0
+
+
+def test_changed_files_keep_their_unchanged_sections(
+    committed_engine, test_db_url, tmp_path
+):
+    for rfc_num in RFC_NUMS:
+        shutil.copy(EXAMPLES_DIR / f"{rfc_num}.txt", tmp_path)
+    ingest(test_db_url, tmp_path)
+
+    def sections():
+        with Session(committed_engine) as session:
+            return set(
+                session.scalars(
+                    select(RfcSection.id).where(RfcSection.rfc_num == 2324)
+                )
+            )
+
+    before = sections()
+    path = tmp_path / "2324.txt"
+    path.write_text(
+        path.read_text().replace(
+            "Category: Informational", "Category: Not Informational"
+        )
+    )
+
+    assert ingest(test_db_url, tmp_path) == 1
+    assert len(before - sections()) == 1
+    assert len(sections() - before) == 1
+
+
+def test_stage_timer_nests_per_task():
+    timer = StageTimer()
+    timer.enable()
+
+    async def ingest_one(name):
+        with timer.stage(name):
+            await asyncio.sleep(0.05)
+            with timer.stage("inner"):
+                await asyncio.sleep(0.05)
+
+    async def ingest_both():
+        await asyncio.gather(ingest_one("a"), ingest_one("b"))
+
+    asyncio.run(ingest_both())
+
+    assert timer.calls == {"a": 1, "b": 1, "inner": 2}
+    # each outer stage excludes its own inner stage, not the other task's
+    assert 0.04 < timer.totals["a"] < 0.08
+    assert 0.04 < timer.totals["b"] < 0.08
@@ -0,0 +1,74 @@
+import pytest
+
+from bober.src.phrases.bulk import (
+    export_phrases,
+    import_phrases,
+    read_phrases,
+    write_phrases,
+)
+from bober.src.phrases.phrases import find_phrase_occurrences, save_new_phrase
+from bober.src.word_groups.bulk import (
+    export_groups,
+    import_groups,
+    read_groups,
+    write_groups,
+)
+from bober.src.word_groups.word_groups import (
+    create_word_group,
+    group_rfc_occurrences,
+    list_words_in_group,
+)
+
+
+@pytest.mark.parametrize("suffix", [".json", ".csv"])
+def test_groups_round_trip(db_session, loaded_rfcs, tmp_path, suffix):
+    create_word_group(db_session, "drinks", ["tea"])
+    groups = {
+        "Drinks": ["coffee", "Tea", "cocoa"],
+        "devices": ["pot", "never-seen"],
+    }
+
+    assert import_groups(db_session, groups) == 4
+    # already in the groups
+    assert import_groups(db_session, groups) == 0
+
+    exported = export_groups(db_session)
+    assert exported == {
+        "devices": ["never-seen", "pot"],
+        "drinks": ["cocoa", "coffee", "tea"],
+    }
+    assert sorted(list_words_in_group(db_session, "drinks")) == [
+        "cocoa",
+        "coffee",
+        "tea",
+    ]
+    assert [
+        rfc.rfc_num for rfc in group_rfc_occurrences(db_session, "devices")
+    ] == [2324]
+
+    path = tmp_path / f"groups{suffix}"
+    write_groups(path, exported)
+    assert read_groups(path) == exported
+
+
+@pytest.mark.parametrize("suffix", [".json", ".csv"])
+def test_phrases_round_trip(db_session, loaded_rfcs, tmp_path, suffix):
+    save_new_phrase(db_session, "pot", "tea pot")
+    phrases = {"pot": "coffee pot", "TCP Brewing": "Hyper Text Coffee Pot"}
+
+    assert import_phrases(db_session, phrases) == 2
+
+    exported = export_phrases(db_session)
+    # lowercased, as the GUI looks phrases up
+    assert exported == {
+        "pot": "coffee pot",
+        "tcp brewing": "hyper text coffee pot",
+    }
+    assert {o.phrase for o in find_phrase_occurrences(db_session, "pot")} == {
+        "coffee pot"
+    }
+    assert find_phrase_occurrences(db_session, "tcp brewing")
+
+    path = tmp_path / f"phrases{suffix}"
+    write_phrases(path, exported)
+    assert read_phrases(path) == exported
@@ -0,0 +1,45 @@
+from bober.src.parsing.statistical_analysis import (
+    StoredStatisticsManager,
+    StringStatisticsManager,
+)
+from bober.src.search.line_statistics import get_line_statistics
+from bober.src.search.rfc_content import get_line_page_map, load_rfc_content
+
+
+def stats(manager):
+    return (
+        manager.get_word_stats(),
+        manager.get_word_char_stats(),
+        manager.get_non_white_char_stats(),
+        manager.get_all_char_stats(),
+    )
+
+
+def test_stored_statistics_match_counting_the_text(db_session, loaded_rfcs):
+    lines = load_rfc_content(db_session, 2324).split("\n")
+    line_pages = get_line_page_map(db_session, 2324)
+    line_statistics = get_line_statistics(db_session, 2324)
+    assert line_statistics.line_count == len(lines)
+
+    whole = StoredStatisticsManager(line_statistics, line_pages, 1, len(lines))
+    assert stats(whole) == stats(
+        StringStatisticsManager("\n".join(lines), line_pages)
+    )
+
+    for first_line, last_line in [(1, 2), (3, 40), (55, 130), (60, 61)]:
+        # a selection from the middle of one line to the middle of another
+        head = lines[first_line - 1][5:]
+        tail = lines[last_line - 1][:10]
+        middle = lines[first_line : last_line - 1]
+        selection = "\n".join([head, *middle, tail])
+        stored = StoredStatisticsManager(
+            line_statistics,
+            line_pages,
+            first_line,
+            last_line,
+            partial_lines={first_line: head, last_line: tail},
+        )
+
+        assert stats(stored) == stats(
+            StringStatisticsManager(selection, line_pages, first_line)
+        )
@@ -0,0 +1,49 @@
+import datetime
+import json
+import shutil
+
+from sqlalchemy import select
+
+from bober.src.db_models import Rfc, TokenStatistics
+from bober.src.parsing.stemmer import STEMMER
+from bober.src.scripts import loader
+
+RFC_NUMS = [1149, 2324]
+
+
+def test_load_examples(db_session, tmp_path, monkeypatch):
+    misses = STEMMER.cache_info().misses
+    with open(loader.EXAMPLES_DIR / "examples.json") as f:
+        examples = [
+            example for example in json.load(f) if example["num"] in RFC_NUMS
+        ]
+    with open(tmp_path / "examples.json", "w") as f:
+        json.dump(examples, f)
+    for rfc_num in RFC_NUMS:
+        shutil.copy(loader.EXAMPLES_DIR / f"{rfc_num}.txt", tmp_path)
+    monkeypatch.setattr(loader, "EXAMPLES_DIR", tmp_path)
+
+    loader.load_examples(db_session, workers=1)
+
+    # the parse workers stemmed the words, not this process
+    assert STEMMER.cache_info().misses == misses
+
+    # the dates of examples.json are strings, stored as dates
+    published = {
+        example["num"]: datetime.datetime.strptime(
+            example["publish_at"], "%Y/%m/%d"
+        ).date()
+        for example in examples
+    }
+    assert (
+        dict(db_session.execute(select(Rfc.num, Rfc.published_at)).all())
+        == published
+    )
+    assert (
+        db_session.scalar(
+            select(TokenStatistics.first_year).where(
+                TokenStatistics.token == "coffee"
+            )
+        )
+        == published[2324].year
+    )
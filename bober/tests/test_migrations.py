@@ -0,0 +1,21 @@
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from bober.src.db_models import CorpusStatistics
+from bober.src.migrations import prepare_database
+
+
+def test_prepare_database_twice(empty_db_url):
+    engine = create_engine(empty_db_url)
+    try:
+        # the second run finds the tables and the statistics row in place
+        prepare_database(engine)
+        prepare_database(engine)
+
+        with Session(engine) as session:
+            statistics = session.scalars(select(CorpusStatistics)).all()
+        assert [
+            (row.total_documents, row.total_tokens) for row in statistics
+        ] == [(0, 0)]
+    finally:
+        engine.dispose()
@@ -0,0 +1,101 @@
+import pytest
+
+from bober.src.search.index_search import (
+    AbsPositionQuery,
+    RelativePositionQuery,
+    abs_position_search,
+    relative_position_search,
+)
+from bober.src.search.pagination import InvalidCursor, decode_cursor
+from bober.src.search.words_index import (
+    QueryFilteredWordsParams,
+    SortBy,
+    SortOrder,
+    query_filtered_words,
+)
+
+
+@pytest.fixture
+def rfc_nums():
+    return [1149, 2324]
+
+
+def walk(search, session, criteria):
+    """Pages forward to the end, then back to the start."""
+    forward = [search(session, criteria)]
+    while forward[-1].next_cursor:
+        criteria.cursor = forward[-1].next_cursor
+        forward.append(search(session, criteria))
+
+    backward = [forward[-1]]
+    while backward[-1].prev_cursor:
+        criteria.cursor = backward[-1].prev_cursor
+        backward.append(search(session, criteria))
+    return forward, backward[::-1]
+
+
+@pytest.mark.parametrize(
+    "search, criteria",
+    [
+        (abs_position_search, AbsPositionQuery(column=10)),
+        (relative_position_search, RelativePositionQuery(word_in_line=3)),
+    ],
+)
+def test_index_search_pages(db_session, loaded_rfcs, search, criteria):
+    criteria.page_size = 1_000_000
+    everything = search(db_session, criteria).results
+
+    criteria.page_size = 37
+    criteria.exact_count = True
+    forward, backward = walk(search, db_session, criteria)
+
+    assert len(forward) > 2
+    assert [r for page in forward for r in page.results] == everything
+    assert [page.results for page in backward] == [
+        page.results for page in forward
+    ]
+    assert all(page.total_count == len(everything) for page in forward)
+
+
+@pytest.mark.parametrize("sort_by", list(SortBy))
+@pytest.mark.parametrize("sort_order", list(SortOrder))
+def test_word_index_pages(db_session, loaded_rfcs, sort_by, sort_order):
+    params = QueryFilteredWordsParams(
+        sort_by=sort_by, sort_order=sort_order, page_size=1_000_000
+    )
+    everything = query_filtered_words(db_session, params).words
+
+    params.page_size = 97
+    forward, backward = walk(query_filtered_words, db_session, params)
+
+    words = tuple(word for page in forward for word in page.words)
+    assert words == everything
+    assert len({token for token, _, _ in words}) == len(words)
+    assert [page.words for page in backward] == [page.words for page in forward]
+    if sort_by == SortBy.OCCURRENCES:
+        counts = [count for *_, count in words]
+        assert counts == sorted(counts, reverse=sort_order == SortOrder.DESC)
+
+
+@pytest.mark.parametrize("sort_by", list(SortBy))
+def test_word_index_statistics_match_aggregation(
+    db_session, loaded_rfcs, sort_by
+):
+    params = QueryFilteredWordsParams(sort_by=sort_by, page_size=1_000_000)
+    from_statistics = query_filtered_words(db_session, params).words
+
+    # a title filter aggregates rfc_token_count, every title matches
+    params.rfc_title = "rfc"
+    assert query_filtered_words(db_session, params).words == from_statistics
+
+
+def test_estimated_total(db_session, loaded_rfcs):
+    page = abs_position_search(db_session, AbsPositionQuery(column=10))
+
+    assert not page.total_is_exact
+    assert page.total_count > 0
+
+
+def test_invalid_cursor(db_session):
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not a cursor")
@@ -1,15 +1,24 @@
 from pathlib import Path
 
-from bober.src.parsing.parse_rfc import parse_rfc
+from pydantic import TypeAdapter
+
+from bober.src.parsing.parse_rfc import parse_rfc, stream_rfc_file
 from bober.src.parsing.parsed_types import ParsedDocument
 
 CURR_DIR = Path(__file__).parent
 DOC_TO_TEST = CURR_DIR.parent.parent / "resources" / "examples" / "2324.txt"
 SNAPSHOT = CURR_DIR / "snapshot.json"
+DOCUMENT_ADAPTER = TypeAdapter(ParsedDocument)
 
 
 def test_parse_rfc() -> None:
     doc_text = DOC_TO_TEST.read_text()
     result = parse_rfc(doc_text)
-    expected = ParsedDocument.model_validate_json(SNAPSHOT.read_text())
+    expected = DOCUMENT_ADAPTER.validate_json(SNAPSHOT.read_text())
     assert expected == result
+
+
+def test_stream_rfc_file() -> None:
+    expected = DOCUMENT_ADAPTER.validate_json(SNAPSHOT.read_text())
+    with stream_rfc_file(DOC_TO_TEST) as sections:
+        assert expected == ParsedDocument(sections=list(sections))
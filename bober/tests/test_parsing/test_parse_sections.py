@@ -1,3 +1,6 @@
+import io
+import mmap
+
 import pytest
 
 from bober.src.parsing.parsed_types import ParsedSection
@@ -122,3 +125,19 @@ Line with 12345 [Page 2]"""
         assert isinstance(next(iterator), ParsedSection)
         with pytest.raises(StopIteration):
             next(iterator)
+
+    def test_text_stream_matches_string(self) -> None:
+        doc = "Section 1\r\nLine 2 [Page 1]\n\x0c\nSection 2\n\nLine 3\x0bsplit"
+        expected = list(SectionsParser(doc))
+        assert list(SectionsParser(io.StringIO(doc, newline=""))) == expected
+
+    def test_mmap_matches_string(self, tmp_path) -> None:
+        doc = "Section 1\nLine 2 [Page 1]\n\x0c\nSection 2\n\nLine 3"
+        path = tmp_path / "doc.txt"
+        path.write_bytes(doc.encode())
+
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                sections = list(SectionsParser(mapped))
+
+        assert sections == list(SectionsParser(doc))
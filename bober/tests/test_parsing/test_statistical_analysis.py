@@ -0,0 +1,58 @@
+from array import array
+
+from bober.src.parsing.statistical_analysis import (
+    ItemCounts,
+    LineCounts,
+    StringStatisticsManager,
+)
+
+TEXT = "Hello, world!\n\n  two\twords  \nthree words here"
+# the text starts at line 10, pages change at line 12
+PAGES = {10: 1, 11: 1, 12: 2, 13: 2}
+
+
+class TestStatisticalAnalysis:
+    def test_line_counts(self):
+        counts = LineCounts(TEXT, PAGES, first_line=10)
+
+        assert list(counts.words) == [2, 0, 2, 3]
+        assert list(counts.word_chars) == [10, 0, 8, 14]
+        assert list(counts.non_white_chars) == [12, 0, 8, 14]
+        assert list(counts.all_chars) == [13, 0, 13, 16]
+        assert list(counts.pages) == [1, 1, 2, 2]
+
+    def test_empty_lines_are_skipped(self):
+        stats = StringStatisticsManager(TEXT, PAGES, first_line=10)
+
+        assert stats.get_word_stats() == (
+            "Total words: 7\n"
+            "Maximum words in a line: 3\n"
+            "Maximum words in a page: 5\n"
+            "Minimum words in a line: 2\n"
+            "Minimum words in a page: 2\n"
+            "Average words per line: 2.33\n"
+            "Average words per page: 3.50\n"
+        )
+
+    def test_underscore_runs_are_not_words(self):
+        counts = LineCounts("__init__ ___ _ snake_case", None)
+
+        # the words the ingest indexes, unlike \w+
+        assert list(counts.words) == [2]
+        assert list(counts.word_chars) == [18]
+
+    def test_item_counts_of_lines(self):
+        counts = ItemCounts.of_lines(
+            array('I', [3, 0, 1, 4, 0, 2]), array('H', [1, 1, 2, 2, 1, 1])
+        )
+
+        assert counts == ItemCounts(
+            total_items=10,
+            line_count=4,
+            max_items_line=4,
+            min_items_line=1,
+            items_per_page={1: 5, 2: 5},
+        )
+        assert ItemCounts.of_lines(array('I', [0, 0]), array('H', [1, 1])) == (
+            ItemCounts()
+        )
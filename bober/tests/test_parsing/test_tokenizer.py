@@ -0,0 +1,34 @@
+from bober.src.parsing.tokenizer import RegexTokenizer
+
+TOKENIZER = RegexTokenizer()
+
+
+class TestTokenizer:
+    def test_offsets(self):
+        assert TOKENIZER.tokenize("Hello, world!") == [
+            ("hello", 0, 5),
+            ("world", 7, 12),
+        ]
+
+    def test_underscores(self):
+        assert TOKENIZER.tokenize("___ chars_lala _1 ____") == [
+            ("chars_lala", 4, 14),
+            ("_1", 15, 17),
+        ]
+
+    def test_words_keep_case(self):
+        assert TOKENIZER.words("MixEd ___ CaSe") == ["MixEd", "CaSe"]
+
+    def test_tokenize_lines(self):
+        lines = ["Hello, world!", "", "   ", "a_b  C", "___", "end"]
+        assert TOKENIZER.tokenize_lines(lines) == [
+            TOKENIZER.tokenize(line) for line in lines
+        ]
+
+    def test_tokenize_lines_with_expanding_lowercase(self):
+        # "İ" lowercases to two characters
+        lines = ["İstanbul word", "Other"]
+        assert TOKENIZER.tokenize_lines(lines) == [
+            [("i̇stanbul", 0, 8), ("word", 9, 13)],
+            [("other", 0, 5)],
+        ]
@@ -0,0 +1,108 @@
+from pathlib import Path
+
+import pytest
+
+from bober.src.fe.handlers import create_word_group
+from bober.src.parsing.parse_rfc import parse_rfc_file
+from bober.src.phrases.phrase_index import PHRASE_INDEX, PhraseIndex
+from bober.src.phrases.phrases import search_phrase
+from bober.src.rfc_ingest.corpus_version import CORPUS_VERSION
+
+CURR_DIR = Path(__file__).parent
+DOC_TO_TEST = CURR_DIR.parent / "resources" / "examples" / "2324.txt"
+RFC_NUM = 2324
+
+
+def scan_for_phrase(phrase):
+    words = phrase.split()
+    found = []
+    for section_index, section in enumerate(
+        parse_rfc_file(DOC_TO_TEST).sections
+    ):
+        tokens = [
+            (line, token)
+            for line in section.lines.values()
+            for token in line.tokens
+        ]
+        for i in range(len(tokens) - len(words) + 1):
+            window = tokens[i : i + len(words)]
+            if [token.word for _, token in window] == words:
+                (first_line, first), (_, last) = window[0], window[-1]
+                found.append(
+                    (
+                        section_index,
+                        first_line.absolute_line,
+                        first_line.indentation,
+                        first.start,
+                        last.end,
+                    )
+                )
+    return found
+
+
+@pytest.mark.parametrize(
+    "phrase", ["coffee pot", "the", "of the", "hyper text coffee pot"]
+)
+def test_search_phrase(db_session, loaded_rfcs, phrase):
+    occurrences = search_phrase(db_session, phrase)
+
+    assert occurrences
+    assert occurrences == sorted(
+        occurrences, key=lambda o: (o.rfc_num, o.abs_line_number, o.start_pos)
+    )
+    assert {o.phrase for o in occurrences} <= {phrase}
+    assert [
+        (
+            o.section_index,
+            o.abs_line_number,
+            o.indentation,
+            o.start_pos,
+            o.end_pos,
+        )
+        for o in occurrences
+    ] == scan_for_phrase(phrase)
+
+
+def test_search_unknown_phrase(db_session, loaded_rfcs):
+    assert search_phrase(db_session, "coffee frobnicator") == []
+    assert search_phrase(db_session, "pot coffee") == []
+
+
+def test_postings_follow_ingests_of_other_processes(
+    db_session, loaded_rfcs, load_example, monkeypatch
+):
+    before = search_phrase(db_session, "coffee pot")
+
+    # an ingest committed elsewhere moves the stored version only
+    monkeypatch.setattr(CORPUS_VERSION, "bump", lambda: None)
+    monkeypatch.setattr(CORPUS_VERSION, "check_interval", 0)
+    load_example(RFC_NUM + 1, path=DOC_TO_TEST)
+
+    after = search_phrase(db_session, "coffee pot")
+    assert len(after) == 2 * len(before)
+    assert {o.rfc_num for o in after} == {RFC_NUM, RFC_NUM + 1}
+
+
+def test_postings_are_bounded(db_session, loaded_rfcs):
+    index = PhraseIndex(max_postings=100)
+
+    # "the" alone is over the bound
+    for phrase in ["of the", "coffee pot", "hyper text coffee pot"]:
+        assert index.search(db_session, phrase) == search_phrase(
+            db_session, phrase
+        )
+        assert index._total_size <= index.max_postings
+
+
+def test_postings_outlive_group_edits(db_session, loaded_rfcs):
+    search_phrase(db_session, "coffee pot")
+    postings = dict(PHRASE_INDEX._postings)
+
+    create_word_group(db_session, "drinks", ["coffee", "tea"])
+    search_phrase(db_session, "coffee pot")
+
+    assert postings
+    assert all(
+        PHRASE_INDEX._postings[token_id] is token_postings
+        for token_id, token_postings in postings.items()
+    )
@@ -0,0 +1,96 @@
+from dataclasses import FrozenInstanceError
+
+import pytest
+from pydantic import ValidationError
+
+from bober.src.fe.handlers import create_word_group
+from bober.src.rfc_ingest.corpus_version import CORPUS_VERSION
+from bober.src.search.cache import QUERY_CACHE, QueryCache
+from bober.src.search.search_rfc import SearchRFCQuery, search_rfcs
+from bober.src.search.words_index import (
+    QueryFilteredWordsParams,
+    query_filtered_words,
+)
+from bober.src.word_groups.word_groups import list_groups
+
+
+def test_repeated_query_is_served_from_cache(db_session, load_example):
+    load_example(1149)
+
+    first = search_rfcs(db_session, SearchRFCQuery(tokens=["carriers"]))
+    hits = QUERY_CACHE.hits
+    again = search_rfcs(db_session, SearchRFCQuery(tokens=["carriers"]))
+
+    assert again is first
+    assert QUERY_CACHE.hits == hits + 1
+
+
+def test_writes_invalidate(db_session, load_example):
+    load_example(1149)
+    assert [rfc.num for rfc in search_rfcs(db_session, SearchRFCQuery())] == [
+        1149
+    ]
+    assert list_groups(db_session) == ()
+
+    load_example(2324)
+    create_word_group(db_session, "drinks", ["coffee", "tea"])
+
+    assert {rfc.num for rfc in search_rfcs(db_session, SearchRFCQuery())} == {
+        1149,
+        2324,
+    }
+    assert [group.group_name for group in list_groups(db_session)] == ["drinks"]
+
+
+def test_writes_of_other_processes_invalidate(
+    db_session, load_example, monkeypatch
+):
+    load_example(1149)
+    assert [rfc.num for rfc in search_rfcs(db_session, SearchRFCQuery())] == [
+        1149
+    ]
+
+    # an ingest committed elsewhere moves the stored version only
+    monkeypatch.setattr(CORPUS_VERSION, "bump", lambda: None)
+    monkeypatch.setattr(CORPUS_VERSION, "check_interval", 0)
+    load_example(2324)
+
+    assert {rfc.num for rfc in search_rfcs(db_session, SearchRFCQuery())} == {
+        1149,
+        2324,
+    }
+
+
+def test_cached_results_are_immutable(db_session, load_example):
+    load_example(1149)
+    [rfc] = search_rfcs(db_session, SearchRFCQuery())
+    words = query_filtered_words(db_session, QueryFilteredWordsParams())
+
+    with pytest.raises(ValidationError):
+        rfc.title = "changed"
+    with pytest.raises(FrozenInstanceError):
+        words.total_count = 0
+    assert isinstance(rfc.authors, tuple)
+    assert isinstance(words.words, tuple)
+
+
+def test_ttl_and_lru_eviction(db_session):
+    now = [0.0]
+    cache = QueryCache(max_entries=2, ttl=10, clock=lambda: now[0])
+    calls = []
+
+    @cache.cached
+    def query(session, value):
+        calls.append(value)
+        return value
+
+    for value in [1, 2, 1, 3, 1]:
+        query(db_session, value)
+    # 2 was the least recently used when 3 came in
+    assert calls == [1, 2, 3]
+    query(db_session, 2)
+    assert calls == [1, 2, 3, 2]
+
+    now[0] = 11
+    query(db_session, 2)
+    assert calls == [1, 2, 3, 2, 2]
@@ -0,0 +1,232 @@
+import datetime
+import shutil
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, select
+
+from bober.src.db_models import (
+    CorpusStatistics,
+    RfcLine,
+    RfcSection,
+    RfcTokenCount,
+    StemStatistics,
+    TokenPosition,
+    TokenStatistics,
+)
+from bober.src.parsing.parse_rfc import parse_rfc_file
+from bober.src.rfc_ingest.ingest_rfc import ingest_staged_rfc, stage_rfc
+from bober.src.rfc_ingest.statistics import rebuild_statistics
+from bober.src.search.rfc_content import load_rfc_content
+
+DOC_TO_TEST = (
+    Path(__file__).parent.parent / "resources" / "examples" / "2324.txt"
+)
+RFC_NUM = 2324
+
+
+@pytest.fixture
+def rfc_file(tmp_path):
+    path = tmp_path / "rfc.txt"
+    shutil.copy(DOC_TO_TEST, path)
+    return path
+
+
+def section_ids(db_session):
+    return set(
+        db_session.execute(
+            select(RfcSection.id).where(RfcSection.rfc_num == RFC_NUM)
+        ).scalars()
+    )
+
+
+def total_positions(db_session):
+    return db_session.execute(
+        select(func.sum(RfcTokenCount.total_positions)).where(
+            RfcTokenCount.rfc_num == RFC_NUM
+        )
+    ).scalar_one()
+
+
+def test_identical_reingest_is_skipped(db_session, rfc_file, load_example):
+    load_example(RFC_NUM, path=rfc_file)
+    sections_before = section_ids(db_session)
+    positions_before = db_session.execute(
+        select(func.count(TokenPosition.id))
+    ).scalar_one()
+
+    load_example(RFC_NUM, path=rfc_file)
+
+    assert section_ids(db_session) == sections_before
+    assert (
+        db_session.execute(select(func.count(TokenPosition.id))).scalar_one()
+        == positions_before
+    )
+
+
+def test_changed_section_is_replaced(db_session, rfc_file, load_example):
+    load_example(RFC_NUM, path=rfc_file)
+    sections_before = section_ids(db_session)
+    total_before = total_positions(db_session)
+
+    content = rfc_file.read_text()
+    rfc_file.write_text(content.replace("HTCPCP/1.0", "HTCPCP/2.0", 1))
+    load_example(RFC_NUM, path=rfc_file)
+
+    sections_after = section_ids(db_session)
+    assert len(sections_after - sections_before) == 1
+    assert len(sections_after) == len(sections_before)
+    assert total_positions(db_session) == total_before
+    assert (
+        load_rfc_content(db_session, RFC_NUM) == rfc_file.read_text().rstrip()
+    )
+
+
+def test_edit_before_sections_keeps_them(db_session, rfc_file, load_example):
+    load_example(RFC_NUM, path=rfc_file)
+    first_section = db_session.execute(
+        select(RfcSection.id).where(
+            RfcSection.rfc_num == RFC_NUM, RfcSection.index == 0
+        )
+    ).scalar_one()
+    later_sections = section_ids(db_session) - {first_section}
+
+    # one more word in the first section moves every later token
+    content = rfc_file.read_text()
+    rfc_file.write_text(
+        content.replace(
+            "Category: Informational", "Category: Not Informational"
+        )
+    )
+    load_example(RFC_NUM, path=rfc_file)
+
+    assert later_sections < section_ids(db_session)
+    assert len(section_ids(db_session) - later_sections) == 1
+    abs_indexes = db_session.scalars(
+        select(TokenPosition.abs_index)
+        .where(TokenPosition.rfc_num == RFC_NUM)
+        .order_by(
+            TokenPosition.section_index,
+            TokenPosition.line_in_section,
+            TokenPosition.index,
+        )
+    ).all()
+    assert abs_indexes == list(range(total_positions(db_session)))
+    assert (
+        load_rfc_content(db_session, RFC_NUM) == rfc_file.read_text().rstrip()
+    )
+
+
+def test_staging_must_match_the_stored_sections(
+    db_session, rfc_file, load_example
+):
+    load_example(RFC_NUM, path=rfc_file)
+    # staged as if the rfc had no sections yet
+    staged = stage_rfc(RFC_NUM, parse_rfc_file(rfc_file), {})
+
+    with pytest.raises(ValueError):
+        ingest_staged_rfc(
+            db_session, staged, "rfc", datetime.date.today(), ["Eli"]
+        )
+
+
+def statistics(db_session):
+    return (
+        dict(
+            db_session.execute(
+                select(StemStatistics.stem, StemStatistics.document_frequency)
+            ).all()
+        ),
+        tuple(
+            db_session.execute(
+                select(
+                    CorpusStatistics.total_documents,
+                    CorpusStatistics.total_tokens,
+                )
+            ).one()
+        ),
+        {
+            row.token: tuple(row[1:])
+            for row in db_session.execute(
+                select(
+                    TokenStatistics.token,
+                    TokenStatistics.stem,
+                    TokenStatistics.total_occurrences,
+                    TokenStatistics.rfc_count,
+                    TokenStatistics.first_year,
+                    TokenStatistics.last_year,
+                )
+            )
+        },
+    )
+
+
+def test_statistics_follow_reingest(db_session, rfc_file, load_example):
+    load_example(RFC_NUM, path=rfc_file)
+    maintained = statistics(db_session)
+    rebuild_statistics(db_session)
+    assert statistics(db_session) == maintained
+    assert maintained[1] == (1, total_positions(db_session))
+    assert maintained[0]["coffe"] == 1
+
+    content = rfc_file.read_text()
+    rfc_file.write_text(
+        content.replace("coffee", "hot tea").replace("Coffee", "Hot tea")
+    )
+    load_example(RFC_NUM, path=rfc_file)
+
+    maintained = statistics(db_session)
+    rebuild_statistics(db_session)
+    assert statistics(db_session) == maintained
+    assert maintained[1] == (1, total_positions(db_session))
+    assert "coffe" not in maintained[0]
+
+
+def test_token_statistics_follow_reingest(db_session, rfc_file, load_example):
+    load_example(1149, publish_at=datetime.date(1990, 4, 1))
+    load_example(RFC_NUM, path=rfc_file)
+    maintained = statistics(db_session)
+    this_year = datetime.date.today().year
+    assert maintained[2]["unlimited"][2:] == (2, 1990, this_year)
+
+    # 2324 stops using a word the older rfc shares
+    content = rfc_file.read_text()
+    rfc_file.write_text(content.replace("unlimited", "boundless"))
+    load_example(RFC_NUM, path=rfc_file)
+
+    maintained = statistics(db_session)
+    rebuild_statistics(db_session)
+    assert statistics(db_session) == maintained
+    assert maintained[2]["unlimited"][2:] == (1, 1990, 1990)
+    assert maintained[2]["boundless"][2:] == (1, this_year, this_year)
+
+
+def test_coordinates_follow_reingest(db_session, rfc_file, load_example):
+    load_example(RFC_NUM, path=rfc_file)
+    content = rfc_file.read_text()
+    # shifts the lines and columns of everything after the first change
+    rfc_file.write_text(content.replace("coffee", "hot\n   tea", 3))
+    load_example(RFC_NUM, path=rfc_file)
+
+    stored = select(
+        TokenPosition.rfc_num,
+        TokenPosition.section_index,
+        TokenPosition.line_in_section,
+        TokenPosition.abs_line,
+        TokenPosition.abs_column,
+        TokenPosition.abs_end_column,
+    ).order_by(TokenPosition.id)
+    joined = (
+        select(
+            RfcSection.rfc_num,
+            RfcSection.index,
+            RfcLine.line_number,
+            RfcLine.abs_line_number,
+            RfcLine.indentation + TokenPosition.start_position,
+            RfcLine.indentation + TokenPosition.end_position,
+        )
+        .join(TokenPosition.line)
+        .join(RfcLine.section)
+        .order_by(TokenPosition.id)
+    )
+    assert db_session.execute(stored).all() == db_session.execute(joined).all()
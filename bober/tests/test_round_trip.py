@@ -2,11 +2,24 @@ import datetime
 from pathlib import Path
 
 import pytest
+from sqlalchemy import delete, func, select
 
+from bober.src.db_models import (
+    RfcLine,
+    RfcPage,
+    RfcSection,
+    RfcTokenCount,
+    TokenPosition,
+)
 from bober.src.rfc_ingest.load_from_file import load_single_file
+from bober.src.rfc_ingest.page_text import backfill_rfc_pages
 from bober.src.search.rfc_content import (
+    DOCUMENT_CACHE,
     get_absolute_positions,
+    get_line_page_map,
     load_rfc_content,
+    load_rfc_lines,
+    load_rfc_page,
 )
 
 CURR_DIR = Path(__file__).parent
@@ -43,6 +56,56 @@ def test_round_trip(db_session, rfc_num, load_rfc):
     assert original == loaded
 
 
+@pytest.mark.parametrize("start, end", [(1, 1), (50, 120), (300, 10_000)])
+def test_line_range(db_session, rfc_num, load_rfc, start, end):
+    original = DOC_TO_TEST.read_text().rstrip().split("\n")
+
+    assert load_rfc_lines(db_session, rfc_num, start, end) == (
+        original[start - 1 : end]
+    )
+
+
+def test_pages(db_session, rfc_num, load_rfc):
+    pages = db_session.scalars(
+        select(RfcPage.page).distinct().order_by(RfcPage.page)
+    ).all()
+
+    assert len(pages) > 1
+    assert [
+        line
+        for page in pages
+        for line in load_rfc_page(db_session, rfc_num, page)
+    ] == DOC_TO_TEST.read_text().rstrip().split("\n")
+
+
+def test_line_page_map(db_session, rfc_num, load_rfc):
+    section_lines = db_session.execute(
+        select(RfcLine.abs_line_number, RfcSection.page).join(RfcLine.section)
+    ).all()
+    line_pages = get_line_page_map(db_session, rfc_num)
+
+    assert section_lines
+    assert all(line_pages[line] == page for line, page in section_lines)
+    # empty lines before the first section are on its page
+    assert line_pages[1] == min(page for _, page in section_lines)
+
+
+def test_backfill_rebuilds_stored_text(db_session, rfc_num, load_rfc):
+    runs = select(RfcPage.first_line, RfcPage.page, RfcPage.line_count)
+    runs = runs.order_by(RfcPage.first_line)
+    stored = db_session.execute(runs).all()
+    db_session.execute(delete(RfcPage))
+    DOCUMENT_CACHE.clear()
+    assert load_rfc_content(db_session, rfc_num) is None
+
+    assert backfill_rfc_pages(db_session) == 1
+    db_session.commit()
+    assert db_session.execute(runs).all() == stored
+    assert load_rfc_content(db_session, rfc_num) == (
+        DOC_TO_TEST.read_text().rstrip()
+    )
+
+
 def test_abs_position(db_session, rfc_num, load_rfc):
     original = DOC_TO_TEST.read_text().rstrip().splitlines()
     positions = get_absolute_positions(db_session, rfc_num, "protocol")
@@ -52,3 +115,21 @@ def test_abs_position(db_session, rfc_num, load_rfc):
     for pos in positions:
         value = original[pos.line - 1][pos.column : pos.column + pos.length]
         assert value.lower() in ["protocol", "protocols"]
+
+
+def test_token_counts(db_session, rfc_num, load_rfc):
+    positions = db_session.execute(
+        select(TokenPosition.token_id, func.count())
+        .join(TokenPosition.line)
+        .join(RfcLine.section)
+        .where(RfcSection.rfc_num == rfc_num)
+        .group_by(TokenPosition.token_id)
+    ).all()
+    counts = db_session.execute(
+        select(RfcTokenCount.token_id, RfcTokenCount.total_positions).where(
+            RfcTokenCount.rfc_num == rfc_num
+        )
+    ).all()
+
+    assert positions
+    assert dict(positions) == dict(counts)
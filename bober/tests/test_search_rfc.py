@@ -0,0 +1,95 @@
+import math
+from collections import Counter
+from functools import cache
+from pathlib import Path
+
+import pytest
+from sqlalchemy import update
+
+from bober.src.db_models import Rfc
+from bober.src.parsing.parse_rfc import parse_rfc_file
+from bober.src.parsing.stemmer import STEMMER
+from bober.src.search.bm25 import DEFAULT_B, DEFAULT_K1
+from bober.src.search.search_rfc import Ranking, SearchRFCQuery, search_rfcs
+
+EXAMPLES_DIR = Path(__file__).parent.parent / "resources" / "examples"
+RFC_NUMS = [1149, 1813, 2324]
+
+
+@pytest.fixture
+def rfc_nums():
+    return RFC_NUMS
+
+
+@cache
+def rfc_stem_counts():
+    return {
+        rfc_num: Counter(
+            STEMMER.stem(token.word)
+            for section in parse_rfc_file(
+                EXAMPLES_DIR / f"{rfc_num}.txt"
+            ).sections
+            for line in section.lines.values()
+            for token in line.tokens
+        )
+        for rfc_num in RFC_NUMS
+    }
+
+
+def expected_bm25(tokens, k1, b):
+    stem_counts = rfc_stem_counts()
+    lengths = {
+        rfc_num: counts.total() for rfc_num, counts in stem_counts.items()
+    }
+    average_length = sum(lengths.values()) / len(RFC_NUMS)
+
+    scores = {}
+    for stem in {STEMMER.stem(token) for token in tokens}:
+        df = sum(1 for counts in stem_counts.values() if counts[stem])
+        idf = math.log(1 + (len(RFC_NUMS) - df + 0.5) / (df + 0.5))
+        for rfc_num, counts in stem_counts.items():
+            if tf := counts[stem]:
+                norm = 1 - b + b * lengths[rfc_num] / average_length
+                scores[rfc_num] = scores.get(rfc_num, 0) + idf * tf * (
+                    k1 + 1
+                ) / (tf + k1 * norm)
+    return scores
+
+
+@pytest.mark.parametrize("k1, b", [(1.2, 0.75), (2.0, 0.0)])
+def test_bm25(db_session, loaded_rfcs, k1, b):
+    tokens = ["coffee", "carriers", "the"]
+    results = search_rfcs(
+        db_session,
+        SearchRFCQuery(tokens=tokens, ranking=Ranking.BM25, k1=k1, b=b),
+    )
+
+    expected = expected_bm25(tokens, k1, b)
+    assert {rfc.num: rfc.rank for rfc in results} == pytest.approx(expected)
+    assert [rfc.num for rfc in results] == sorted(
+        expected, key=expected.get, reverse=True
+    )
+
+
+def test_limit_keeps_top_results(db_session, loaded_rfcs):
+    query = SearchRFCQuery(tokens=["the"], ranking=Ranking.BM25)
+    results = search_rfcs(db_session, query)
+    top = search_rfcs(db_session, query.model_copy(update={"limit": 2}))
+
+    assert len(results) == len(RFC_NUMS)
+    assert top == results[:2]
+
+
+def test_bm25_ranks_rfcs_without_a_stored_length(db_session, loaded_rfcs):
+    db_session.execute(
+        update(Rfc).where(Rfc.num == 1149).values(total_tokens=None)
+    )
+    tokens = ["coffee", "carriers", "the"]
+    results = search_rfcs(
+        db_session, SearchRFCQuery(tokens=tokens, ranking=Ranking.BM25)
+    )
+
+    # the unknown length counts as the average one, as if b was 0
+    expected = expected_bm25(tokens, DEFAULT_K1, DEFAULT_B)
+    expected[1149] = expected_bm25(tokens, DEFAULT_K1, 0)[1149]
+    assert {rfc.num: rfc.rank for rfc in results} == pytest.approx(expected)
@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import or_, select
+
+from bober.src.db_models import Token
+from bober.src.rfc_ingest.corpus_version import CORPUS_VERSION
+from bober.src.search.vocabulary import VOCABULARY, NgramIndex
+from bober.src.search.words_index import (
+    QueryFilteredWordsParams,
+    query_filtered_words,
+)
+
+
+@pytest.mark.parametrize(
+    "substring", ["", "a", "ne", "net", "netw", "work", "tworks", "xyz"]
+)
+def test_ngram_index(substring):
+    words = ["network", "networks", "internet", "net", "work", "a", "tea"]
+
+    assert NgramIndex(words).containing(substring) == {
+        word for word in words if substring in word
+    }
+
+
+@pytest.mark.parametrize("partial_token", ["co", "coff", "ENC", "ternet"])
+def test_partial_token_matches_ilike(db_session, loaded_rfcs, partial_token):
+    pattern = f"%{partial_token}%"
+    expected = set(
+        db_session.scalars(
+            select(Token.token).where(
+                or_(
+                    Token.stem.in_(
+                        select(Token.stem).where(Token.token.ilike(pattern))
+                    ),
+                    Token.stem.ilike(pattern),
+                )
+            )
+        )
+    )
+
+    result = query_filtered_words(
+        db_session,
+        QueryFilteredWordsParams(
+            partial_token=partial_token, page_size=1_000_000
+        ),
+    )
+    assert expected
+    assert {token for token, _, _ in result.words} == expected
+
+
+def test_vocabulary_follows_ingests_of_other_processes(
+    db_session, loaded_rfcs, load_example, monkeypatch
+):
+    assert VOCABULARY.matching_stems(db_session, "carrier") == set()
+
+    # an ingest committed elsewhere moves the stored version only
+    monkeypatch.setattr(CORPUS_VERSION, "bump", lambda: None)
+    monkeypatch.setattr(CORPUS_VERSION, "check_interval", 0)
+    load_example(1149)
+
+    assert VOCABULARY.matching_stems(db_session, "carrier")
+
+
+def test_stored_version_is_read_once_per_interval(
+    db_session, loaded_rfcs, monkeypatch
+):
+    stored = CORPUS_VERSION.stored
+    reads = []
+    monkeypatch.setattr(
+        CORPUS_VERSION,
+        "stored",
+        lambda *args: reads.append(args) or stored(*args),
+    )
+
+    for partial_token in ["c", "co", "cof", "coff"]:
+        VOCABULARY.matching_stems(db_session, partial_token)
+
+    assert len(reads) == 1
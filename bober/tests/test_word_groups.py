@@ -0,0 +1,131 @@
+from sqlalchemy import event, func, select
+
+from bober.src.db_models import RfcTokenCount, Token
+from bober.src.search.words_index import (
+    QueryFilteredWordsParams,
+    query_filtered_words,
+)
+from bober.src.word_groups.word_groups import (
+    add_words_to_group,
+    create_word_group,
+    group_occurrences,
+    group_rfc_occurrences,
+    remove_words_from_group,
+)
+
+WORDS = ["coffee", "pot", "the", "carriers", "never-seen"]
+
+
+def counted(session, words):
+    """(rfc, occurrences, words) aggregated from rfc_token_count."""
+    return sorted(
+        session.execute(
+            select(
+                RfcTokenCount.rfc_num,
+                func.sum(RfcTokenCount.total_positions),
+                func.count(),
+            )
+            .join(Token, Token.id == RfcTokenCount.token_id)
+            .where(Token.token.in_(words))
+            .group_by(RfcTokenCount.rfc_num)
+        ).all()
+    )
+
+
+def rolled_up(session, group_name):
+    return sorted(
+        (rfc.rfc_num, rfc.count, rfc.words)
+        for rfc in group_rfc_occurrences(session, group_name)
+    )
+
+
+def test_rollup_follows_groups_and_ingest(db_session, load_example):
+    load_example(2324)
+    create_word_group(db_session, "drinks", WORDS)
+    assert rolled_up(db_session, "drinks") == counted(db_session, WORDS)
+
+    # an rfc ingested after the group was made
+    load_example(1149)
+    assert {rfc for rfc, *_ in rolled_up(db_session, "drinks")} == {1149, 2324}
+    assert rolled_up(db_session, "drinks") == counted(db_session, WORDS)
+
+    remove_words_from_group(db_session, "drinks", ["the", "carriers"])
+    assert rolled_up(db_session, "drinks") == counted(
+        db_session, ["coffee", "pot"]
+    )
+    add_words_to_group(db_session, "drinks", ["carriers"])
+    assert rolled_up(db_session, "drinks") == counted(
+        db_session, ["coffee", "pot", "carriers"]
+    )
+
+
+def test_group_occurrences(db_session, load_example):
+    load_example(1149)
+    load_example(2324)
+    create_word_group(db_session, "drinks", WORDS)
+    total = sum(
+        rfc.count for rfc in group_rfc_occurrences(db_session, "drinks")
+    )
+
+    occurrences = []
+    cursor = None
+    while True:
+        page = group_occurrences(
+            db_session, "drinks", cursor=cursor, page_size=50
+        )
+        assert page.total_count == total
+        assert page.total_is_exact
+        occurrences.extend(page.occurrences)
+        if not (cursor := page.next_cursor):
+            break
+
+    assert len(occurrences) == total
+    assert {occurrence.word for occurrence in occurrences} == set(WORDS[:4])
+    keys = [(o.rfc_num, o.abs_pos.line, o.abs_pos.column) for o in occurrences]
+    assert keys == sorted(keys)
+
+    in_2324 = group_occurrences(
+        db_session, "drinks", rfc_num=2324, page_size=1_000_000
+    ).occurrences
+    assert in_2324 == [o for o in occurrences if o.rfc_num == 2324]
+
+
+def test_group_occurrences_is_one_statement(db_session, load_example):
+    load_example(2324)
+    create_word_group(db_session, "drinks", WORDS)
+    statements = []
+    engine = db_session.get_bind().engine
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        page = group_occurrences(db_session, "drinks", page_size=10)
+        unknown = group_occurrences(db_session, "no such group")
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert len(statements) == 2
+    assert page.total_is_exact and page.total_count > 10
+    assert unknown.occurrences == []
+    assert (unknown.total_count, unknown.total_is_exact) == (0, True)
+
+
+def test_words_of_overlapping_groups(db_session, load_example):
+    load_example(2324)
+    create_word_group(db_session, "drinks", ["coffee", "tea"])
+    create_word_group(db_session, "vessels", ["coffee", "pot"])
+
+    for rfc_title in [None, "rfc"]:
+        result = query_filtered_words(
+            db_session,
+            QueryFilteredWordsParams(
+                token_groups=["drinks", "vessels"], rfc_title=rfc_title
+            ),
+        )
+        # tea never occurs, coffee is in both groups
+        assert sorted(token for token, _, _ in result.words) == [
+            "coffee",
+            "pot",
+        ]